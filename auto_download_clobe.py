@@ -11,9 +11,22 @@ from __future__ import annotations
 #   ⚠️ 클로브는 SPA(React)라 silkroad21(ASP)과 달리 요소를 텍스트 기반 XPath로 잡고
 #      hydration을 넉넉히 기다린다. 클래스명은 빌드마다 바뀔 수 있어 쓰지 않는다.
 #
-#   날짜: 화면 기본 조회범위를 그대로 받는다. BankTx.id가 내용 기반(계좌·일시·금액·적요)
+#   날짜: 기본은 화면 기본 조회범위를 그대로 받는다. BankTx.id가 내용 기반(계좌·일시·금액·적요)
 #        멱등 키라 매일 겹쳐 받아도 upsert로 중복 없이 누적된다. 통장 파일이 작아(수천 행)
 #        기본 범위를 매일 받아도 부담이 없다 → 깨지기 쉬운 날짜 picker 조작을 피한다.
+#        조회구간 지정(CLOBE_WINDOW_MODE)은 network 모드에서만 된다. picker를 만지지 않고,
+#        캡처한 export 요청의 날짜 파라미터만 바꿔 재호출한다.
+#          default     화면 기본 범위 그대로(기존 동작).
+#          incremental 워터마크(마지막 성공 구간 종료일) - CLOBE_OVERLAP_DAYS 부터 오늘까지.
+#          backfill    CLOBE_BACKFILL_FROM ~ CLOBE_BACKFILL_TO 를 월 단위로 잘라 순서대로 전송.
+#        구간 하나가 성공할 때마다 워터마크를 STATE_DIR/clobe_state.json 에 기록한다.
+#
+#   받는 방식(CLOBE_CAPTURE_MODE):
+#     ui      (기본) headed Chrome + xvfb로 버튼 클릭 → 다운로드 폴더 감시.
+#     network headless Chrome. 버튼 클릭 때 SPA가 보내는 export XHR/fetch를 CDP Network
+#             로그(performance 로그)에서 잡아, 같은 요청을 세션 쿠키·토큰 그대로 requests로
+#             직접 호출한다. 응답 xlsx 바이트는 디스크를 거치지 않고 바로 gzip → 전송.
+#             가상 화면·다운로드 폴더 폴링이 필요 없다.
 # =====================================================================
 
 import os
@@ -22,7 +35,12 @@ import time
 import glob
 import gzip
 import base64
+import io
+import json
+import re
 from pathlib import Path
+from datetime import date, datetime, timedelta
+from urllib.parse import unquote, urlsplit, urlunsplit, parse_qsl, urlencode
 
 import requests
 from selenium import webdriver
@@ -33,6 +51,10 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 import urllib3.exceptions
 
+import run_log
+import instrument
+import waits
+
 RETRYABLE_ERRORS = (
     TimeoutException,
     WebDriverException,
@@ -43,30 +65,14 @@ RETRYABLE_ERRORS = (
     ConnectionError,
 )
 
-
-# ===== 로그를 파일로도 남김 =====
-class DualLogger:
-    def __init__(self, filepath: str):
-        self.terminal = sys.__stdout__
-        self.log = open(filepath, "w", encoding="utf-8")
-
-    def write(self, message: str):
-        self.terminal.write(message)
-        self.log.write(message)
-
-    def flush(self):
-        self.terminal.flush()
-        self.log.flush()
-
-
-sys.stdout = sys.stderr = DualLogger("log_clobe.txt")
-
 # ===== 환경 / 설정 =====
+#   import 만으로는 아무 일도 일어나지 않게(로그 설치·필수 env 확인·폴더 생성은 main 에서)
+#   → scheduler_daemon.py 가 같은 프로세스에서 run() 을 부른다.
 RUNNER = os.getenv("GITHUB_ACTIONS") == "true"
 
 # 클로브 로그인
-LOGIN_ID = os.environ["CLOBE_LOGIN_ID"]     # 클로브 이메일
-LOGIN_PW = os.environ["CLOBE_LOGIN_PW"]     # 클로브 비번
+LOGIN_ID = os.getenv("CLOBE_LOGIN_ID")     # 클로브 이메일
+LOGIN_PW = os.getenv("CLOBE_LOGIN_PW")     # 클로브 비번
 
 # 로그인 후 반드시 이 회사(워크스페이스)여야 한다. 계정에 회사가 2개라 다르면 엉뚱한 데이터를 받는다.
 # ⚠️ os.getenv(key, default)는 yml이 빈 문자열을 넘기면(시크릿 미설정) default 대신 ""를 준다.
@@ -74,25 +80,44 @@ LOGIN_PW = os.environ["CLOBE_LOGIN_PW"]     # 클로브 비번
 COMPANY_NAME = os.getenv("CLOBE_COMPANY_NAME") or "에스앤피그룹"
 
 # 재무 ERP 수신 (필수)
-FIN_URL = os.environ["FINANCE_BANK_URL"]         # 예: http://<서버IP>:8080/api/bank/ingest
+FIN_URL = os.getenv("FINANCE_BANK_URL")          # 예: http://<서버IP>:8080/api/bank/ingest
 FIN_KEY = os.getenv("FINANCE_BANK_KEY", "")      # 서버 BANK_INGEST_KEY와 동일(안 쓰면 빈값)
 FIN_USER = os.getenv("FINANCE_BASIC_USER", "")   # Nginx Basic 인증(직원 접속 계정)
 FIN_PASS = os.getenv("FINANCE_BASIC_PASS", "")
 
+# 받는 방식: ui(버튼 클릭 + 다운로드 폴더) / network(CDP로 export 요청을 잡아 직접 호출)
+CAPTURE_MODE = (os.getenv("CLOBE_CAPTURE_MODE") or "ui").strip().lower()
+if CAPTURE_MODE not in ("ui", "network"):
+    print(f"⚠️ 알 수 없는 CLOBE_CAPTURE_MODE={CAPTURE_MODE!r} → ui 로 진행")
+    CAPTURE_MODE = "ui"
+
+# 조회구간: default(화면 기본 범위) / incremental(워터마크 이후) / backfill(월 단위 분할)
+WINDOW_MODES = ("default", "incremental", "backfill")
+WINDOW_MODE = (os.getenv("CLOBE_WINDOW_MODE") or "default").strip().lower()
+OVERLAP_DAYS = int(os.getenv("CLOBE_OVERLAP_DAYS") or 3)          # 워터마크와 겹쳐 받을 일수
+INITIAL_DAYS = int(os.getenv("CLOBE_INITIAL_DAYS") or 31)         # 워터마크가 없을 때 받을 일수
+BACKFILL_FROM = os.getenv("CLOBE_BACKFILL_FROM") or ""            # 예: 2025-01-01
+BACKFILL_TO = os.getenv("CLOBE_BACKFILL_TO") or ""                # 비우면 오늘
+# export 요청의 시작/종료일 파라미터 이름(예: "startDate,endDate"). 비우면 날짜 모양 값으로 자동 탐지.
+DATE_PARAMS = [p.strip() for p in (os.getenv("CLOBE_DATE_PARAMS") or "").split(",") if p.strip()]
+STATE_DIR = Path(os.getenv("STATE_DIR") or "state")
+STATE_FILE = STATE_DIR / "clobe_state.json"
+
 # URLs
 SIGNIN_URL = "https://app.clobe.ai/auth/signin"
 TRANSACTIONS_URL = "https://app.clobe.ai/clobe/transactions"
+# 「엑셀 다운로드」 버튼 — '위하고 업로드용'이 들어간 버튼은 제외
+EXPORT_BUTTON_XPATH = "//button[contains(normalize-space(.),'엑셀 다운로드') and not(contains(.,'위하고'))]"
 
 # 다운로드 폴더
 if RUNNER:
     downloads_folder = str((Path.cwd() / "downloads_clobe").resolve())
 else:
     downloads_folder = r"C:\Users\white\Downloads\csv_clobe"
-Path(downloads_folder).mkdir(parents=True, exist_ok=True)
 
 
 # ===== Helpers =====
-def make_driver(headless: bool = True) -> webdriver.Chrome:
+def make_driver(headless: bool = True, capture_network: bool = False) -> webdriver.Chrome:
     options = webdriver.ChromeOptions()
     if headless:
         options.add_argument("--headless=new")
@@ -113,6 +138,9 @@ def make_driver(headless: bool = True) -> webdriver.Chrome:
             "safebrowsing.enabled": True,
         },
     )
+    if capture_network:
+        # CDP Network 이벤트를 performance 로그로 받는다(driver.get_log("performance")).
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
     chrome_bin = os.getenv("CHROME_PATH")
     if chrome_bin:
         options.binary_location = chrome_bin
@@ -127,9 +155,12 @@ def make_driver(headless: bool = True) -> webdriver.Chrome:
         )
     except Exception:
         pass
+    if capture_network:
+        driver.execute_cdp_cmd("Network.enable", {})
     return driver
 
 
+@instrument.span("login")
 def do_login(driver: webdriver.Chrome, max_retries: int = 3) -> None:
     """클로브 이메일 로그인. SPA라 입력칸 hydration을 기다린다."""
     wait = WebDriverWait(driver, 30)
@@ -151,13 +182,13 @@ def do_login(driver: webdriver.Chrome, max_retries: int = 3) -> None:
             # 로그인 성공 = /auth 를 벗어남
             wait.until(lambda d: "/auth" not in d.current_url)
             print(f"[INFO] 로그인 성공 → {driver.current_url}")
-            time.sleep(2)  # 홈 hydration
+            waits.until(driver, waits.spa_hydrated(), "home_hydrated", timeout=15, required=False)
             return
         except RETRYABLE_ERRORS as e:
             last_error = e
             print(f"[WARN] 로그인 시도 {attempt} 실패: {type(e).__name__}: {str(e)[:200]}")
             if attempt < max_retries:
-                time.sleep(10 * attempt)
+                waits.backoff(attempt, e, "login")
     raise RuntimeError(f"로그인 {max_retries}회 모두 실패. 마지막 에러: {last_error}")
 
 
@@ -179,12 +210,11 @@ def dismiss_modals(driver: webdriver.Chrome) -> None:
                     if el.is_displayed():
                         driver.execute_script("arguments[0].click();", el)
                         closed = True
-                        time.sleep(0.4)
+                        waits.until(driver, waits.gone(el), "modal_closed", timeout=3, required=False)
             except Exception:
                 pass
         if not closed:
             break
-        time.sleep(0.4)
 
 
 def wait_for_data(driver: webdriver.Chrome, timeout: int = 40) -> None:
@@ -193,9 +223,12 @@ def wait_for_data(driver: webdriver.Chrome, timeout: int = 40) -> None:
     WebDriverWait(driver, timeout).until(
         EC.presence_of_element_located((By.XPATH, "//*[contains(text(),'합계')]"))
     )
-    time.sleep(2)  # 버튼 hydration 여유
+    # 버튼 hydration: 「엑셀 다운로드」가 보이고 눌릴 수 있을 때까지
+    waits.until(driver, waits.spa_hydrated((By.XPATH, EXPORT_BUTTON_XPATH)), "transactions_hydrated",
+                timeout=10, required=False)
 
 
+@instrument.span("company")
 def verify_company(driver: webdriver.Chrome) -> bool:
     """좌상단 워크스페이스가 COMPANY_NAME인지 확인하고, 다르면 전환한다(계정에 회사 2개).
     전환했으면 True(호출부가 통장내역으로 재진입해야 함 — 전환 시 홈으로 튕긴다), 이미 맞으면 False."""
@@ -211,18 +244,18 @@ def verify_company(driver: webdriver.Chrome) -> bool:
     print(f"[INFO] 현재 회사가 '{COMPANY_NAME}' 아님(현재: {switcher.text!r}) → 전환 시도")
     dismiss_modals(driver)
     driver.execute_script("arguments[0].click();", switcher)  # 가로채임 우회: JS 클릭
-    time.sleep(1)
     target = wait.until(
         EC.element_to_be_clickable((By.XPATH, f"//*[contains(text(),'{COMPANY_NAME}')]"))
     )
     driver.execute_script("arguments[0].click();", target)
     print(f"[INFO] 회사 전환: {COMPANY_NAME}")
-    time.sleep(3)
+    waits.until(driver, waits.text_present(COMPANY_NAME), "company_switched", timeout=10, required=False)
     if COMPANY_NAME not in driver.page_source:
         raise RuntimeError(f"회사 '{COMPANY_NAME}' 전환 확인 실패 — 다른 회사 데이터를 받을 위험")
     return True
 
 
+@instrument.span("navigate")
 def go_to_transactions(driver: webdriver.Chrome) -> None:
     """통장내역 페이지로 들어가 모달 닫고 실데이터(합계 푸터) 로드를 기다린다."""
     driver.get(TRANSACTIONS_URL)
@@ -231,19 +264,7 @@ def go_to_transactions(driver: webdriver.Chrome) -> None:
 
 
 def wait_for_download_complete(timeout: int = 180) -> str:
-    end = time.time() + timeout
-    while time.time() < end:
-        if glob.glob(os.path.join(downloads_folder, "*.crdownload")):
-            time.sleep(0.8)
-            continue
-        done = []
-        for ext in ("*.xlsx", "*.xls"):
-            done.extend(glob.glob(os.path.join(downloads_folder, ext)))
-        if done:
-            return max(done, key=os.path.getctime)
-        time.sleep(0.8)
-    print(f"[DEBUG] 다운로드 폴더: {os.listdir(downloads_folder)}")
-    raise TimeoutError("다운로드 완료 대기 시간 초과")
+    return waits.wait_for_download(downloads_folder, timeout, patterns=("*.xlsx", "*.xls"))
 
 
 def clear_downloads() -> None:
@@ -264,7 +285,7 @@ def download_transactions(driver: webdriver.Chrome) -> str:
     # 「엑셀 다운로드」 버튼 — '위하고'가 들어간 버튼은 제외.
     btn = wait.until(
         EC.element_to_be_clickable(
-            (By.XPATH, "//button[contains(normalize-space(.),'엑셀 다운로드') and not(contains(.,'위하고'))]")
+            (By.XPATH, EXPORT_BUTTON_XPATH)
         )
     )
     print("[INFO] 「엑셀 다운로드」 클릭")
@@ -285,25 +306,205 @@ def download_transactions(driver: webdriver.Chrome) -> str:
     except Exception:
         pass
 
-    path = wait_for_download_complete(timeout=180)
-    size = os.path.getsize(path)
+    t0 = time.time()
+    with instrument.span("download", mode="ui") as sp:
+        path = wait_for_download_complete(timeout=180)
+        size = os.path.getsize(path)
+        sp.add(bytes=size)
     print(f"[INFO] 통장 내역 다운로드 완료: {os.path.basename(path)} ({size/1e6:.2f} MB)")
+    run_log.event("download", bytes=size, duration_s=round(time.time() - t0, 3))
     return path
 
 
+# ===== network 모드: export 요청 캡처 → 직접 호출 =====
+# 엑셀 응답으로 볼 Content-Type / 파일명 단서
+_XLSX_MIME_HINTS = ("spreadsheetml", "ms-excel", "octet-stream")
+# 재호출 때 그대로 넘기면 안 되는 헤더(requests/세션이 다시 채운다)
+_DROP_HEADERS = {"host", "content-length", "cookie", "accept-encoding", "connection"}
+
+
+def _drain_network_log(driver: webdriver.Chrome, requests_by_id: dict, responses_by_id: dict) -> None:
+    """performance 로그에 쌓인 CDP Network 이벤트를 요청/응답 테이블로 모은다."""
+    for entry in driver.get_log("performance"):
+        try:
+            msg = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        method = msg.get("method", "")
+        params = msg.get("params", {})
+        rid = params.get("requestId")
+        if not rid:
+            continue
+        if method == "Network.requestWillBeSent":
+            req = params.get("request", {})
+            # ExtraInfo 가 먼저 올 수 있다 → 덮어쓰지 말고 합쳐서 extra_headers(Authorization) 를 살린다
+            requests_by_id.setdefault(rid, {}).update({
+                "url": req.get("url", ""),
+                "method": req.get("method", "GET"),
+                "headers": dict(req.get("headers", {})),
+                "post_data": req.get("postData"),
+                "has_post_data": bool(req.get("hasPostData")),
+                "type": params.get("type", ""),
+            })
+        elif method == "Network.requestWillBeSentExtraInfo":
+            # Authorization 등 JS가 붙인 헤더 중 일부는 ExtraInfo 쪽에만 온다.
+            requests_by_id.setdefault(rid, {"headers": {}}).setdefault("extra_headers", {}).update(
+                params.get("headers", {})
+            )
+        elif method == "Network.responseReceived":
+            resp = params.get("response", {})
+            responses_by_id[rid] = {
+                "status": resp.get("status"),
+                "mime": (resp.get("mimeType") or "").lower(),
+                "headers": {k.lower(): v for k, v in resp.get("headers", {}).items()},
+            }
+
+
+def _looks_like_export(req: dict, resp: dict) -> bool:
+    if req.get("type") not in ("XHR", "Fetch"):
+        return False
+    disposition = resp.get("headers", {}).get("content-disposition", "")
+    if ".xls" in disposition.lower():
+        return True
+    return any(h in resp.get("mime", "") for h in _XLSX_MIME_HINTS)
+
+
+@instrument.span("capture")
+def capture_export_request(driver: webdriver.Chrome, timeout: int = 60) -> dict:
+    """「엑셀 다운로드」 클릭 → SPA가 보내는 export XHR/fetch를 CDP Network 로그에서 찾아 반환.
+    (통장내역 페이지·데이터 로드는 호출 전에 끝나 있어야 함.)"""
+    requests_by_id: dict = {}
+    responses_by_id: dict = {}
+    _drain_network_log(driver, requests_by_id, responses_by_id)  # 페이지 로드분은 버린다
+    requests_by_id.clear()
+    responses_by_id.clear()
+
+    btn = WebDriverWait(driver, 30).until(
+        EC.element_to_be_clickable(
+            (By.XPATH, EXPORT_BUTTON_XPATH)
+        )
+    )
+    print("[INFO] 「엑셀 다운로드」 클릭 (network 캡처)")
+    driver.execute_script("arguments[0].click();", btn)
+    try:
+        confirm = WebDriverWait(driver, 5).until(
+            EC.element_to_be_clickable(
+                (By.XPATH, "//div[@role='dialog']//button[contains(.,'다운로드') or normalize-space(.)='확인']")
+            )
+        )
+        confirm.click()
+        print("[INFO] 다운로드 확인 모달 처리")
+    except Exception:
+        pass
+
+    end = time.time() + timeout
+    while time.time() < end:
+        _drain_network_log(driver, requests_by_id, responses_by_id)
+        for rid, resp in responses_by_id.items():
+            req = requests_by_id.get(rid)
+            if not req or not req.get("url") or not _looks_like_export(req, resp):
+                continue
+            if req.get("has_post_data") and req.get("post_data") is None:
+                try:
+                    req["post_data"] = driver.execute_cdp_cmd(
+                        "Network.getRequestPostData", {"requestId": rid}
+                    ).get("postData")
+                except Exception:
+                    pass
+            headers = {**req.get("headers", {}), **req.get("extra_headers", {})}
+            req["headers"] = {k: v for k, v in headers.items()
+                              if not k.startswith(":") and k.lower() not in _DROP_HEADERS}
+            print(f"[INFO] export 요청 캡처: {req['method']} {req['url'][:200]} (응답 {resp.get('mime')})")
+            return req
+        time.sleep(0.3)
+
+    seen = [f"{r.get('method')} {r.get('url', '')[:120]}" for r in requests_by_id.values()
+            if r.get("type") in ("XHR", "Fetch")]
+    print(f"[DEBUG] 캡처된 XHR/fetch: {seen[-20:]}")
+    raise TimeoutError("export 요청 캡처 시간 초과")
+
+
+def _session_from_driver(driver: webdriver.Chrome) -> requests.Session:
+    """브라우저 로그인 세션(쿠키)을 그대로 쓰는 requests 세션."""
+    session = requests.Session()
+    for c in driver.get_cookies():
+        session.cookies.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/"))
+    return session
+
+
+def _filename_from_disposition(disposition: str) -> str:
+    m = re.search(r"filename\*=(?:UTF-8'')?([^;]+)", disposition, re.I)
+    if m:
+        return unquote(m.group(1).strip().strip('"'))
+    m = re.search(r'filename="?([^";]+)"?', disposition, re.I)
+    return m.group(1).strip() if m else ""
+
+
+def fetch_export_via_network(driver: webdriver.Chrome, req: dict) -> tuple[bytes, int, str]:
+    """캡처한 export 요청을 세션 쿠키·토큰 그대로 재호출해 응답을 스트리밍으로 gzip 한다.
+    반환: (gzip 바이트, 원본 크기, 파일명)."""
+    session = _session_from_driver(driver)
+    resp = session.request(
+        req["method"], req["url"], headers=req["headers"], data=req.get("post_data"),
+        stream=True, timeout=120,
+    )
+    if resp.status_code != 200:
+        raise RuntimeError(f"export 재호출 실패 {resp.status_code}: {resp.text[:300]}")
+
+    # 서버가 파일 대신 {"url": "..."} 같은 다운로드 링크(JSON)를 주는 경우 한 번 더 따라간다.
+    if "json" in resp.headers.get("Content-Type", "").lower():
+        body = resp.json()
+        link = next((v for v in (body if isinstance(body, dict) else {}).values()
+                     if isinstance(v, str) and v.startswith("http")), None)
+        if not link:
+            raise RuntimeError(f"export 응답이 파일이 아님: {str(body)[:300]}")
+        resp = session.get(link, stream=True, timeout=120)
+        resp.raise_for_status()
+
+    buf = io.BytesIO()
+    raw_size = 0
+    head = b""
+    with gzip.GzipFile(fileobj=buf, mode="wb") as gz:
+        for chunk in resp.iter_content(chunk_size=1 << 16):
+            if not chunk:
+                continue
+            if len(head) < 4:
+                head += chunk[:4]
+            raw_size += len(chunk)
+            gz.write(chunk)
+    if not head.startswith(b"PK"):  # xlsx = zip
+        raise RuntimeError(f"export 응답이 xlsx가 아님(첫 바이트 {head!r})")
+
+    filename = _filename_from_disposition(resp.headers.get("Content-Disposition", ""))
+    if not filename:
+        filename = f"clobe_transactions_{time.strftime('%Y%m%d')}.xlsx"
+    print(f"[INFO] 통장 내역 수신(network): {filename} ({raw_size/1e6:.2f} MB)")
+    run_log.event("download", mode="network", bytes=raw_size)
+    return buf.getvalue(), raw_size, filename
+
+
 def post_to_finance(path: str) -> None:
     """받은 .xlsx를 gzip+base64 로 재무 ERP에 POST. 파싱은 서버가 parseBankTx로."""
     with open(path, "rb") as f:
         raw = f.read()
-    gz_b64 = base64.b64encode(gzip.compress(raw)).decode("ascii")
-    print(f"[INFO] 전송: 원본 {len(raw)/1e6:.2f}MB → gzip {len(gz_b64)*3/4/1e6:.2f}MB(b64)")
+    post_gz_to_finance(gzip.compress(raw), len(raw), os.path.basename(path))
+
+
+def post_gz_to_finance(gz: bytes, raw_size: int, filename: str) -> None:
+    """gzip 된 파일 바이트를 base64 로 재무 ERP에 POST."""
+    gz_b64 = base64.b64encode(gz).decode("ascii")
+    print(f"[INFO] 전송: 원본 {raw_size/1e6:.2f}MB → gzip {len(gz)/1e6:.2f}MB(b64)")
     auth = (FIN_USER, FIN_PASS) if FIN_USER else None
-    resp = requests.post(
-        f"{FIN_URL}?k={FIN_KEY}",
-        json={"file_gz_b64": gz_b64, "filename": os.path.basename(path)},
-        auth=auth,
-        timeout=120,
-    )
+    t0 = time.time()
+    with instrument.span("finance_post", filename=filename, raw_bytes=raw_size) as sp:
+        resp = requests.post(
+            f"{FIN_URL}?k={FIN_KEY}",
+            json={"file_gz_b64": gz_b64, "filename": filename},
+            auth=auth,
+            timeout=120,
+        )
+        sp.add(bytes=len(resp.request.body or b""), http_status=resp.status_code)
+    run_log.http_event("finance_post", resp, t0, filename=filename, raw_bytes=raw_size)
     if resp.status_code == 200:
         print(f"✅ 재무 ERP 전송 완료: {resp.json()}")
     else:
@@ -311,25 +512,161 @@ def post_to_finance(path: str) -> None:
         raise RuntimeError(f"전송 실패 {resp.status_code}")
 
 
+# ===== 조회구간(워터마크 / 월 단위 backfill) =====
+_DATE_VALUE = re.compile(r"^(\d{4})(-?)(\d{2})\2(\d{2})(.*)$")
+
+
+def load_watermark() -> date | None:
+    try:
+        with open(STATE_FILE, encoding="utf-8") as f:
+            return date.fromisoformat(json.load(f)["watermark"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def save_watermark(d: date) -> None:
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_FILE.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"watermark": d.isoformat(), "updated_at": datetime.now().isoformat(timespec="seconds")}, f)
+    os.replace(tmp, STATE_FILE)
+
+
+def month_slices(start: date, end: date) -> list[tuple[date, date]]:
+    """[start, end] 을 달력 월 경계로 자른다. 예: 1/15~3/10 → (1/15,1/31) (2/1,2/28) (3/1,3/10)."""
+    out = []
+    cur = start
+    while cur <= end:
+        next_month = (cur.replace(day=1) + timedelta(days=32)).replace(day=1)
+        out.append((cur, min(end, next_month - timedelta(days=1))))
+        cur = next_month
+    return out
+
+
+def plan_windows(today: date) -> list[tuple[date, date]]:
+    """WINDOW_MODE 에 따른 전송 구간 목록(오래된 것부터). default 는 빈 목록(화면 기본 범위).
+    모드 오타·빈 backfill 범위는 화면 기본 범위로 조용히 넘어가지 않게 RuntimeError."""
+    if WINDOW_MODE not in WINDOW_MODES:
+        raise RuntimeError(f"알 수 없는 CLOBE_WINDOW_MODE={WINDOW_MODE!r} (가능: {', '.join(WINDOW_MODES)})")
+    if WINDOW_MODE == "incremental":
+        wm = load_watermark()
+        start = (wm - timedelta(days=OVERLAP_DAYS)) if wm else today - timedelta(days=INITIAL_DAYS)
+        print(f"[INFO] 워터마크: {wm or '없음'} → {start} ~ {today}")
+        return month_slices(min(start, today), today)
+    if WINDOW_MODE == "backfill":
+        if not BACKFILL_FROM:
+            raise RuntimeError("backfill 모드는 CLOBE_BACKFILL_FROM 이 필요")
+        start = date.fromisoformat(BACKFILL_FROM)
+        end = date.fromisoformat(BACKFILL_TO) if BACKFILL_TO else today
+        if end < start:
+            raise RuntimeError(f"backfill 범위가 비어 있음: CLOBE_BACKFILL_FROM={start} > CLOBE_BACKFILL_TO={end}")
+        return month_slices(start, end)
+    return []
+
+
+def _find_date_fields(req: dict) -> tuple[list[str], dict | None]:
+    """export 요청에서 시작/종료일 파라미터를 찾는다. (이름 목록 [시작, 종료], JSON 본문) 반환.
+    URL 쿼리와 JSON 본문(최상위) 둘 다 본다."""
+    query = dict(parse_qsl(urlsplit(req["url"]).query, keep_blank_values=True))
+    body = None
+    if req.get("post_data"):
+        try:
+            body = json.loads(req["post_data"])
+        except ValueError:
+            body = None
+    fields = {**query, **(body if isinstance(body, dict) else {})}
+    if DATE_PARAMS:
+        missing = [p for p in DATE_PARAMS if p not in fields]
+        if len(DATE_PARAMS) != 2 or missing:
+            raise RuntimeError(f"CLOBE_DATE_PARAMS={DATE_PARAMS} 가 요청에 없음(요청 필드: {list(fields)})")
+        return DATE_PARAMS, body
+    dated = [(k, str(v)) for k, v in fields.items() if isinstance(v, str) and _DATE_VALUE.match(v)]
+    if len(dated) != 2:
+        raise RuntimeError(
+            f"날짜 파라미터를 자동으로 못 찾음(후보 {dated}) → CLOBE_DATE_PARAMS 로 이름을 지정하세요"
+        )
+    dated.sort(key=lambda kv: kv[1].replace("-", ""))
+    return [dated[0][0], dated[1][0]], body
+
+
+def _format_like(original: str, d: date) -> str:
+    """원래 값의 모양(구분자 유무, 시각 접미사)을 유지한 채 날짜만 바꾼다."""
+    m = _DATE_VALUE.match(original)
+    sep, suffix = (m.group(2), m.group(5)) if m else ("-", "")
+    return f"{d.year:04d}{sep}{d.month:02d}{sep}{d.day:02d}{suffix}"
+
+
+def request_for_window(req: dict, start: date, end: date) -> dict:
+    """캡처한 export 요청을 [start, end] 구간용으로 바꾼 사본."""
+    names, body = _find_date_fields(req)
+    parts = urlsplit(req["url"])
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    new_values = {}
+    for name, d in zip(names, (start, end)):
+        original = next((v for k, v in query if k == name), None)
+        if original is None and isinstance(body, dict):
+            original = body.get(name)
+        new_values[name] = _format_like(str(original or ""), d)
+
+    query = [(k, new_values.get(k, v)) for k, v in query]
+    out = dict(req)
+    out["url"] = urlunsplit(parts._replace(query=urlencode(query)))
+    if isinstance(body, dict):
+        out["post_data"] = json.dumps({**body, **{k: v for k, v in new_values.items() if k in body}},
+                                      ensure_ascii=False)
+    return out
+
+
+def upload_windows(driver: webdriver.Chrome, req: dict, windows: list[tuple[date, date]]) -> None:
+    """구간별로 export 재호출 → 전송. 오래된 구간부터, 성공할 때마다 워터마크 전진.
+    한 구간이라도 실패하면 멈춘다(워터마크 앞에 빈 구간이 생기지 않게)."""
+    for i, (start, end) in enumerate(windows, 1):
+        print(f"\n===== [구간 {i}/{len(windows)}] {start} ~ {end} =====")
+        with instrument.span("download", mode="network", window=f"{start}~{end}") as sp:
+            gz, raw_size, filename = fetch_export_via_network(driver, request_for_window(req, start, end))
+            sp.add(bytes=raw_size)
+        stem, ext = os.path.splitext(filename)
+        post_gz_to_finance(gz, raw_size, f"{stem}_{start:%Y%m%d}-{end:%Y%m%d}{ext or '.xlsx'}")
+        wm = load_watermark()
+        if wm is None or end >= wm:  # backfill 로 과거 구간을 받을 땐 워터마크를 되돌리지 않는다
+            save_watermark(end)
+
+
 # ===== Main =====
-def main() -> None:
-    # ⚠️ headless=False (진짜 Chrome). headless에서는 클로브 export가 다운로드를 아예 시작하지
-    #    않는다(실측: 로그인·회사·데이터 전부 OK인데 파일이 안 떨어짐). CI에서는 yml이 xvfb(가상
-    #    화면)로 감싸 headed Chrome을 돌린다. 로컬 수동 실행 시엔 실제 창이 잠깐 뜬다.
-    driver = make_driver(headless=False)
+def run() -> None:
+    """로그인 → 통장내역 → 받기 → 전송 1회. 실패는 예외로 올린다(실패 화면은 다운로드 폴더에 저장)."""
+    # ⚠️ ui 모드는 headless=False (진짜 Chrome). headless에서는 클로브 export가 다운로드를 아예
+    #    시작하지 않는다(실측: 로그인·회사·데이터 전부 OK인데 파일이 안 떨어짐). CI에서는 yml이
+    #    xvfb(가상 화면)로 감싸 headed Chrome을 돌린다. 로컬 수동 실행 시엔 실제 창이 잠깐 뜬다.
+    #    network 모드는 파일 저장을 안 쓰고 export 요청만 잡으므로 headless로 충분하다.
+    network = CAPTURE_MODE == "network"
+    print(f"[INFO] 받는 방식: {CAPTURE_MODE} / 조회구간: {WINDOW_MODE}")
+    windows = plan_windows(date.today())     # 모드·범위 오류는 브라우저를 띄우기 전에
+    if WINDOW_MODE != "default" and not network:
+        raise RuntimeError("조회구간 지정(CLOBE_WINDOW_MODE)은 CLOBE_CAPTURE_MODE=network 에서만 됩니다.")
+    Path(downloads_folder).mkdir(parents=True, exist_ok=True)
+    with instrument.span("browser_start"):
+        driver = make_driver(headless=network, capture_network=network)
     try:
         do_login(driver)
         # 홈의 안내 모달을 피하려 통장내역으로 직행(회사 선택기는 상단바라 여기서도 됨).
         go_to_transactions(driver)
         if verify_company(driver):     # 회사가 틀려 전환했으면 홈으로 튕기므로
             go_to_transactions(driver)  # 통장내역으로 재진입(에스앤피그룹 데이터)
-        path = download_transactions(driver)
-        post_to_finance(path)
+        if network:
+            req = capture_export_request(driver)
+            if windows:
+                upload_windows(driver, req, windows)
+            else:
+                with instrument.span("download", mode="network") as sp:
+                    gz, raw_size, filename = fetch_export_via_network(driver, req)
+                    sp.add(bytes=raw_size)
+                post_gz_to_finance(gz, raw_size, filename)
+        else:
+            path = download_transactions(driver)
+            post_to_finance(path)
         print("\n🎉 완료 — 통장 내역 전송 성공")
-    except Exception as e:
-        import traceback
-        print(f"❌ 실패: {type(e).__name__}: {e}")
-        traceback.print_exc()
+    except Exception:
         # 실패 화면 스크린샷 + page.html(디버그용)
         try:
             driver.save_screenshot(os.path.join(downloads_folder, "error.png"))
@@ -337,7 +674,7 @@ def main() -> None:
                 f.write(driver.page_source[:500000])
         except Exception:
             pass
-        sys.exit(1)
+        raise
     finally:
         try:
             driver.quit()
@@ -345,5 +682,22 @@ def main() -> None:
             pass
 
 
+def main() -> None:
+    # ===== 로그를 파일로도 남김 (+ 구조화 기록 log_clobe.jsonl) =====
+    run_log.install("log_clobe.txt")
+    missing = [k for k, v in (("CLOBE_LOGIN_ID", LOGIN_ID), ("CLOBE_LOGIN_PW", LOGIN_PW),
+                              ("FINANCE_BANK_URL", FIN_URL)) if not v]
+    if missing:
+        print(f"❌ 필수 환경변수 없음: {missing}")
+        sys.exit(1)
+    try:
+        run()
+    except Exception as e:
+        import traceback
+        print(f"❌ 실패: {type(e).__name__}: {e}")
+        traceback.print_exc()
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     main()
@@ -1,154 +1,140 @@
 from __future__ import annotations
 
 # ===== Imports =====
+#   무거운 라이브러리(selenium · pandas/pyarrow(goods_transform) · BigQuery · gspread · requests)는
+#   그 단계가 처음 실행될 때 함수 안에서 import 한다. --from-csv 재처리는 selenium 을, 변경 없음으로
+#   건너뛰는 실행은 pandas·BigQuery·gspread 를 아예 읽지 않는다. (python -m benchmarks.startup 으로 확인)
 import os
+import re
 import sys
 import time
 import glob
-import re
-import unicodedata
-from pathlib import Path
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
-from google.cloud import bigquery
-import google.auth
-import urllib3.exceptions
-import requests
 import json
-import gspread
-from gspread_dataframe import set_with_dataframe
-
-RETRYABLE_ERRORS = (
-    TimeoutException,
-    WebDriverException,
-    urllib3.exceptions.ReadTimeoutError,
-    urllib3.exceptions.ConnectTimeoutError,
-    urllib3.exceptions.ProtocolError,
-    TimeoutError,
-    ConnectionError,
-)
-
-# ===== Stdout to log.txt =====
-class DualLogger:
-    def __init__(self, filepath: str):
-        self.terminal = sys.__stdout__
-        self.log = open(filepath, "w", encoding="utf-8")
-
-    def write(self, message: str):
-        self.terminal.write(message)
-        self.log.write(message)
-
-    def flush(self):
-        self.terminal.flush()
-        self.log.flush()
+import hashlib
+import functools
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import run_log
+import instrument
+
+if TYPE_CHECKING:
+    import gspread
+    import pandas as pd
+    import requests
+    from google.cloud import bigquery
+    from selenium import webdriver
+
+
+@functools.lru_cache(maxsize=None)
+def retryable_errors() -> tuple[type[BaseException], ...]:
+    """로그인·페이지 이동에서 재시도할 오류 (브라우저 단계에서 처음 부를 때 selenium/urllib3 import)."""
+    import urllib3.exceptions
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+
+    return (
+        TimeoutException,
+        WebDriverException,
+        urllib3.exceptions.ReadTimeoutError,
+        urllib3.exceptions.ConnectTimeoutError,
+        urllib3.exceptions.ProtocolError,
+        TimeoutError,
+        ConnectionError,
+    )
 
-sys.stdout = sys.stderr = DualLogger("log.txt")
 
 # ===== Environment / Settings =====
 RUNNER = os.getenv("GITHUB_ACTIONS") == "true"
 
 # BigQuery
-PROJECT_ID = os.environ["GCP_PROJECT"]
+PROJECT_ID = os.getenv("GCP_PROJECT")
 DATASET_ID = os.getenv("BQ_DATASET") or "raw_data"
 TABLE_ID = os.getenv("BQ_TABLE") or "goods_csv"
 
 # Login
-LOGIN_ID = os.environ["LOGIN_ID"]
-LOGIN_PW = os.environ["LOGIN_PW"]
+LOGIN_ID = os.getenv("LOGIN_ID")
+LOGIN_PW = os.getenv("LOGIN_PW")
 
 # Google Sheets
 GSHEET_ID = os.getenv("GSHEET_ID")
 GSHEET_WORKSHEET = os.getenv("GSHEET_WORKSHEET") or "raw_data"
 
-# Customer tabs config (회원고유번호 → 탭 이름 매핑)
-# JSON 형식: {"회원고유번호1": "탭이름1", ...}
-CUSTOMER_TABS_JSON = os.getenv("GSHEET_CUSTOMER_TABS", "{}")
-try:
-    CUSTOMER_TABS = json.loads(CUSTOMER_TABS_JSON)
-except json.JSONDecodeError as e:
-    print(f"⚠️ GSHEET_CUSTOMER_TABS JSON 파싱 실패: {e}")
-    CUSTOMER_TABS = {}
-
 CUSTOMER_ID_COLUMN = "회원고유번호"
 
-# ===== 파생 컬럼 규칙 (담당팀 매핑) =====
-# WPS 수식:
-# IF(OR([담당자1]="최국화",[담당자1]="김춘매",[담당자1]="장옥선",[담당자1]="서연연"), "C-TEAM",
-#  IF(OR([담당자1]="박명숙",[담당자1]="지연니"), "A-TEAM",
-#   IF(OR([담당자1]="장춘봉",[담당자1]="왕챈",[담당자1]="진진"), "B-TEAM",
-#    IF(OR([담당자1]="양호원"), "박기훈팀", "팀배정필요"))))
-담당팀_매핑 = {
-    "최국화": "C-TEAM",
-    "김춘매": "C-TEAM",
-    "장옥선": "C-TEAM",
-    "서연연": "C-TEAM",
-    "박명숙": "A-TEAM",
-    "지연니": "A-TEAM",
-    "장춘봉": "B-TEAM",
-    "왕챈":   "B-TEAM",
-    "진진":   "B-TEAM",
-    "양호원": "박기훈팀",
-}
-담당팀_기본값 = "팀배정필요"
-
-def apply_derived_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """BigQuery 업로드 전, 계산/매핑이 필요한 파생 컬럼을 추가합니다.
-    새 파생 컬럼이 필요해지면 이 함수 안에만 추가하면 됩니다."""
-
-    # 1) 담당팀 (담당자1 → 조건부 매핑)
-    if "담당자1" in df.columns:
-        df["담당팀"] = df["담당자1"].map(담당팀_매핑).fillna(담당팀_기본값)
-
-        누락 = df.loc[df["담당팀"] == 담당팀_기본값, "담당자1"].unique()
-        누락 = [v for v in 누락 if v not in (None, "", "nan")]
-        if len(누락) > 0:
-            print(f"⚠️ 담당팀 매핑 안 된 '담당자1' 값: {list(누락)}")
-    else:
-        print("⚠️ '담당자1' 컬럼 없음 → '담당팀' 생성 건너뜀")
-
-    # 2) 합계 (수량 * 단가)
-    if "수량" in df.columns and "단가" in df.columns:
-        df["합계"] = (
-            pd.to_numeric(df["수량"], errors="coerce")
-            * pd.to_numeric(df["단가"], errors="coerce")
-        )
-    else:
-        print("⚠️ '수량' 또는 '단가' 컬럼 없음 → '합계' 생성 건너뜀")
-
-    # 3) 대행구분 (환율 == 0 → 배송대행, 그 외(0이 아니거나 값 없음) → 구매대행)
-    if "환율" in df.columns:
-        환율_숫자 = pd.to_numeric(df["환율"], errors="coerce")
-        df["대행구분"] = 환율_숫자.apply(lambda v: "배송대행" if v == 0 else "구매대행")
-    else:
-        print("⚠️ '환율' 컬럼 없음 → '대행구분' 생성 건너뜀")
-
-    return df
+# 스냅샷 저장소 (GOODS_SNAPSHOTS=1): 매 실행 export 를 STATE_DIR/snapshots/goods 에 남기고
+# 직전 실행 대비 추가/변경/삭제 행 수를 log.jsonl 에 기록. --from-snapshot 으로 재처리.
+SNAPSHOTS_ENABLED = os.getenv("GOODS_SNAPSHOTS", "").strip().lower() in ("1", "true", "yes")
+SNAPSHOT_KEY = "아이템번호"
+
+# CSV 에서 열이 넘쳐 버리는 행이 이보다 많으면 싱크 전에 중단 (열이 모자란 행은 null 로 채워 살린다)
+MAX_SKIPPED_ROWS = int(os.getenv("GOODS_MAX_SKIPPED_ROWS") or 10)
+
+# 변경 감지 (GOODS_PROBE=1): 목록 첫 화면에서 총 건수 · 최신 날짜 · 첫 페이지 내용 해시를 읽어
+# 직전 전체 실행과 같으면 다운로드부터 싱크까지 전부 건너뛴다.
+#   - 마지막 전체 실행 후 GOODS_FORCE_REFRESH_MIN 분(기본 180)이 지났으면 같아도 전체 실행
+#     (첫 페이지 밖의 오래된 행이 바뀐 건 신호에 안 잡히므로 주기적으로 한 번씩 전부 다시 받음)
+#   - 직전 전체 실행에서 싱크가 하나라도 실패(사전 점검 제외 포함)했으면 신호가 같아도 다시 실행
+#     (GOODS_OUTBOX 로 이번 본문이 대기함에 남은 POST 싱크는 성공으로 친다 → 재전송은 대기함이 맡음)
+#   - 결과는 GITHUB_OUTPUT 에 changed / reason / next_interval_min 으로 남긴다
+#     (run.yml 뒤 단계 건너뛰기 · 외부 스케줄러 주기 조절용)
+#   상태 파일: STATE_DIR/goods_probe.json (워크플로우 actions/cache 로 실행 간 유지)
+PROBE_ENABLED = os.getenv("GOODS_PROBE", "").strip().lower() in ("1", "true", "yes")
+FORCE_REFRESH_MIN = float(os.getenv("GOODS_FORCE_REFRESH_MIN") or 180)
+BASE_INTERVAL_MIN = 30                                           # 변경이 있을 때 다음 실행 간격
+MAX_INTERVAL_MIN = float(os.getenv("GOODS_MAX_INTERVAL_MIN") or 120)
+STATE_DIR = Path(os.getenv("STATE_DIR") or "state")
+PROBE_STATE = STATE_DIR / "goods_probe.json"
+
+# 전송 대기함 (GOODS_OUTBOX=1): 패킹·재무·raw data POST 본문을 STATE_DIR/outbox.sqlite3 에 먼저 저장한 뒤
+# 싱크가 다 끝나고 목적지별로 병렬 전송한다(outbox.py). 서버가 죽어 있으면 본문이 남아 있다가 다음 실행
+# (변경 없음으로 건너뛴 실행 포함)이 다시 크롤링하지 않고 재전송. 같은 목적지의 더 새 본문이 생기면 옛것은 접는다.
+OUTBOX_ENABLED = os.getenv("GOODS_OUTBOX", "").strip().lower() in ("1", "true", "yes")
+
+# 사전 점검 (GOODS_PREFLIGHT=1): 크롬을 띄우기 전에 싱크 인증·연결과 silkroad21 접속을 동시에 확인(preflight.py).
+#   죽은 싱크는 처음부터 빼고 실패로 기록, 필수 싱크(FATAL_SINKS)나 silkroad21 이 죽었으면 크롤링 전에 중단.
+#   GOODS_OUTBOX 가 켜져 있으면 죽은 서버 전송은 빼지 않고 대기함에 저장만 한다(다음 실행에서 재전송).
+#   결과는 GITHUB_OUTPUT 의 dead_sinks 로도 남긴다.
+PREFLIGHT_ENABLED = os.getenv("GOODS_PREFLIGHT", "").strip().lower() in ("1", "true", "yes")
+
+# 파생 컬럼(담당팀·합계·대행구분), 동기화 메타 컬럼, 전송 본문 만들기는 goods_transform.py
+# (benchmarks/ 에서도 같은 함수로 잰다)
 
 # Download folder
 if RUNNER:
     downloads_folder = str((Path.cwd() / "downloads").resolve())
 else:
     downloads_folder = r"C:\Users\white\Downloads\csv"
-Path(downloads_folder).mkdir(parents=True, exist_ok=True)
 
-# GCP creds path
+# GCP creds path (main() 에서 GOOGLE_APPLICATION_CREDENTIALS 미설정일 때만 채움)
 GOOGLE_CREDS = os.getenv(
     "GOOGLE_APPLICATION_CREDENTIALS",
     str((Path(__file__).parent / "bigquery-credentials.json").resolve()),
 )
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = GOOGLE_CREDS
 
-# URLs
-LOGIN_URL = "https://silkroad21.co.kr/pzadm/Login.asp"
-LIST_URL = "https://silkroad21.co.kr/Admin/Acting/Acting_S.asp?gMnu1=101&gMnu2=10101"
+# URLs (SILKROAD_BASE_URL: benchmarks/stubs.py 같은 로컬 대역 서버로 바꿀 때만)
+SILKROAD_BASE_URL = (os.getenv("SILKROAD_BASE_URL") or "https://silkroad21.co.kr").rstrip("/")
+LOGIN_URL = f"{SILKROAD_BASE_URL}/pzadm/Login.asp"
+LIST_URL = f"{SILKROAD_BASE_URL}/Admin/Acting/Acting_S.asp?gMnu1=101&gMnu2=10101"
+
+# 브라우저 프로필 (BROWSER_PROFILE)
+#   fast(기본): 이미지·폰트·광고/분석 스크립트 요청 차단(CDP Network.setBlockedURLs) + eager 로드
+#               (DOMContentLoaded 에서 반환) + implicit wait 없음 → 모든 대기는 WebDriverWait 로 명시
+#   full      : 예전 그대로(전체 리소스, normal 로드, implicitly_wait(5)). 페이지가 깨지면 이걸로.
+#   CSS 와 jQuery/easyui 같은 페이지 스크립트는 막지 않는다(검색 필터가 $(...).datebox 를 씀).
+BROWSER_PROFILE = (os.getenv("BROWSER_PROFILE") or "fast").strip().lower()
+BLOCKED_URL_PATTERNS = [
+    "*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.bmp*", "*.ico*", "*.svg*",
+    "*.woff*", "*.ttf*", "*.otf*", "*.eot*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*wcs.naver.net*",
+]
 
 # ===== Helpers =====
 def accept_alert_safe(driver, timeout: int = 3) -> bool:
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
     try:
         WebDriverWait(driver, timeout).until(EC.alert_is_present())
         alert = driver.switch_to.alert
@@ -158,7 +144,9 @@ def accept_alert_safe(driver, timeout: int = 3) -> bool:
     except Exception:
         return False
 
-def make_driver(headless: bool = True) -> webdriver.Chrome:
+def make_driver(headless: bool = True, download_dir: str = downloads_folder) -> webdriver.Chrome:
+    from selenium import webdriver
+
     options = webdriver.ChromeOptions()
     if headless:
         options.add_argument("--headless=new")
@@ -169,7 +157,7 @@ def make_driver(headless: bool = True) -> webdriver.Chrome:
     options.add_experimental_option(
         "prefs",
         {
-            "download.default_directory": downloads_folder,
+            "download.default_directory": download_dir,
             "download.prompt_for_download": False,
             "download.directory_upgrade": True,
             "safebrowsing.enabled": True,
@@ -177,6 +165,11 @@ def make_driver(headless: bool = True) -> webdriver.Chrome:
         },
     )
 
+    fast = BROWSER_PROFILE != "full"
+    if fast:
+        options.page_load_strategy = "eager"
+        options.add_argument("--blink-settings=imagesEnabled=false")
+
     chrome_bin = os.getenv("CHROME_PATH")
     if chrome_bin:
         options.binary_location = chrome_bin
@@ -197,15 +190,31 @@ def make_driver(headless: bool = True) -> webdriver.Chrome:
     try:
         driver.execute_cdp_cmd(
             "Page.setDownloadBehavior",
-            {"behavior": "allow", "downloadPath": downloads_folder},
+            {"behavior": "allow", "downloadPath": download_dir},
         )
     except Exception:
         pass
 
-    driver.implicitly_wait(5)
+    if fast:
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        except Exception as e:
+            print(f"[WARN] 리소스 차단 설정 실패(전체 로드로 진행): {e}")
+    else:
+        driver.implicitly_wait(5)
+    print(f"[INFO] 브라우저 프로필: {'fast' if fast else 'full'}")
     return driver
 
 def do_login(driver: webdriver.Chrome, max_retries: int = 3) -> None:
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.keys import Keys
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    import waits
+
     wait = WebDriverWait(driver, 20)
     last_error = None
 
@@ -245,91 +254,68 @@ def do_login(driver: webdriver.Chrome, max_retries: int = 3) -> None:
             print("[INFO] 로그인 성공")
             return
 
-        except RETRYABLE_ERRORS as e:
+        except retryable_errors() as e:
             last_error = e
             print(f"[WARN] 로그인 시도 {attempt} 실패: {type(e).__name__}: {str(e)[:200]}")
             if attempt < max_retries:
-                wait_sec = 15 * attempt
-                print(f"[INFO] {wait_sec}초 후 재시도합니다...")
-                time.sleep(wait_sec)
+                waits.backoff(attempt, e, "login")
 
     raise RuntimeError(f"로그인 {max_retries}회 모두 실패. 마지막 에러: {last_error}")
 
 def goto_with_auth(driver: webdriver.Chrome, url: str, login_hint: str = "Login.asp", max_retries: int = 3) -> None:
+    import waits
+
     last_error = None
 
     for attempt in range(1, max_retries + 1):
         try:
             print(f"[INFO] 페이지 이동 시도 {attempt}/{max_retries}: {url}")
             driver.get(url)
-            time.sleep(0.5)
+            waits.until(driver, waits.document_ready(), "page_ready", timeout=10, required=False)
             if login_hint in driver.current_url:
                 print("[INFO] 로그인 페이지로 리다이렉트됨, 재로그인 진행")
                 do_login(driver)
                 driver.get(url)
             return
 
-        except RETRYABLE_ERRORS as e:
+        except retryable_errors() as e:
             last_error = e
             print(f"[WARN] 페이지 이동 시도 {attempt} 실패: {type(e).__name__}: {str(e)[:200]}")
             if attempt < max_retries:
-                wait_sec = 15 * attempt
-                print(f"[INFO] {wait_sec}초 후 재시도합니다...")
-                time.sleep(wait_sec)
+                waits.backoff(attempt, e, "navigate")
 
     raise RuntimeError(f"페이지 이동 {max_retries}회 모두 실패. 마지막 에러: {last_error}")
 
 def wait_for_download_complete(dirpath: str, timeout: int = 1000) -> None:
-    end = time.time() + timeout
-    pattern_cr = os.path.join(dirpath, "*.crdownload")
-    pattern_csv = os.path.join(dirpath, "*.csv")
-
-    while time.time() < end:
-        if glob.glob(pattern_cr):
-            time.sleep(0.8)
-            continue
-        if glob.glob(pattern_csv):
-            return
-        time.sleep(0.8)
-    raise TimeoutError("다운로드 완료 대기 시간 초과")
+    import waits
 
-def push_df_to_worksheet(spreadsheet, tab_name: str, df_data: pd.DataFrame) -> None:
-    """주어진 탭에 데이터프레임을 씀. 탭 없으면 생성.
+    waits.wait_for_download(dirpath, timeout, patterns=("*.csv",))
+
+def push_values_to_worksheet(spreadsheet, tab_name: str, values: list[list]) -> None:
+    """주어진 탭에 values 배열(헤더 포함)을 씀. 탭 없으면 생성.
     Clear 없이 덮어쓰기 → 남는 행/열만 나중에 정리 (XLOOKUP 등 참조 중 빈 시트 노출 방지)"""
+    new_row_count = len(values)  # 헤더 포함
+    new_col_count = max(len(values[0]) if values else 0, 1)
+    import gspread
+
     try:
         ws = spreadsheet.worksheet(tab_name)
     except gspread.WorksheetNotFound:
         print(f"[INFO] 탭 '{tab_name}' 없음 → 새로 생성")
         ws = spreadsheet.add_worksheet(
             title=tab_name,
-            rows=max(len(df_data) + 100, 100),
-            cols=max(len(df_data.columns) + 5, 26),
+            rows=max(new_row_count + 99, 100),
+            cols=max(new_col_count + 5, 26),
         )
 
     # 기존에 데이터가 차지하던 행/열 크기 (지우기 전에 미리 확인)
     old_row_count = ws.row_count
     old_col_count = ws.col_count
 
-    new_row_count = len(df_data) + 1  # 헤더 포함
-    new_col_count = len(df_data.columns) if len(df_data.columns) > 0 else 1
-
-    if len(df_data) > 0:
-        set_with_dataframe(
-            ws,
-            df_data,
-            include_index=False,
-            include_column_header=True,
-            resize=False,
-        )
-    else:
-        # 빈 결과면 헤더만 쓰기
-        set_with_dataframe(
-            ws,
-            df_data.iloc[0:0],
-            include_index=False,
-            include_column_header=True,
-            resize=False,
-        )
+    # 시트가 작으면 먼저 늘린다(예전 set_with_dataframe 과 같은 동작)
+    if old_row_count < new_row_count or old_col_count < new_col_count:
+        ws.resize(rows=max(old_row_count, new_row_count), cols=max(old_col_count, new_col_count))
+    ws.update(range_name="A1", values=values, value_input_option="USER_ENTERED")
 
     # 새 데이터가 예전보다 행/열이 적을 때만, 남는 구간을 마지막에 정리
     if old_row_count > new_row_count or old_col_count > new_col_count:
@@ -339,463 +325,781 @@ def push_df_to_worksheet(spreadsheet, tab_name: str, df_data: pd.DataFrame) -> N
             print(f"[WARN] 남는 구간 정리 실패 (resize): {e}")
 
 
-# ===== Main =====
-driver = make_driver(headless=True)
-try:
-    do_login(driver)
-    goto_with_auth(driver, LIST_URL)
-
+# ===== 변경 감지 (probe) =====
+# 목록 화면 본문 텍스트 + 행이 가장 많은 표(= 검색 결과 목록)의 텍스트
+_PROBE_JS = """
+var best = null, rows = 0;
+document.querySelectorAll("table").forEach(function (t) {
+    if (t.rows.length > rows) { rows = t.rows.length; best = t; }
+});
+return {body: document.body ? document.body.innerText : "", table: best ? best.innerText : "", rows: rows};
+"""
+_TOTAL_COUNT = re.compile(r"(?:총|전체|검색결과|Total)\s*[:：]?\s*([\d,]+)\s*(?:건|개)", re.I)
+_DATETIME = re.compile(r"\d{4}[-./]\d{2}[-./]\d{2}(?:\s+\d{1,2}:\d{2}(?::\d{2})?)?")
+
+
+def read_probe_signal(driver) -> dict:
+    """목록 첫 화면에서 변경 신호: 총 건수, 가장 최근 날짜(등록일·상태변경일 중 최대), 첫 페이지 해시."""
+    page = driver.execute_script(_PROBE_JS) or {}
+    table = " ".join((page.get("table") or "").split())
+    m = _TOTAL_COUNT.search(page.get("body") or "")
+    # 2026.10.19 9:15 → 2026-10-19 09:15 (문자열 비교로 최대값을 고를 수 있게)
+    dates = [re.sub(r"\s(\d):", r" 0\1:", re.sub(r"[./]", "-", d)) for d in _DATETIME.findall(table)]
+    return {
+        "total": int(m.group(1).replace(",", "")) if m else None,
+        "newest": max(dates) if dates else None,
+        "first_page_hash": hashlib.sha256(table.encode("utf-8")).hexdigest()[:16],
+        "rows": page.get("rows") or 0,
+    }
+
+
+def load_probe_state() -> dict:
     try:
-        print("[INFO] 엑셀 다운로드 버튼 찾는 중...")
-        wait = WebDriverWait(driver, 20)
-        export_btn = wait.until(
-            EC.element_to_be_clickable(
-                (
-                    By.CSS_SELECTOR,
-                    "button[onclick*=\"fnPageExl('X19')\"], a[onclick*=\"fnPageExl('X19')\"], a[href*=\"fnPageExl('X19')\"]",
-                )
-            )
-        )
-        print("[INFO] 엑셀 다운로드 버튼 클릭")
-        export_btn.click()
-    except Exception as e:
-        print("[WARN] 버튼 클릭 방식 실패, execute_script로 대체 시도:", e)
-        driver.set_script_timeout(10)
-        driver.execute_script("fnPageExl('X19');")
+        with open(PROBE_STATE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_probe_state(state: dict) -> None:
+    PROBE_STATE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = PROBE_STATE.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, PROBE_STATE)
+
+
+def probe_decision(signal: dict, state: dict, now: datetime) -> tuple[bool, str]:
+    """(전체 실행 필요 여부, 이유)."""
+    prev = state.get("signal")
+    if not prev:
+        return True, "first_run"
+    if not state.get("last_full_ok"):
+        return True, "last_run_failed"
+    try:
+        age_min = (now - datetime.fromisoformat(state["last_full_at"])).total_seconds() / 60
+    except (KeyError, TypeError, ValueError):
+        return True, "no_last_full"
+    if age_min >= FORCE_REFRESH_MIN:
+        return True, f"force_refresh({age_min:.0f}m)"
+    if not (signal.get("rows") and (signal.get("total") is not None or signal.get("newest"))):
+        return True, "signal_unreadable"      # 화면 구조가 바뀌어 신호를 못 읽음 → 안전하게 전체 실행
+    changed = [k for k in ("total", "newest", "first_page_hash") if signal.get(k) != prev.get(k)]
+    return (True, "changed:" + ",".join(changed)) if changed else (False, "unchanged")
+
+
+def write_github_output(**values) -> None:
+    """GitHub Actions step output (로컬 실행이면 무시)."""
+    path = os.getenv("GITHUB_OUTPUT")
+    if not path:
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        for k, v in values.items():
+            f.write(f"{k}={v}\n")
+
+
+def probe(driver) -> bool:
+    """목록 화면(LIST_URL)에 있는 상태에서 호출. 전체 실행이 필요하면 True.
+    건너뛸 때는 확인 시각과 연속 무변경 횟수만 갱신, 실행할 때는 새 신호를 '실행 중(미완료)' 으로 기록."""
+    now = datetime.now(timezone.utc)
+    with instrument.span("probe") as sp:
+        signal = read_probe_signal(driver)
+        state = load_probe_state()
+        needed, reason = probe_decision(signal, state, now)
+        sp.add(changed=needed, reason=reason, total=signal["total"])
+
+    streak = 0 if needed else int(state.get("unchanged_streak") or 0) + 1
+    next_interval = min(MAX_INTERVAL_MIN, BASE_INTERVAL_MIN * 2 ** min(streak, 4))
+    print(f"🔎 변경 감지: {reason} (총 {signal['total']}건, 최신 {signal['newest']}, "
+          f"첫 페이지 {signal['first_page_hash']}) → {'전체 실행' if needed else '건너뜀'}")
+    run_log.event("probe", changed=needed, reason=reason, unchanged_streak=streak,
+                  next_interval_min=next_interval, **signal)
+    write_github_output(changed=str(needed).lower(), reason=reason, next_interval_min=f"{next_interval:g}")
+
+    state.update(checked_at=now.isoformat(timespec="seconds"), unchanged_streak=streak)
+    if needed:
+        state.update(signal=signal, last_full_at=now.isoformat(timespec="seconds"), last_full_ok=False)
+    save_probe_state(state)
+    return needed
+
+
+def sinks_settled(results: dict[str, bool]) -> bool:
+    """probe 를 OK 로 표시해도 되는지. 선택한 싱크가 전부 성공했거나, 실패(보류 포함)한 싱크는
+    이번 실행 본문이 대기함에 남아 있어 다음 실행이 크롤링 없이 재전송할 수 있어야 한다.
+    하나라도 아니면 False → 다음 probe 가 '변경 없음' 으로 건너뛰지 않고 다시 전체 실행."""
+    failed = [n for n, ok in results.items() if not ok]
+    if failed and OUTBOX_ENABLED:
+        import outbox
+
+        pending = set(outbox.Outbox().pending_dests())
+        failed = [n for n in failed if not (n in _ENQUEUED and n in pending)]
+    if failed:
+        print(f"[INFO] 실패한 싱크 {failed} → 변경 감지 기준을 갱신하지 않음(다음 실행에서 다시 전체 실행)")
+    return not failed
+
+
+def mark_probe_ok() -> None:
+    """전체 실행이 끝까지 성공했을 때 → 다음 probe 가 이 신호 기준으로 건너뛸 수 있게."""
+    state = load_probe_state()
+    if state.get("signal"):
+        state["last_full_ok"] = True
+        save_probe_state(state)
+
+
+# ===== 클라이언트 (프로세스 안에서 재사용) =====
+#   스크립트 1회 실행이면 차이가 없고, scheduler_daemon 처럼 상주하면 인증·연결을 실행마다 다시 만들지 않는다.
+@functools.lru_cache(maxsize=None)
+def bigquery_client() -> bigquery.Client:
+    from google.cloud import bigquery
+
+    return bigquery.Client(project=PROJECT_ID)
+
+
+@functools.lru_cache(maxsize=None)
+def sheets_client() -> gspread.Client:
+    import google.auth
+    import gspread
+
+    creds, _ = google.auth.default(
+        scopes=[
+            "https://www.googleapis.com/auth/spreadsheets",
+            "https://www.googleapis.com/auth/drive",
+        ]
+    )
+    return gspread.authorize(creds)
+
+
+@functools.lru_cache(maxsize=None)
+def http_session() -> requests.Session:
+    """패킹·재무 서버 POST 용 keep-alive 세션."""
+    import requests
 
-    accept_alert_safe(driver, timeout=5)
-    wait_for_download_complete(downloads_folder, timeout=120)
+    return requests.Session()
 
-finally:
+
+# ===== Stages =====
+#   fetch  : 크롬으로 로그인 → 목록 → 엑셀(CSV) 다운로드, 받은 파일 경로 반환
+#   parse  : CSV → DataFrame(str)
+#   derive : BQ용 프레임(sanitize + 파생 컬럼 [+ 동기화 메타 컬럼])
+#   sinks  : bigquery / sheets / packing / finance / rawdata — 서로 독립, 하나가 실패해도 나머지는 진행
+def fetch(download_dir: str = downloads_folder, use_probe: bool = False) -> str | None:
+    """크롤링으로 CSV를 받아 경로를 반환. 폴더의 예전 CSV는 지운다.
+    use_probe 면 목록 화면에서 변경 감지를 먼저 하고, 바뀐 게 없으면 받지 않고 None."""
+    if not (LOGIN_ID and LOGIN_PW):
+        raise RuntimeError("LOGIN_ID / LOGIN_PW 환경변수가 필요합니다")
+    Path(download_dir).mkdir(parents=True, exist_ok=True)
+
+    with instrument.span("browser_start"):
+        driver = make_driver(headless=True, download_dir=download_dir)
     try:
-        driver.quit()
-    except Exception:
-        pass
+        with instrument.span("login"):
+            do_login(driver)
+        with instrument.span("navigate"):
+            goto_with_auth(driver, LIST_URL)
+        if use_probe and not probe(driver):
+            return None
 
-csv_files = glob.glob(os.path.join(downloads_folder, "*.csv"))
-if not csv_files:
-    print("❌ CSV 파일이 존재하지 않습니다. (다운로드 실패)")
-    sys.exit(1)
+        try:
+            from selenium.webdriver.common.by import By
+            from selenium.webdriver.support import expected_conditions as EC
+            from selenium.webdriver.support.ui import WebDriverWait
+
+            print("[INFO] 엑셀 다운로드 버튼 찾는 중...")
+            wait = WebDriverWait(driver, 20)
+            export_btn = wait.until(
+                EC.element_to_be_clickable(
+                    (
+                        By.CSS_SELECTOR,
+                        "button[onclick*=\"fnPageExl('X19')\"], a[onclick*=\"fnPageExl('X19')\"], a[href*=\"fnPageExl('X19')\"]",
+                    )
+                )
+            )
+            print("[INFO] 엑셀 다운로드 버튼 클릭")
+            export_btn.click()
+        except Exception as e:
+            print("[WARN] 버튼 클릭 방식 실패, execute_script로 대체 시도:", e)
+            driver.set_script_timeout(10)
+            driver.execute_script("fnPageExl('X19');")
 
-latest_file = max(csv_files, key=os.path.getctime)
-for fp in list(csv_files):
-    if fp != latest_file:
+        accept_alert_safe(driver, timeout=5)
+        t0 = time.time()
+        with instrument.span("download"):
+            wait_for_download_complete(download_dir, timeout=120)
+        run_log.event("download", duration_s=round(time.time() - t0, 3))
+
+    finally:
         try:
-            os.remove(fp)
-            print("🗑 삭제됨:", os.path.basename(fp))
+            driver.quit()
         except Exception:
             pass
 
-try:
-    df = pd.read_csv(latest_file, encoding="utf-8-sig", dtype=str, on_bad_lines="skip")
-except Exception:
-    df = pd.read_csv(latest_file, encoding="cp949", dtype=str, on_bad_lines="skip")
-
-print(f"📊 데이터 로딩 완료: {len(df)} rows × {len(df.columns)} cols")
-
-def sanitize_columns(cols):
-    seen = {}
-    out = []
-    for c in cols:
-        c = (c or "").strip()
-        c = re.sub(r"[^\w]", "_", c)
-        if re.match(r"^\d", c):
-            c = "_" + c
-        base = c
-        i = 1
-        while c in seen:
-            c = f"{base}_{i}"
-            i += 1
-        seen[c] = True
-        out.append(c)
-    return out
-
-# BQ 적재용 (컬럼명 sanitize 필요)
-df_bq = df.copy()
-df_bq.columns = sanitize_columns(df_bq.columns)
-df_bq = df_bq.dropna(how="all").drop_duplicates()
-print("🧹 BQ용 데이터 정제 완료")
-
-# ⭐ 파생 컬럼 추가 (담당팀, 합계) — 여기서 처리하면 BigQuery/OneDrive/KDocs 모두 자동 반영
-df_bq = apply_derived_columns(df_bq)
-print(f"➕ 파생 컬럼 추가 완료. 현재 컬럼: {list(df_bq.columns)}")
-
-client = bigquery.Client(project=PROJECT_ID)
-full_table_id = f"{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}"
-job = client.load_table_from_dataframe(
-    df_bq,
-    full_table_id,
-    location="asia-northeast3",
-    job_config=bigquery.LoadJobConfig(write_disposition="WRITE_TRUNCATE"),
-)
-job.result()
-print(f"✅ BigQuery 업로드 성공: {len(df_bq)}건 → {full_table_id}")
+    latest_file = latest_csv(download_dir)
+    if latest_file is None:
+        raise RuntimeError("CSV 파일이 존재하지 않습니다. (다운로드 실패)")
+    for fp in glob.glob(os.path.join(download_dir, "*.csv")):
+        if fp != latest_file:
+            try:
+                os.remove(fp)
+                print("🗑 삭제됨:", os.path.basename(fp))
+            except Exception:
+                pass
+    return latest_file
 
-# =====================================================================
-# 📊 Google Sheets 푸시 (raw_data 전체 탭 + 고객사별 분할 탭)
-# =====================================================================
-print("📊 Google Sheets로 데이터 전송 시작...")
 
-if not GSHEET_ID:
-    print("⚠️ GSHEET_ID 환경변수가 설정되지 않아 Sheets 전송을 건너뜁니다.")
-else:
+def latest_csv(download_dir: str = downloads_folder) -> str | None:
+    csv_files = glob.glob(os.path.join(download_dir, "*.csv"))
+    return max(csv_files, key=os.path.getctime) if csv_files else None
+
+
+def parse(path: str) -> pd.DataFrame:
+    from goods_transform import read_export_table, table_to_frame
+
+    stats: dict = {}
+    with instrument.span("csv_parse", bytes=os.path.getsize(path)) as sp:
+        # pyarrow.csv 로 한 번만 파싱 → 문자열 버퍼를 그대로 쓰는 DataFrame
+        df = table_to_frame(read_export_table(path, stats))
+        sp.add(rows=len(df), padded_rows=stats.get("padded", 0), skipped_rows=stats.get("skipped", 0))
+    print(f"📊 데이터 로딩 완료: {len(df)} rows × {len(df.columns)} cols")
+    run_log.event("csv_load", rows=len(df), cols=len(df.columns), bytes=os.path.getsize(path), **stats)
+    if stats.get("skipped", 0) > MAX_SKIPPED_ROWS:
+        raise RuntimeError(f"열 수가 안 맞아 버린 행 {stats['skipped']:,}건 > GOODS_MAX_SKIPPED_ROWS={MAX_SKIPPED_ROWS} "
+                           f"→ export 형식이 바뀌었는지 확인 필요 (예: {stats['skipped_lines'][0][:200]!r})")
+    return df
+
+
+def derive(df: pd.DataFrame) -> pd.DataFrame:
+    """정제 + 파생 컬럼을 붙인 프레임(원본 헤더 그대로). 이후 모든 싱크가 이 프레임 하나를 쓴다."""
+    from goods_transform import add_sync_columns, prepare_frame
+
+    with instrument.span("derive") as sp:
+        # ⭐ 파생 컬럼 추가 (담당팀, 합계, 대행구분) — 여기서 처리하면 BigQuery/OneDrive/KDocs 모두 자동 반영
+        df = prepare_frame(df)
+        print(f"🧹 데이터 정제 + 파생 컬럼 추가 완료. 현재 컬럼: {list(df.columns)}")
+
+        if os.getenv("BQ_SYNC_COLUMNS", "").strip().lower() in ("1", "true", "yes"):
+            df = add_sync_columns(df)
+            print("➕ 동기화 메타 컬럼 추가: _row_seq, _row_hash, _loaded_at")
+        sp.add(rows=len(df), mem_mb=round(df.memory_usage(deep=True).sum() / 1e6, 1))
+    return df
+
+
+# ===== Sinks =====
+#   모두 derive 가 만든 프레임 하나를 받아 필요한 컬럼만 Arrow 로 꺼내 쓴다(복사본을 따로 들고 있지 않음).
+#   설정이 없으면 건너뛰고, 실패는 예외로 올린다(run 이 모아서 처리).
+def sink_bigquery(df: pd.DataFrame, client=None) -> None:
+    import tempfile
+
+    import pyarrow.parquet as pq
+    from google.cloud import bigquery
+
+    from goods_transform import bq_table
+
+    if not PROJECT_ID:
+        raise RuntimeError("GCP_PROJECT 환경변수가 필요합니다")
+    table = bq_table(df)   # BigQuery 컬럼명으로 이름만 바꾼 Arrow 테이블 (문자열 복사 없음)
+    client = client or bigquery_client()
+    full_table_id = f"{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}"
+    t0 = time.time()
+    with instrument.span("bigquery_load", rows=table.num_rows) as sp:
+        # load_table_from_dataframe 가 내부에서 하던 DataFrame → Arrow → Parquet 변환을 건너뛰고
+        # Arrow 테이블을 바로 Parquet 임시 파일로 써서 올린다.
+        with tempfile.TemporaryFile() as f:
+            pq.write_table(table, f, compression="snappy")
+            size = f.tell()
+            f.seek(0)
+            job = client.load_table_from_file(
+                f,
+                full_table_id,
+                location="asia-northeast3",
+                job_config=bigquery.LoadJobConfig(
+                    source_format=bigquery.SourceFormat.PARQUET,
+                    write_disposition="WRITE_TRUNCATE",
+                ),
+            )
+            job.result()
+        sp.add(bytes=size)
+    print(f"✅ BigQuery 업로드 성공: {table.num_rows}건 → {full_table_id}")
+    run_log.event("bigquery_load", rows=table.num_rows, table=full_table_id, bytes=size,
+                  duration_s=round(time.time() - t0, 3))
+
+    # ⭐ BQ_SQL 로컬 평가 (BQ_EXPORT_LOCAL=1): 방금 올린 Arrow 테이블 위에서 BQ_SQL 을 DuckDB로 바로 계산해
+    #   OneDrive/KDocs용 CSV·XLSX를 만든다. run.yml 추출 단계는 --reuse-local 로 이걸 그대로 쓰고
+    #   샘플링 주기로만 BigQuery와 대조한다. 로컬로 못 돌리는 쿼리면 추출 단계가 BigQuery로 조회.
+    if os.getenv("BQ_EXPORT_LOCAL", "").strip().lower() in ("1", "true", "yes") and os.getenv("BQ_SQL"):
+        try:
+            import bq_export
+            export_dir = os.getenv("BQ_EXPORT_DIR") or "/tmp/export"
+            with instrument.span("export_local") as sp:
+                sp.add(rows=bq_export.export_local(
+                    table,
+                    os.environ["BQ_SQL"],
+                    full_table_id,
+                    csv_path=os.path.join(export_dir, "bq_export.csv"),
+                    xlsx_path=os.path.join(export_dir, "bq_export.xlsx"),
+                ))
+        except Exception as e:
+            print(f"⚠️ BQ_SQL 로컬 평가 실패(추출 단계에서 BigQuery로 조회): {type(e).__name__}: {e}")
+
+
+def load_customer_tabs() -> dict:
+    """GSHEET_CUSTOMER_TABS (회원고유번호 → 탭 이름 매핑). JSON 형식: {"회원고유번호1": "탭이름1", ...}"""
     try:
-        creds, _ = google.auth.default(
-            scopes=[
-                "https://www.googleapis.com/auth/spreadsheets",
-                "https://www.googleapis.com/auth/drive",
-            ]
-        )
-        gc = gspread.authorize(creds)
-        spreadsheet = gc.open_by_key(GSHEET_ID)
+        return json.loads(os.getenv("GSHEET_CUSTOMER_TABS", "{}"))
+    except json.JSONDecodeError as e:
+        print(f"⚠️ GSHEET_CUSTOMER_TABS JSON 파싱 실패: {e}")
+        return {}
+
+
+def sink_sheets(df: pd.DataFrame) -> None:
+    """Google Sheets 푸시 (raw_data 전체 탭 + 고객사별 분할 탭)."""
+    import gspread
+
+    from goods_transform import sheet_values, source_columns
+
+    print("📊 Google Sheets로 데이터 전송 시작...")
+    if not GSHEET_ID:
+        print("⚠️ GSHEET_ID 환경변수가 설정되지 않아 Sheets 전송을 건너뜁니다.")
+        return
+    customer_tabs = load_customer_tabs()
+
+    with instrument.span("sheets") as sp:
+        gc = sheets_client()
+        try:
+            spreadsheet = gc.open_by_key(GSHEET_ID)
+        except gspread.exceptions.SpreadsheetNotFound:
+            raise RuntimeError("Spreadsheet를 찾을 수 없음. GSHEET_ID 또는 공유 권한 확인 필요.") from None
         print(f"[INFO] 스프레드시트 열기 성공: {spreadsheet.title}")
 
         # --- 1) 전체 raw_data 탭 (관리자/백업용) ---
         try:
             print(f"[INFO] raw_data 탭 푸시 시작 ({len(df):,}건)")
-            push_df_to_worksheet(spreadsheet, GSHEET_WORKSHEET, df)
+            t0 = time.time()
+            push_values_to_worksheet(spreadsheet, GSHEET_WORKSHEET, sheet_values(df, source_columns(df)))
             print(f"✅ raw_data 푸시 완료: {len(df):,}건 → {GSHEET_WORKSHEET}")
+            sp.add(rows=len(df))
+            run_log.event("sheets_push", tab=GSHEET_WORKSHEET, rows=len(df),
+                          duration_s=round(time.time() - t0, 3))
         except Exception as e:
             print(f"❌ raw_data 푸시 실패: {type(e).__name__}: {e}")
+            run_log.event("sheets_push", tab=GSHEET_WORKSHEET, error=f"{type(e).__name__}: {e}")
 
         # --- 2) 고객사별 분할 탭 ---
-        if not CUSTOMER_TABS:
+        if not customer_tabs:
             print("[INFO] CUSTOMER_TABS 비어있음. 고객사 분할 탭 건너뜀.")
-        elif CUSTOMER_ID_COLUMN not in df.columns:
+            return
+        if CUSTOMER_ID_COLUMN not in df.columns:
             print(f"⚠️ '{CUSTOMER_ID_COLUMN}' 컬럼이 데이터에 없음. 고객사 분할 탭 건너뜀.")
             print(f"[DIAG] 사용 가능한 컬럼: {list(df.columns)[:10]}...")
-        else:
-            # 회원고유번호 컬럼을 문자열로 정규화 (비교 시 일치하도록)
-            df_normalized = df.copy()
-            df_normalized[CUSTOMER_ID_COLUMN] = (
-                df_normalized[CUSTOMER_ID_COLUMN].astype(str).str.strip()
-            )
+            return
 
-            print(f"📊 고객사 분할 탭 생성 시작 ({len(CUSTOMER_TABS)}개)")
+        # 회원고유번호 컬럼만 문자열로 정규화 (비교 시 일치하도록)
+        member_ids = df[CUSTOMER_ID_COLUMN].astype(str).str.strip()
+        columns = source_columns(df)
 
-            for member_id, tab_name in CUSTOMER_TABS.items():
-                try:
-                    member_id_str = str(member_id).strip()
-                    df_customer = df_normalized[
-                        df_normalized[CUSTOMER_ID_COLUMN] == member_id_str
-                    ]
-
-                    print(f"  [{member_id} → {tab_name}] 매칭: {len(df_customer):,}건")
-                    push_df_to_worksheet(spreadsheet, tab_name, df_customer)
-                    print(f"  ✅ {tab_name} 완료")
-
-                except Exception as e:
-                    print(f"  ❌ {member_id} ({tab_name}) 실패: {type(e).__name__}: {e}")
-                    # 한 고객사 실패해도 다른 고객사는 계속 진행
-                    continue
-
-            print(f"✅ 고객사 분할 탭 처리 완료")
-
-    except gspread.exceptions.SpreadsheetNotFound:
-        print(f"❌ Spreadsheet를 찾을 수 없음. GSHEET_ID 또는 공유 권한 확인 필요.")
-    except gspread.exceptions.APIError as e:
-        print(f"❌ Google Sheets API 에러: {e}")
-    except Exception as e:
-        import traceback
-        print(f"❌ Google Sheets 전송 실패: {type(e).__name__}: {e}")
-        traceback.print_exc()
-
-print("🎉 크롤링 -> BigQuery -> Sheets(전체+고객사) 자동화 파이프라인 완료!")
-
-
-# =====================================================================
-# 📦 [추가] 패킹 서버로 item_master 전송 (기존 로직 뒤, 실패해도 영향 없음)
-# =====================================================================
-try:
-    _packing_url = os.getenv("PACKING_INGEST_URL")
-    _packing_key = os.getenv("PACKING_INGEST_KEY", "")
-    if _packing_url:
-        print("📦 패킹 서버로 item_master 전송 시작...")
-        _col = {
-            "item_no": "아이템번호", "member_name": "회원명", "member_id": "회원고유번호",
-            "product": "상품명", "price": "단가", "url": "상품URL",
-            "thumbnail_url": "이미지URL",
-            "inspection_url": "실사주소",
-            "inspect_opt": "구매대행_신청_옵션", "partial_qty": "부분정밀검수_수량",
-            "team": "담당팀", "agency": "대행구분",
-            "total_qty": "수량",
-            "order_status": "주문상태",          
-            "buy_rate": "환율",
-            "color": "색상",
-            "name_en": "통관품목",
-            "arrival_date": "도착일",
-            "inspect_date": "검품완료일",
-        }
-        def _header_key(value):
-            """CSV 헤더의 BOM·개행·공백·구분자 차이를 제거해 같은 컬럼을 찾는다."""
-            text = unicodedata.normalize("NFKC", str(value or ""))
-            text = text.replace("\ufeff", "").replace("\u200b", "")
-            return re.sub(r"[\s_\-]+", "", text).lower()
-
-        def _resolve_header(*candidates):
-            by_key = {_header_key(col): col for col in df_bq.columns}
-            for candidate in candidates:
-                actual = by_key.get(_header_key(candidate))
-                if actual is not None:
-                    return actual
-            return ""
-
-        # 다운로드 사이트의 헤더에 숨은 개행/공백이 붙어도 실사주소가 누락되지 않게 한다.
-        _col["thumbnail_url"] = _resolve_header("이미지URL", "이미지주소", "썸네일URL")
-        _col["inspection_url"] = _resolve_header("실사주소", "실사URL", "실사이미지URL")
-        import math as _math
-        def _num(v):
-            try:
-                f = float(v)
-                if _math.isnan(f) or _math.isinf(f):
-                    return 0
-                return f
-            except (TypeError, ValueError):
-                return 0
-        def _text(v):
-            """pandas 결측값이 문자열 'nan'/'None'으로 전송되지 않게 정규화."""
-            if v is None:
-                return ""
-            try:
-                if pd.isna(v):
-                    return ""
-            except (TypeError, ValueError):
-                pass
-            s = str(v).strip()
-            return "" if s.lower() in ("nan", "none", "nat") else s
-
-        def _url_text(v):
-            """일반 URL뿐 아니라 HTML 링크/엑셀 HYPERLINK 형태도 실제 주소로 정규화한다."""
-            s = _text(v)
-            if not s:
-                return ""
-            html_match = re.search(r"""href\s*=\s*["']([^"']+)["']""", s, re.I)
-            if html_match:
-                return html_match.group(1).strip()
-            formula_match = re.search(r"""HYPERLINK\s*\(\s*["']([^"']+)["']""", s, re.I)
-            if formula_match:
-                return formula_match.group(1).strip()
-            return s
-
-        if not _col["thumbnail_url"]:
-            print(
-                "⚠️ 썸네일 컬럼 '이미지URL' 없음 "
-                "→ thumbnail_url은 빈 값으로 전송합니다."
-            )
-        else:
-            print(f"[INFO] 썸네일 원본 컬럼 확인: {_col['thumbnail_url']!r}")
-        if not _col["inspection_url"]:
-            similar = [col for col in df_bq.columns if "실사" in str(col)]
-            print(
-                "⚠️ 실사 컬럼 '실사주소' 없음 "
-                f"(실사 포함 헤더: {similar}) → inspection_url은 빈 값으로 전송합니다."
-            )
-        else:
-            print(f"[INFO] 실사 원본 컬럼 확인: {_col['inspection_url']!r}")
+        print(f"📊 고객사 분할 탭 생성 시작 ({len(customer_tabs)}개)")
 
-        _records = []
-        for _, _r in df_bq.iterrows():
-            _rd = _r.to_dict()
-            _ino = _text(_rd.get(_col["item_no"], ""))
-            if not _ino:
+        for member_id, tab_name in customer_tabs.items():
+            try:
+                member_id_str = str(member_id).strip()
+                df_customer = df.loc[(member_ids == member_id_str).to_numpy()]
+
+                print(f"  [{member_id} → {tab_name}] 매칭: {len(df_customer):,}건")
+                t0 = time.time()
+                push_values_to_worksheet(spreadsheet, tab_name, sheet_values(df_customer, columns))
+                print(f"  ✅ {tab_name} 완료")
+                sp.add(rows=len(df_customer))
+                run_log.event("sheets_push", tab=tab_name, rows=len(df_customer),
+                              duration_s=round(time.time() - t0, 3))
+
+            except Exception as e:
+                print(f"  ❌ {member_id} ({tab_name}) 실패: {type(e).__name__}: {e}")
+                # 한 고객사 실패해도 다른 고객사는 계속 진행
                 continue
-            _records.append({
-                "item_no": _ino,
-                "member_name": _text(_rd.get(_col["member_name"], "")),
-                "member_id": _text(_rd.get(_col["member_id"], "")),
-                "product": _text(_rd.get(_col["product"], "")),
-                "price": _num(_rd.get(_col["price"])),
-                "url": _text(_rd.get(_col["url"], "")),
-                "thumbnail_url": _url_text(_rd.get(_col["thumbnail_url"], "")),
-                "inspection_url": _url_text(_rd.get(_col["inspection_url"], "")),
-                "inspect_opt": _text(_rd.get(_col["inspect_opt"], "")).replace("\t", " "),
-                "partial_qty": _num(_rd.get(_col["partial_qty"])),
-                "team": _text(_rd.get(_col["team"], "")),
-                "agency": _text(_rd.get(_col["agency"], "")),
-                "total_qty": _num(_rd.get(_col["total_qty"])),
-                "order_status": _text(_rd.get(_col["order_status"], "")),
-                "buy_rate": _num(_rd.get(_col["buy_rate"])),
-                "color": _text(_rd.get(_col["color"], "")),
-                "name_en": _text(_rd.get(_col["name_en"], "")),
-                "arrival_date": _text(_rd.get(_col["arrival_date"], "")),
-                "inspect_date": _text(_rd.get(_col["inspect_date"], "")),
-            })
-        _thumb_count = sum(1 for _rec in _records if _rec.get("thumbnail_url"))
-        _inspection_count = sum(1 for _rec in _records if _rec.get("inspection_url"))
-        print(f"[INFO] 썸네일 URL 포함: {_thumb_count:,}/{len(_records):,}건")
-        print(f"[INFO] 실사주소 포함: {_inspection_count:,}/{len(_records):,}건")
-        _resp = requests.post(f"{_packing_url}?k={_packing_key}", json={"items": _records}, timeout=120)
-        if _resp.status_code == 200:
-            print(f"✅ 패킹 서버 전송 완료: {_resp.json()}")
-        else:
-            print(f"❌ 패킹 서버 전송 실패: {_resp.status_code} {_resp.text[:200]}")
-    else:
+
+        print(f"✅ 고객사 분할 탭 처리 완료")
+
+
+def _post_json(stage: str, url: str, body: bytes, rows: int, auth=None) -> dict:
+    """수신 서버 POST 1건 + 계측. body 는 이미 직렬화한 JSON(json_body). 200 이 아니면 예외."""
+    with instrument.span(stage, rows=rows, bytes=len(body)) as sp:
+        t0 = time.time()
+        resp = http_session().post(
+            url, data=body, auth=auth, timeout=120,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        )
+        run_log.http_event(stage, resp, t0, rows=rows)
+        sp.add(http_status=resp.status_code)
+    if resp.status_code != 200:
+        raise RuntimeError(f"{resp.status_code} {resp.text[:200]}")
+    return resp.json()
+
+
+# 서버 전송 대상: 목적지 → (계측 이름, URL env, 키 env, Basic 인증 사용 여부)
+#   PACKING_INGEST_URL   패킹 서버
+#   FINANCE_INGEST_URL   예: http://<서버IP>:8080/api/packing/ingest  (키: 서버 PACKING_INGEST_KEY와 동일, 안 쓰면 빈값)
+#   FINANCE_RAWDATA_URL  예: http://<서버IP>:8080/api/rawdata/ingest  (키: 서버 RAWDATA_INGEST_KEY와 동일, 안 쓰면 빈값)
+#   FINANCE_BASIC_USER / FINANCE_BASIC_PASS  Nginx Basic 인증(직원 접속 계정, 재무 두 곳 공통)
+POST_TARGETS = {
+    "packing": ("packing_post", "PACKING_INGEST_URL", "PACKING_INGEST_KEY", False),
+    "finance": ("finance_post", "FINANCE_INGEST_URL", "FINANCE_INGEST_KEY", True),
+    "rawdata": ("rawdata_post", "FINANCE_RAWDATA_URL", "FINANCE_RAWDATA_KEY", True),
+}
+
+
+def _post_target(dest: str) -> tuple[str, tuple[str, str] | None] | None:
+    """(키를 붙인 URL, Basic 인증). URL env 가 없으면 None. 보낼 때마다 env 에서 읽는다(outbox 에는 저장 안 함)."""
+    _, url_env, key_env, basic = POST_TARGETS[dest]
+    url = os.getenv(url_env)
+    if not url:
+        return None
+    user = os.getenv("FINANCE_BASIC_USER", "") if basic else ""
+    auth = (user, os.getenv("FINANCE_BASIC_PASS", "")) if user else None
+    return f"{url}?k={os.getenv(key_env, '')}", auth
+
+
+def _send_message(msg, body: bytes) -> dict:
+    """outbox 항목 1건 전송 (Outbox.drain 의 send)."""
+    target = _post_target(msg.dest)
+    if target is None:
+        raise RuntimeError(f"{POST_TARGETS[msg.dest][1]} 미설정")
+    url, auth = target
+    return _post_json(POST_TARGETS[msg.dest][0], url, body, msg.rows, auth)
+
+
+# 이번 run() 에서 대기함에 넣은 목적지 (sinks_settled 가 "본문은 안전하게 남았음" 판단에 씀)
+_ENQUEUED: set[str] = set()
+
+
+def _post_or_enqueue(dest: str, body: bytes, rows: int) -> dict | None:
+    """GOODS_OUTBOX 면 대기함에 저장만 하고 None(전송은 run() 끝의 deliver_outbox), 아니면 바로 POST."""
+    if OUTBOX_ENABLED:
+        import outbox
+
+        msg_id = outbox.Outbox().enqueue(dest, body, rows)
+        _ENQUEUED.add(dest)
+        print(f"📮 전송 대기함 저장: #{msg_id} ({dest}, {rows:,}건, {len(body) / 1e6:.2f} MB)")
+        return None
+    url, auth = _post_target(dest)
+    return _post_json(POST_TARGETS[dest][0], url, body, rows, auth)
+
+
+def deliver_outbox(dests=None, hold=()) -> dict[str, bool]:
+    """대기함 본문을 목적지별 스레드로 전송(목적지 안에서는 오래된 것부터 순서대로).
+    dests 를 안 주면 대기 건이 있는 목적지 전부, hold 는 이번엔 보내지 않음(사전 점검 실패).
+    반환: {목적지: 대기 건 없이 다 나갔는지}."""
+    import outbox
+    from concurrent.futures import ThreadPoolExecutor
+
+    box = outbox.Outbox()
+    pending = box.pending_dests()
+    dests = [d for d in (pending if dests is None else dests)
+             if d in POST_TARGETS and d in pending and d not in hold]
+    if not dests:
+        return {}
+
+    def one(dest: str) -> bool:
+        try:
+            for result in box.drain(dest, _send_message):
+                print(f"✅ {SINK_LABELS[dest]} 완료: {result}")
+            return True
+        except Exception as e:
+            print(f"❌ {SINK_LABELS[dest]} 실패(대기함에 남김): {type(e).__name__}: {e}")
+            return False
+
+    print(f"📮 전송 대기함 처리: {dests}")
+    with ThreadPoolExecutor(max_workers=len(dests), thread_name_prefix="outbox") as pool:
+        return dict(zip(dests, pool.map(one, dests)))
+
+
+def sink_packing(df: pd.DataFrame) -> None:
+    """📦 패킹 서버로 item_master 전송."""
+    if _post_target("packing") is None:
         print("[INFO] PACKING_INGEST_URL 미설정 → 패킹 전송 건너뜀")
-except Exception as _e:
-    print(f"❌ 패킹 서버 전송 중 오류(무시): {type(_e).__name__}: {_e}")
-
-
-# =====================================================================
-# 📦 [추가] 재무회계 ERP로 담당자 작업기록 전송 (근태 교차확인용)
-# =====================================================================
-try:
-    _fin_url = os.getenv("FINANCE_INGEST_URL")            # 예: http://<서버IP>:8080/api/packing/ingest
-    _fin_key = os.getenv("FINANCE_INGEST_KEY", "")        # 서버 PACKING_INGEST_KEY와 동일(안 쓰면 빈값)
-    _fin_user = os.getenv("FINANCE_BASIC_USER", "")       # Nginx Basic 인증(직원 접속 계정)
-    _fin_pass = os.getenv("FINANCE_BASIC_PASS", "")
-    if _fin_url:
-        print("📦 재무 ERP로 담당자 작업기록 전송 시작...")
-
-        def _fin_key_norm(value):
-            text = unicodedata.normalize("NFKC", str(value or ""))
-            text = text.replace("﻿", "").replace("​", "")
-            return re.sub(r"[\s_\-]+", "", text).lower()
-
-        def _fin_col(*candidates):
-            by_key = {_fin_key_norm(col): col for col in df_bq.columns}
-            for cand in candidates:
-                actual = by_key.get(_fin_key_norm(cand))
-                if actual is not None:
-                    return actual
-            return ""
-
-        def _fin_text(v):
-            if v is None:
-                return ""
-            try:
-                if pd.isna(v):
-                    return ""
-            except (TypeError, ValueError):
-                pass
-            s = str(v).strip()
-            return "" if s.lower() in ("nan", "none", "nat") else s
-
-        _c_ap  = _fin_col("담당자1")
-        _c_apd = _fin_col("승인일")
-        _c_ar  = _fin_col("담당자2")
-        _c_ard = _fin_col("도착일")
-        if not (_c_ap and _c_ar):
-            print(f"⚠️ 담당자 컬럼 없음 (담당자1={_c_ap!r}, 담당자2={_c_ar!r}) → 재무 전송 건너뜀")
-        else:
-            _fin_items = []
-            for _, _r in df_bq.iterrows():
-                _rd = _r.to_dict()
-                _ap = _fin_text(_rd.get(_c_ap, ""))
-                _ar = _fin_text(_rd.get(_c_ar, ""))
-                if not _ap and not _ar:
-                    continue  # 담당자 없는 행(아직 작업 안 된 아이템)은 건너뜀
-                _fin_items.append({
-                    "approver":     _ap,
-                    "approve_date": _fin_text(_rd.get(_c_apd, "")),
-                    "arriver":      _ar,
-                    "arrive_date":  _fin_text(_rd.get(_c_ard, "")),
-                })
-            print(f"[INFO] 재무 전송 아이템: {len(_fin_items):,}건")
-            _auth = (_fin_user, _fin_pass) if _fin_user else None
-            _fin_resp = requests.post(
-                f"{_fin_url}?k={_fin_key}",
-                json={"items": _fin_items},
-                auth=_auth,
-                timeout=120,
-            )
-            if _fin_resp.status_code == 200:
-                print(f"✅ 재무 ERP 전송 완료: {_fin_resp.json()}")
-            else:
-                print(f"❌ 재무 ERP 전송 실패: {_fin_resp.status_code} {_fin_resp.text[:200]}")
-    else:
+        return
+    print("📦 패킹 서버로 item_master 전송 시작...")
+    from goods_transform import json_body, packing_table
+
+    items = packing_table(df)
+    result = _post_or_enqueue("packing", json_body("items", items), items.num_rows)
+    if result is not None:
+        print(f"✅ 패킹 서버 전송 완료: {result}")
+
+
+def sink_finance(df: pd.DataFrame) -> None:
+    """📦 재무회계 ERP로 담당자 작업기록 전송 (근태 교차확인용)."""
+    if _post_target("finance") is None:
         print("[INFO] FINANCE_INGEST_URL 미설정 → 재무 전송 건너뜀")
-except Exception as _e:
-    print(f"❌ 재무 ERP 전송 중 오류(무시): {type(_e).__name__}: {_e}")
-
-
-# =====================================================================
-# 📦 [추가] 재무회계 ERP로 raw data 전체 전송 (금액대조·송금이익 + 근태)
-#   위 packing/finance 블록과 별개. 금액·환율 포함 전체 행을 보낸다(같은 30분 주기).
-#   서버가 rawitem(금액) + packing(근태)을 둘 다 만든다. try/except라 재무 서버 문제가
-#   패킹 파이프라인에 영향 없음(엔드포인트 완전 분리).
-# =====================================================================
-try:
-    _rd_url = os.getenv("FINANCE_RAWDATA_URL")           # 예: http://<서버IP>:8080/api/rawdata/ingest
-    _rd_key = os.getenv("FINANCE_RAWDATA_KEY", "")       # 서버 RAWDATA_INGEST_KEY와 동일(안 쓰면 빈값)
-    _rd_user = os.getenv("FINANCE_BASIC_USER", "")       # Nginx Basic 인증(패킹 블록과 동일 계정)
-    _rd_pass = os.getenv("FINANCE_BASIC_PASS", "")
-    if _rd_url:
-        print("📦 재무 ERP로 raw data 전체 전송 시작...")
-
-        def _rd_norm(value):
-            text = unicodedata.normalize("NFKC", str(value or ""))
-            text = text.replace("﻿", "").replace("​", "")
-            return re.sub(r"[\s_\-]+", "", text).lower()
-
-        def _rd_col(*candidates):
-            by_key = {_rd_norm(col): col for col in df_bq.columns}
-            for cand in candidates:
-                actual = by_key.get(_rd_norm(cand))
-                if actual is not None:
-                    return actual
-            return ""
-
-        def _rd_text(v):
-            if v is None:
-                return ""
-            try:
-                if pd.isna(v):
-                    return ""
-            except (TypeError, ValueError):
-                pass
-            s = str(v).strip()
-            return "" if s.lower() in ("nan", "none", "nat") else s
-
-        _c_item = _rd_col("아이템번호")
-        _c_tot  = _rd_col("합계_원화_", "합계원화", "합계(원화)")
-        _c_unit = _rd_col("단가_원화_", "단가원화", "단가(원화)")
-        _c_qty  = _rd_col("최초_주문수량", "최초주문수량")   # ⚠️ 첫 실행 후 금액대조 빵꾸 수로 정상 여부 확인
-        _c_fee  = _rd_col("수수료_원화_", "수수료원화", "수수료(원화)")
-        _c_ship = _rd_col("현지배송비_원화_", "현지배송비원화", "현지배송비(원화)")
-        _c_etc  = _rd_col("기타금액_원화_", "기타금액원화", "기타금액(원화)")
-        _c_stat = _rd_col("주문상태")
-        _c_fx   = _rd_col("환율")
-        _c_ap   = _rd_col("담당자1")
-        _c_apd  = _rd_col("승인일")
-        _c_ar   = _rd_col("담당자2")
-        _c_ard  = _rd_col("도착일")
-        if not _c_item:
-            print("⚠️ 아이템번호 컬럼 없음 → raw data 전송 건너뜀")
+        return
+    print("📦 재무 ERP로 담당자 작업기록 전송 시작...")
+    from goods_transform import finance_table, json_body
+
+    items = finance_table(df)
+    if items is None:
+        return
+    print(f"[INFO] 재무 전송 아이템: {items.num_rows:,}건")
+    result = _post_or_enqueue("finance", json_body("items", items), items.num_rows)
+    if result is not None:
+        print(f"✅ 재무 ERP 전송 완료: {result}")
+
+
+def sink_rawdata(df: pd.DataFrame) -> None:
+    """📦 재무회계 ERP로 raw data 전체 전송 (금액대조·송금이익 + 근태).
+    packing/finance 와 별개. 금액·환율 포함 전체 행을 보낸다(같은 30분 주기).
+    서버가 rawitem(금액) + packing(근태)을 둘 다 만든다(엔드포인트 완전 분리)."""
+    if _post_target("rawdata") is None:
+        print("[INFO] FINANCE_RAWDATA_URL 미설정 → raw data 전송 건너뜀")
+        return
+    print("📦 재무 ERP로 raw data 전체 전송 시작...")
+    from goods_transform import json_body, rawdata_table
+
+    rows = rawdata_table(df)
+    if rows is None:
+        return
+    print(f"[INFO] raw data 전송 행: {rows.num_rows:,}건")
+    # mode 생략 = full(rawitem + packing 둘 다)
+    result = _post_or_enqueue("rawdata", json_body("rows", rows), rows.num_rows)
+    if result is not None:
+        print(f"✅ 재무 raw data 전송 완료: {result}")
+
+
+SINKS = {
+    "bigquery": sink_bigquery,
+    "sheets": sink_sheets,
+    "packing": sink_packing,
+    "finance": sink_finance,
+    "rawdata": sink_rawdata,
+}
+STAGES = ("fetch", *SINKS)
+
+SINK_LABELS = {
+    "bigquery": "BigQuery 적재",
+    "sheets": "Google Sheets 전송",
+    "packing": "패킹 서버 전송",
+    "finance": "재무 ERP 전송",
+    "rawdata": "재무 raw data 전송",
+}
+# 실패 시 종료 코드 1 로 워크플로우를 빨간 X 로 남길 싱크. 나머지(Sheets·서버 전송)는 예전처럼
+# 실패해도 로그만 남긴다(다른 싱크는 어느 쪽이든 계속 진행).
+FATAL_SINKS = {"bigquery"}
+
+
+def snapshot(df: pd.DataFrame, source: str) -> None:
+    """이번 export 를 스냅샷 저장소에 남기고 직전 스냅샷과의 행 차이를 기록한다."""
+    import snapshot_store
+
+    with instrument.span("snapshot", rows=len(df)) as sp:
+        store = snapshot_store.SnapshotStore("goods")
+        prev = store.latest()
+        snap = store.save(df, source=os.path.basename(source))
+        sp.add(bytes=snap.bytes)
+        if prev is None:
+            print(f"📸 스냅샷 저장: {snap.id} (이전 스냅샷 없음)")
+            return
+        if prev.content_hash == snap.content_hash:
+            counts = {"added": 0, "changed": 0, "removed": 0, "unchanged": snap.rows}
         else:
-            _rd_rows = []
-            for _, _r in df_bq.iterrows():
-                _rd = _r.to_dict()
-                _no = _rd_text(_rd.get(_c_item, ""))
-                if not _no:
-                    continue
-                _rd_rows.append({
-                    "item_no":      _no,
-                    "total_krw":    _rd_text(_rd.get(_c_tot, "")),
-                    "unit_krw":     _rd_text(_rd.get(_c_unit, "")),
-                    "init_qty":     _rd_text(_rd.get(_c_qty, "")),
-                    "fee_krw":      _rd_text(_rd.get(_c_fee, "")),
-                    "ship_krw":     _rd_text(_rd.get(_c_ship, "")),
-                    "etc_krw":      _rd_text(_rd.get(_c_etc, "")),
-                    "status":       _rd_text(_rd.get(_c_stat, "")),
-                    "fx":           _rd_text(_rd.get(_c_fx, "")),
-                    "approver":     _rd_text(_rd.get(_c_ap, "")),
-                    "approve_date": _rd_text(_rd.get(_c_apd, "")),
-                    "arriver":      _rd_text(_rd.get(_c_ar, "")),
-                    "arrive_date":  _rd_text(_rd.get(_c_ard, "")),
-                })
-            print(f"[INFO] raw data 전송 행: {len(_rd_rows):,}건")
-            _rd_auth = (_rd_user, _rd_pass) if _rd_user else None
-            _rd_resp = requests.post(
-                f"{_rd_url}?k={_rd_key}",
-                json={"rows": _rd_rows},   # mode 생략 = full(rawitem + packing 둘 다)
-                auth=_rd_auth,
-                timeout=120,
-            )
-            if _rd_resp.status_code == 200:
-                print(f"✅ 재무 raw data 전송 완료: {_rd_resp.json()}")
-            else:
-                print(f"❌ 재무 raw data 전송 실패: {_rd_resp.status_code} {_rd_resp.text[:200]}")
+            counts = snapshot_store.diff(store.load(prev), df, key=SNAPSHOT_KEY).counts()
+        print(f"📸 스냅샷 저장: {snap.id} / 직전({prev.id}) 대비 {counts}")
+        run_log.event("snapshot_delta", snapshot=snap.id, previous=prev.id, **counts)
+        sp.add(**counts)
+
+
+# ===== Preflight =====
+def preflight_checks(sinks, source: bool) -> dict:
+    """싱크별 점검 함수 (preflight.run_checks 용). source 면 silkroad21 로그인 페이지도."""
+    import preflight
+
+    def check_bigquery():
+        if not PROJECT_ID:
+            raise RuntimeError("GCP_PROJECT 환경변수가 필요합니다")
+        ds = bigquery_client().get_dataset(f"{PROJECT_ID}.{DATASET_ID}", timeout=preflight.PREFLIGHT_TIMEOUT_S)
+        return f"{ds.project}.{ds.dataset_id}"
+
+    def check_sheets():
+        if not GSHEET_ID:
+            raise preflight.Skip("GSHEET_ID 미설정")
+        return sheets_client().open_by_key(GSHEET_ID).title
+
+    def check_post(dest):
+        def check():
+            target = _post_target(dest)
+            if target is None:
+                raise preflight.Skip(f"{POST_TARGETS[dest][1]} 미설정")
+            url, auth = target
+            return preflight.http_check(url, auth)
+        return check
+
+    checks = {"silkroad": lambda: preflight.http_check(LOGIN_URL)} if source else {}
+    for name in sinks:
+        if name == "bigquery":
+            checks[name] = check_bigquery
+        elif name == "sheets":
+            checks[name] = check_sheets
+        elif name in POST_TARGETS:
+            checks[name] = check_post(name)
+    return checks
+
+
+def preflight_gate(sinks, source: bool) -> tuple[list[str], list[str], list[str]]:
+    """사전 점검 후 (그대로 실행할 싱크, 뺀 싱크, 저장만 하고 전송 보류할 서버 전송).
+    silkroad21 · 필수 싱크가 죽었거나 쓸 수 있는 싱크가 하나도 없으면 RuntimeError (크롬을 띄우기 전)."""
+    import preflight
+
+    with instrument.span("preflight"):
+        caps = preflight.run_checks(preflight_checks(sinks, source))
+    dead = [n for n, c in caps.items() if c.status == "dead"]
+    write_github_output(dead_sinks=",".join(dead))
+    if "silkroad" in dead:
+        raise RuntimeError(f"silkroad21 접속 불가 → 크롤링 중단: {caps['silkroad'].detail}")
+    if FATAL_SINKS & set(dead):
+        raise RuntimeError(f"필수 싱크 사용 불가 → 크롤링 중단: {sorted(FATAL_SINKS & set(dead))}")
+
+    hold = [n for n in sinks if n in dead and OUTBOX_ENABLED and n in POST_TARGETS]
+    dropped = [n for n in sinks if n in dead and n not in hold]
+    kept = [n for n in sinks if n not in dropped]
+    if sinks and not [n for n in kept if caps[n].usable or n in hold]:
+        raise RuntimeError(f"쓸 수 있는 싱크가 없음 → 크롤링 중단: {dead}")
+    for n in dropped:
+        print(f"⏭️ {SINK_LABELS[n]} 건너뜀 (사전 점검 실패)")
+    return kept, dropped, hold
+
+
+def run(stages=STAGES, from_csv: str | None = None, from_snapshot: str | None = None,
+        force: bool = False) -> dict[str, bool]:
+    """선택한 단계만 실행. from_csv / from_snapshot 이 있으면 크롤링 대신 그걸로 시작.
+    GOODS_PROBE 가 켜져 있고 목록이 직전 실행과 같으면(force 가 아니면) 아무것도 하지 않는다.
+    반환: {싱크 이름: 성공 여부} (건너뛴 싱크는 없음)."""
+    stages = [s for s in STAGES if s in stages]
+    sinks = [s for s in stages if s in SINKS]
+    probed = False
+    _ENQUEUED.clear()
+    dropped, hold = [], []
+    if PREFLIGHT_ENABLED:
+        crawl = "fetch" in stages and not (from_csv or from_snapshot)
+        sinks, dropped, hold = preflight_gate(sinks, source=crawl)
+
+    if from_snapshot:
+        import snapshot_store
+
+        store = snapshot_store.SnapshotStore("goods")
+        snap = store.get(from_snapshot)
+        if snap is None:
+            raise RuntimeError(f"스냅샷 없음: {from_snapshot}")
+        print(f"[INFO] 크롤링 생략, 스냅샷 재처리: {snap.id} ({snap.rows:,}행, {snap.source})")
+        df = store.load(snap)
     else:
-        print("[INFO] FINANCE_RAWDATA_URL 미설정 → raw data 전송 건너뜀")
-except Exception as _e:
-    print(f"❌ 재무 raw data 전송 중 오류(무시): {type(_e).__name__}: {_e}")
+        if from_csv:
+            path = from_csv
+            print(f"[INFO] 크롤링 생략, 기존 CSV 사용: {path}")
+        elif "fetch" in stages:
+            probed = PROBE_ENABLED and not force and bool(sinks)
+            path = fetch(use_probe=probed)
+            if path is None:
+                print("✅ 목록 변경 없음 → 다운로드·싱크 전부 건너뜀")
+                if OUTBOX_ENABLED:
+                    deliver_outbox(hold=hold)        # 지난 실행에서 못 보낸 본문만 재전송
+                return {}
+        else:
+            raise RuntimeError("fetch 를 빼려면 --from-csv 나 --from-snapshot 으로 입력을 지정하세요")
+
+        if not sinks and not SNAPSHOTS_ENABLED:
+            print(f"✅ 다운로드만 완료: {path}")
+            return {}
+        df = parse(path)
+        if SNAPSHOTS_ENABLED:
+            try:
+                snapshot(df, path)
+            except Exception as e:
+                print(f"⚠️ 스냅샷 저장 실패(무시): {type(e).__name__}: {e}")
+
+    if not sinks:
+        return {n: False for n in dropped}
+    df = derive(df)
+
+    results = {n: False for n in dropped}
+    for name in sinks:
+        try:
+            SINKS[name](df)
+            results[name] = True
+        except Exception as e:
+            print(f"❌ {SINK_LABELS[name]} 실패: {type(e).__name__}: {e}")
+            results[name] = False
+    if OUTBOX_ENABLED:
+        for name, ok in deliver_outbox(hold=hold).items():
+            if name in results:
+                results[name] = results[name] and ok
+        for name in hold:
+            print(f"📮 {SINK_LABELS[name]} 보류: 대기함에 저장, 다음 실행에서 재전송 (사전 점검 실패)")
+            results[name] = False
+    if probed and sinks_settled(results):
+        mark_probe_ok()
+    return results
+
+
+# ===== Main =====
+def main(argv: list[str] | None = None) -> None:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="silkroad21 구매대행 목록 → BigQuery / Sheets / 패킹·재무 서버")
+    ap.add_argument(
+        "--stages", default=",".join(STAGES),
+        help=f"쉼표 구분 실행 단계 (기본: 전부). 선택: {', '.join(STAGES)}",
+    )
+    src = ap.add_mutually_exclusive_group()
+    src.add_argument(
+        "--from-csv", nargs="?", const="latest", default=None, metavar="PATH",
+        help="크롤링 대신 이 CSV로 시작 (값 없이 쓰면 다운로드 폴더의 최신 CSV)",
+    )
+    src.add_argument(
+        "--from-snapshot", nargs="?", const="latest", default=None, metavar="ID",
+        help="크롤링 대신 스냅샷 저장소의 export 로 재처리 (ID / latest / previous, 기본 latest)",
+    )
+    ap.add_argument(
+        "--force", action="store_true",
+        help="GOODS_PROBE 변경 감지를 무시하고 전체 실행 (env GOODS_FORCE=1 과 같음)",
+    )
+    ap.add_argument(
+        "--preflight-only", action="store_true",
+        help="사전 점검만 하고 종료 (silkroad21 · 필수 싱크가 죽었으면 종료 코드 1)",
+    )
+    args = ap.parse_args(argv)
+    force = args.force or os.getenv("GOODS_FORCE", "").strip().lower() in ("1", "true", "yes")
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        ap.error(f"알 수 없는 단계: {unknown} (선택: {', '.join(STAGES)})")
+
+    from_csv = args.from_csv
+    if from_csv == "latest":
+        from_csv = latest_csv()
+        if from_csv is None:
+            ap.error(f"다운로드 폴더에 CSV가 없습니다: {downloads_folder}")
+
+    # ===== Stdout to log.txt (+ 구조화 기록 log.jsonl) =====
+    run_log.install("log.txt")
+    os.environ.setdefault("GOOGLE_APPLICATION_CREDENTIALS", GOOGLE_CREDS)
+
+    if args.preflight_only:
+        try:
+            preflight_gate([s for s in stages if s in SINKS], source="fetch" in stages)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        return
+
+    try:
+        results = run(stages, from_csv, args.from_snapshot, force=force)
+    except Exception as e:
+        print(f"❌ {type(e).__name__}: {e}")
+        sys.exit(1)
+
+    ok = [n for n, s in results.items() if s]
+    bad = [n for n, s in results.items() if not s]
+    print(f"🎉 파이프라인 완료 — 성공: {ok or '없음'} / 실패: {bad or '없음'}")
+    if FATAL_SINKS & set(bad):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
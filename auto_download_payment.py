@@ -7,6 +7,7 @@ from __future__ import annotations
 #   두 .xls를 받아, **파일을 그대로(gzip+base64)** 재무 ERP로 POST 한다.
 #   서버가 클라 업로드와 똑같은 파서(parsePayEnd)로 파싱해 payment·deposit upsert.
 #   → py는 다운로드만, 파싱·집계는 서버. 로직 중복 0, 수동 업로드와 동일 결과.
+#   PAY_DELTA=1 이면 직전 전송 대비 바뀐 행만 보낸다(payment_delta.py). 전체 파일은 주기적 대조용으로 남음.
 #
 #   (구버전 auto_download_payment_to_sheets.py의 Google Sheets/BigQuery 전송은 전부 제거.
 #    이제 재무 ERP로만 쏜다.)
@@ -17,6 +18,7 @@ import sys
 import time
 import glob
 import gzip
+import json
 import base64
 from pathlib import Path
 from datetime import datetime
@@ -30,6 +32,10 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 import urllib3.exceptions
 
+import run_log
+import instrument
+import waits
+
 RETRYABLE_ERRORS = (
     TimeoutException,
     WebDriverException,
@@ -40,41 +46,26 @@ RETRYABLE_ERRORS = (
     ConnectionError,
 )
 
-
-# ===== 로그를 파일로도 남김 =====
-class DualLogger:
-    def __init__(self, filepath: str):
-        self.terminal = sys.__stdout__
-        self.log = open(filepath, "w", encoding="utf-8")
-
-    def write(self, message: str):
-        self.terminal.write(message)
-        self.log.write(message)
-
-    def flush(self):
-        self.terminal.flush()
-        self.log.flush()
-
-
-sys.stdout = sys.stderr = DualLogger("log_payment.txt")
-
 # ===== 환경 / 설정 =====
+#   import 만으로는 아무 일도 일어나지 않게(로그 설치·필수 env 확인·폴더 생성은 main 에서)
+#   → silkroad_session.py 가 이 모듈의 검색 필터 / 전송 함수를 그대로 가져다 쓴다.
 RUNNER = os.getenv("GITHUB_ACTIONS") == "true"
 
 # 로그인 (raw data 파이프라인과 동일 계정)
-LOGIN_ID = os.environ["LOGIN_ID"]
-LOGIN_PW = os.environ["LOGIN_PW"]
+LOGIN_ID = os.getenv("LOGIN_ID")
+LOGIN_PW = os.getenv("LOGIN_PW")
 
 # 재무 ERP 수신 (필수)
-FIN_URL = os.environ["FINANCE_PAYMENT_URL"]          # 예: http://<서버IP>:8080/api/payment/ingest
+FIN_URL = os.getenv("FINANCE_PAYMENT_URL")           # 예: http://<서버IP>:8080/api/payment/ingest
 FIN_KEY = os.getenv("FINANCE_PAYMENT_KEY", "")       # 서버 PAYMENT_INGEST_KEY와 동일(안 쓰면 빈값)
 FIN_USER = os.getenv("FINANCE_BASIC_USER", "")       # Nginx Basic 인증(직원 접속 계정)
 FIN_PASS = os.getenv("FINANCE_BASIC_PASS", "")
 
-# 날짜 범위: 시작일 고정(기본 2026-01-01), 종료일은 실행 시점 오늘. 전체 범위를 매번 보내도
-# 서버가 결제번호로 upsert 하므로 idempotent(중복/누락 없음).
+# 날짜 범위: 시작일 고정(기본 2026-01-01), 종료일은 검색하는 시점의 오늘(apply_search_filters).
+# 전체 범위를 매번 보내도 서버가 결제번호로 upsert 하므로 idempotent(중복/누락 없음).
 START_DATE = os.getenv("PAY_START_DATE") or "2026-01-01"
-END_DATE = datetime.now().strftime("%Y-%m-%d")
+# 바뀐 행만 전송 (payment_delta.py). 기본은 예전처럼 전체 파일
+DELTA_ENABLED = (os.getenv("PAY_DELTA") or "").strip().lower() in ("1", "true", "yes")
 
 # URLs
 LOGIN_URL = "https://silkroad21.co.kr/pzadm/Login.asp"
@@ -90,12 +81,24 @@ DEPOSIT_URL = os.getenv(
     "https://silkroad21.co.kr/Admin/Acting/Pay_End_Pmt_S.asp?shTbTy=DPST&gMnu1=101&gMnu2=10105",
 )
 
+# 브라우저 프로필 (BROWSER_PROFILE)
+#   fast(기본): 이미지·폰트·광고/분석 스크립트 요청 차단(CDP Network.setBlockedURLs) + eager 로드
+#               (DOMContentLoaded 에서 반환) + implicit wait 없음 → 모든 대기는 WebDriverWait 로 명시
+#   full      : 예전 그대로(전체 리소스, normal 로드, implicitly_wait(5)). 페이지가 깨지면 이걸로.
+#   CSS 와 jQuery/easyui 같은 페이지 스크립트는 막지 않는다(검색 필터가 $(...).datebox 를 씀).
+BROWSER_PROFILE = (os.getenv("BROWSER_PROFILE") or "fast").strip().lower()
+BLOCKED_URL_PATTERNS = [
+    "*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.bmp*", "*.ico*", "*.svg*",
+    "*.woff*", "*.ttf*", "*.otf*", "*.eot*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*wcs.naver.net*",
+]
+
 # 다운로드 폴더
 if RUNNER:
     downloads_folder = str((Path.cwd() / "downloads_payment").resolve())
 else:
     downloads_folder = r"C:\Users\white\Downloads\csv_payment"
-Path(downloads_folder).mkdir(parents=True, exist_ok=True)
 
 
 # ===== Helpers (구 스크립트와 동일한 로그인/이동 프레임워크) =====
@@ -128,6 +131,11 @@ def make_driver(headless: bool = True) -> webdriver.Chrome:
             "download.extensions_to_open": "",
         },
     )
+    fast = BROWSER_PROFILE != "full"
+    if fast:
+        options.page_load_strategy = "eager"
+        options.add_argument("--blink-settings=imagesEnabled=false")
+
     chrome_bin = os.getenv("CHROME_PATH")
     if chrome_bin:
         options.binary_location = chrome_bin
@@ -149,7 +157,15 @@ def make_driver(headless: bool = True) -> webdriver.Chrome:
         )
     except Exception:
         pass
-    driver.implicitly_wait(5)
+    if fast:
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        except Exception as e:
+            print(f"[WARN] 리소스 차단 설정 실패(전체 로드로 진행): {e}")
+    else:
+        driver.implicitly_wait(5)
+    print(f"[INFO] 브라우저 프로필: {'fast' if fast else 'full'}")
     return driver
 
 
@@ -191,7 +207,7 @@ def do_login(driver: webdriver.Chrome, max_retries: int = 3) -> None:
             last_error = e
             print(f"[WARN] 로그인 시도 {attempt} 실패: {type(e).__name__}: {str(e)[:200]}")
             if attempt < max_retries:
-                time.sleep(15 * attempt)
+                waits.backoff(attempt, e, "login")
     raise RuntimeError(f"로그인 {max_retries}회 모두 실패. 마지막 에러: {last_error}")
 
 
@@ -201,7 +217,7 @@ def goto_with_auth(driver: webdriver.Chrome, url: str, login_hint: str = "Login.
         try:
             print(f"[INFO] 페이지 이동 시도 {attempt}/{max_retries}: {url}")
             driver.get(url)
-            time.sleep(0.5)
+            waits.until(driver, waits.document_ready(), "page_ready", timeout=10, required=False)
             if login_hint in driver.current_url:
                 print("[INFO] 로그인 페이지로 리다이렉트됨, 재로그인 진행")
                 do_login(driver)
@@ -211,7 +227,7 @@ def goto_with_auth(driver: webdriver.Chrome, url: str, login_hint: str = "Login.
             last_error = e
             print(f"[WARN] 페이지 이동 시도 {attempt} 실패: {type(e).__name__}: {str(e)[:200]}")
             if attempt < max_retries:
-                time.sleep(15 * attempt)
+                waits.backoff(attempt, e, "navigate")
     raise RuntimeError(f"페이지 이동 {max_retries}회 모두 실패. 마지막 에러: {last_error}")
 
 
@@ -226,19 +242,7 @@ def clear_downloads() -> None:
 
 
 def wait_for_download_complete(timeout: int = 300) -> str:
-    end = time.time() + timeout
-    while time.time() < end:
-        if glob.glob(os.path.join(downloads_folder, "*.crdownload")):
-            time.sleep(0.8)
-            continue
-        done = []
-        for ext in ("*.xls", "*.xlsx", "*.csv"):
-            done.extend(glob.glob(os.path.join(downloads_folder, ext)))
-        if done:
-            return max(done, key=os.path.getctime)
-        time.sleep(0.8)
-    print(f"[DEBUG] 다운로드 폴더: {os.listdir(downloads_folder)}")
-    raise TimeoutError("다운로드 완료 대기 시간 초과")
+    return waits.wait_for_download(downloads_folder, timeout)
 
 
 def set_easyui_datebox(driver: webdriver.Chrome, element_id: str, value: str) -> None:
@@ -248,21 +252,23 @@ def set_easyui_datebox(driver: webdriver.Chrome, element_id: str, value: str) ->
 def apply_search_filters(driver: webdriver.Chrome) -> None:
     """결제일(B) 기준 + 시작/종료일 지정 후 검색. 결제여부는 전체(상태 필터는 안 함 —
     서버가 전체 행을 받아 발행/제외를 판단하므로 결제대기·취소까지 다 보낸다).
-    예치금 페이지엔 일부 컨트롤이 없을 수 있어 각각 try로 감싼다."""
+    예치금 페이지엔 일부 컨트롤이 없을 수 있어 각각 try로 감싼다.
+    (goto_with_auth 가 문서 파싱까지 기다리므로 컨트롤 유무는 기다리지 않고 바로 확인한다.)"""
     wait = WebDriverWait(driver, 20)
+    waits.until(driver, waits.datebox_ready("shBeginDay", "shEndDay"), "datebox_ready", timeout=10, required=False)
 
-    ins_date_el = None
     try:
-        ins_date_el = wait.until(EC.presence_of_element_located((By.ID, "shInsDate")))
+        ins_date_el = driver.find_element(By.ID, "shInsDate")
         Select(ins_date_el).select_by_value("B")
         print("[INFO] 검색조건: 결제일(B) 기준")
     except Exception as e:
-        print(f"[WARN] shInsDate 없음/설정 실패(예치금 페이지일 수 있음): {e}")
+        print(f"[WARN] shInsDate 없음/설정 실패(예치금 페이지일 수 있음): {type(e).__name__}")
 
+    end_date = datetime.now().strftime("%Y-%m-%d")
     try:
         set_easyui_datebox(driver, "shBeginDay", START_DATE)
-        set_easyui_datebox(driver, "shEndDay", END_DATE)
-        print(f"[INFO] 날짜 범위: {START_DATE} ~ {END_DATE}")
+        set_easyui_datebox(driver, "shEndDay", end_date)
+        print(f"[INFO] 날짜 범위: {START_DATE} ~ {end_date}")
     except Exception as e:
         print(f"[WARN] 날짜 설정 실패: {e}")
 
@@ -279,17 +285,11 @@ def apply_search_filters(driver: webdriver.Chrome) -> None:
         )
         search_btn.click()
         print("[INFO] 검색 버튼 클릭")
-        if ins_date_el is not None:
-            try:
-                WebDriverWait(driver, 20).until(EC.staleness_of(ins_date_el))
-            except TimeoutException:
-                time.sleep(2)
-        else:
-            time.sleep(2)
+        # 검색 = 폼 submit → 페이지 전체가 다시 그려짐. 버튼이 stale 이 되면 새 결과 페이지.
+        waits.until(driver, waits.reloaded(search_btn), "search_reload", timeout=20, required=False)
     except Exception as e:
-        print(f"[WARN] 검색 버튼 클릭 실패, 고정 대기: {e}")
-        time.sleep(2)
-    time.sleep(1)  # datebox 위젯 재초기화 대기
+        print(f"[WARN] 검색 버튼 클릭 실패: {e}")
+    waits.until(driver, waits.datebox_ready("shBeginDay", "shEndDay"), "datebox_ready", timeout=10, required=False)
 
 
 def click_export(driver: webdriver.Chrome, fn_arg: str) -> None:
@@ -312,41 +312,83 @@ def download_file(driver: webdriver.Chrome, page_url: str, fn_arg: str, label: s
     """페이지 이동 → 검색 필터 → 엑셀 다운로드 → 받은 파일 경로 반환."""
     print(f"\n===== [{label}] 다운로드 시작 =====")
     clear_downloads()
-    goto_with_auth(driver, page_url)
-    apply_search_filters(driver)
-    click_export(driver, fn_arg)
-    path = wait_for_download_complete(timeout=300)
-    size = os.path.getsize(path)
+    with instrument.span("navigate", label=label):
+        goto_with_auth(driver, page_url)
+        apply_search_filters(driver)
+    with instrument.span("download", label=label) as sp:
+        click_export(driver, fn_arg)
+        t0 = time.time()
+        path = wait_for_download_complete(timeout=300)
+        size = os.path.getsize(path)
+        sp.add(bytes=size)
     print(f"[INFO] [{label}] 다운로드 완료: {os.path.basename(path)} ({size/1e6:.2f} MB)")
+    run_log.event("download", label=label, bytes=size, duration_s=round(time.time() - t0, 3))
     return path
 
 
-def post_to_finance(path: str, label: str) -> None:
-    """받은 .xls를 gzip+base64 로 재무 ERP에 POST. 파싱은 서버가 parsePayEnd로."""
-    with open(path, "rb") as f:
-        raw = f.read()
-    gz_b64 = base64.b64encode(gzip.compress(raw)).decode("ascii")
-    print(f"[INFO] [{label}] 전송: 원본 {len(raw)/1e6:.2f}MB → gzip {len(gz_b64)*3/4/1e6:.2f}MB(b64)")
+def post_body(url: str, body: bytes, label: str, stage: str = "finance_post", **fields):
+    """JSON 본문(bytes)을 재무 ERP에 POST 하고 응답 JSON 반환. 200 이 아니면 RuntimeError."""
     auth = (FIN_USER, FIN_PASS) if FIN_USER else None
-    resp = requests.post(
-        f"{FIN_URL}?k={FIN_KEY}",
-        json={"file_gz_b64": gz_b64, "filename": os.path.basename(path)},
-        auth=auth,
-        timeout=120,
-    )
-    if resp.status_code == 200:
-        print(f"✅ [{label}] 재무 ERP 전송 완료: {resp.json()}")
-    else:
+    t0 = time.time()
+    with instrument.span(stage, label=label, **fields) as sp:
+        resp = requests.post(
+            f"{url}?k={FIN_KEY}",
+            data=body,
+            headers={"Content-Type": "application/json"},
+            auth=auth,
+            timeout=120,
+        )
+        sp.add(bytes=len(body), http_status=resp.status_code)
+    run_log.http_event(stage, resp, t0, label=label, **fields)
+    if resp.status_code != 200:
         print(f"❌ [{label}] 재무 ERP 전송 실패: {resp.status_code} {resp.text[:300]}")
         raise RuntimeError(f"[{label}] 전송 실패 {resp.status_code}")
+    return resp.json()
+
+
+def post_file(raw: bytes, filename: str, label: str) -> int:
+    """파일 내용을 gzip+base64 로 파일 엔드포인트(FIN_URL)에 POST. 보낸 바이트 수 반환."""
+    if not FIN_URL:
+        raise RuntimeError("FINANCE_PAYMENT_URL 환경변수가 필요합니다")
+    gz_b64 = base64.b64encode(gzip.compress(raw)).decode("ascii")
+    print(f"[INFO] [{label}] 전송: 원본 {len(raw)/1e6:.2f}MB → gzip {len(gz_b64)*3/4/1e6:.2f}MB(b64)")
+    body = json.dumps({"file_gz_b64": gz_b64, "filename": filename}).encode("utf-8")
+    result = post_body(FIN_URL, body, label, raw_bytes=len(raw))
+    print(f"✅ [{label}] 재무 ERP 전송 완료: {result}")
+    return len(body)
+
+
+def post_to_finance(path: str, label: str) -> None:
+    """받은 .xls를 재무 ERP에 POST. 파싱은 서버가 parsePayEnd로.
+    PAY_DELTA=1 이면 payment_delta 가 직전 전송 대비 바뀐 행만 보내고, 증분이 안 되는 경우에만 전체 파일."""
+    if DELTA_ENABLED:
+        import payment_delta
+
+        if payment_delta.send(path, label):
+            return
+    with open(path, "rb") as f:
+        raw = f.read()
+    post_file(raw, os.path.basename(path), label)
+    if DELTA_ENABLED:
+        payment_delta.mark_full(path, label)
 
 
 # ===== Main =====
 def main() -> None:
-    driver = make_driver(headless=True)
+    # ===== 로그를 파일로도 남김 (+ 구조화 기록 log_payment.jsonl) =====
+    run_log.install("log_payment.txt")
+    missing = [k for k, v in (("LOGIN_ID", LOGIN_ID), ("LOGIN_PW", LOGIN_PW), ("FINANCE_PAYMENT_URL", FIN_URL)) if not v]
+    if missing:
+        print(f"❌ 필수 환경변수 없음: {missing}")
+        sys.exit(1)
+    Path(downloads_folder).mkdir(parents=True, exist_ok=True)
+
+    with instrument.span("browser_start"):
+        driver = make_driver(headless=True)
     results = []
     try:
-        do_login(driver)
+        with instrument.span("login"):
+            do_login(driver)
         for page_url, fn_arg, label in (
             (PAYMENT_URL, "Pmt", "결제내역"),
             (DEPOSIT_URL, "DpstDet", "예치금"),
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+# =====================================================================
+# data/manual 엑셀다운로드 CSV 일괄 적재 (이력 복구/초기 적재용)
+#
+#   python backfill_manual.py [data/manual ...] [--table goods_csv_history] [--workers 4]
+#                             [--append] [--parquet out.parquet] [--dry-run]
+#
+#   1) 폴더(또는 파일 목록)의 CSV 를 프로세스 풀에서 파일별로 파싱
+#      → auto_download_headless_log.py 와 같은 정제·파생 컬럼(goods_transform.prepare_frame)
+#        + BigQuery 컬럼명(sanitize_columns) + _source_file / _source_ts
+#   2) 파일 시각 순으로 이어 붙이고 아이템번호 기준 중복 제거: 가장 늦은 파일의 마지막 행이 이긴다
+#      (파일 시각 = 파일명 '엑셀다운로드_YYYY-MM-DD [오전|오후] H_MM_SS', 없으면 수정 시각)
+#   3) Parquet 파일 하나로 만들어 BigQuery 에 load job 1번 (기본 WRITE_TRUNCATE)
+#
+#   ⚠️ 기본 대상은 BQ_DATASET.goods_csv_history (운영 goods_csv 가 아님).
+#      운영 테이블을 덮어써야 할 때만 --table goods_csv 로 명시할 것.
+# =====================================================================
+
+import argparse
+import glob
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+import instrument
+import run_log
+from goods_transform import bq_table, prepare_frame, read_export_csv, sanitize_columns
+
+PROJECT_ID = os.getenv("GCP_PROJECT")
+DATASET_ID = os.getenv("BQ_DATASET") or "raw_data"
+BACKFILL_TABLE = os.getenv("BACKFILL_TABLE") or "goods_csv_history"
+MANUAL_DIR = "data/manual"
+KEY_COLUMN = sanitize_columns(["아이템번호"])[0]
+
+# 엑셀다운로드_2025-09-25 오전 8_51_53.csv / 엑셀다운로드_2025-09-25 20_51_53.csv
+_FILENAME_TS = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})[ _]+(?:(오전|오후|AM|PM)\s*)?(\d{1,2})_(\d{2})_(\d{2})", re.I
+)
+
+
+def export_timestamp(path: str) -> datetime:
+    """파일명에 찍힌 다운로드 시각. 형식이 다르면 파일 수정 시각."""
+    m = _FILENAME_TS.search(os.path.basename(path))
+    if m:
+        y, mo, d, ampm, h, mi, s = m.groups()
+        hour = int(h)
+        if ampm and ampm.upper() in ("오후", "PM") and hour < 12:
+            hour += 12
+        elif ampm and ampm.upper() in ("오전", "AM") and hour == 12:
+            hour = 0
+        try:
+            return datetime(int(y), int(mo), int(d), hour, int(mi), int(s))
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(os.path.getmtime(path))
+
+
+def find_exports(paths: list[str]) -> list[tuple[datetime, str]]:
+    """폴더는 *.csv 전부, 파일은 그대로. (시각, 경로) 를 오래된 순으로."""
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            files += glob.glob(os.path.join(p, "*.csv"))
+        elif os.path.isfile(p):
+            files.append(p)
+        else:
+            print(f"⚠️ 경로 없음 → 건너뜀: {p}")
+    return sorted((export_timestamp(f), f) for f in dict.fromkeys(files))
+
+
+def parse_export(path: str, ts: datetime) -> pa.Table:
+    """(워커 프로세스) CSV 1개 → BigQuery 컬럼명 Arrow 테이블 + 출처 컬럼."""
+    table = bq_table(prepare_frame(read_export_csv(path)))
+    # category(dictionary) 는 파일마다 사전이 달라 합칠 때 충돌 → 일반 문자열로
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+    n = table.num_rows
+    table = table.append_column("_source_file", pa.array([os.path.basename(path)] * n, pa.string()))
+    return table.append_column("_source_ts", pa.array(np.full(n, np.datetime64(ts, "s"))))
+
+
+def dedupe_latest(table: pa.Table, key: str = KEY_COLUMN) -> tuple[pa.Table, int]:
+    """key 가 같은 행은 마지막(= 가장 늦은 파일의 마지막) 행만 남긴다. 원래 순서 유지.
+    반환: (결과, 키 없는 행 수)."""
+    seq = pa.array(np.arange(table.num_rows))
+    keys = pc.utf8_trim_whitespace(table.column(key).cast(pa.string()))
+    work = pa.table({"_key": keys, "_seq": seq}).filter(pc.and_(pc.is_valid(keys), pc.not_equal(keys, "")))
+    missing = table.num_rows - work.num_rows
+    last = work.group_by("_key").aggregate([("_seq", "max")]).column("_seq_max")
+    return table.take(np.sort(last.to_numpy())), missing
+
+
+def load_to_bigquery(table: pa.Table, table_id: str, append: bool = False) -> int:
+    """Parquet 임시 파일 하나로 load job 1번. 올린 바이트 수 반환."""
+    from google.cloud import bigquery
+
+    client = bigquery.Client(project=PROJECT_ID)
+    with tempfile.TemporaryFile() as f:
+        pq.write_table(table, f, compression="snappy")
+        size = f.tell()
+        f.seek(0)
+        job = client.load_table_from_file(
+            f,
+            table_id,
+            location="asia-northeast3",
+            job_config=bigquery.LoadJobConfig(
+                source_format=bigquery.SourceFormat.PARQUET,
+                write_disposition="WRITE_APPEND" if append else "WRITE_TRUNCATE",
+            ),
+        )
+        job.result()
+    return size
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="data/manual 엑셀다운로드 CSV → BigQuery 일괄 적재")
+    ap.add_argument("paths", nargs="*", default=[MANUAL_DIR], help=f"CSV 파일 또는 폴더 (기본: {MANUAL_DIR})")
+    ap.add_argument("--table", default=BACKFILL_TABLE, help="대상 테이블 (table / dataset.table / project.dataset.table)")
+    ap.add_argument("--workers", type=int, default=min(os.cpu_count() or 1, 8))
+    ap.add_argument("--append", action="store_true", help="WRITE_APPEND (기본은 WRITE_TRUNCATE)")
+    ap.add_argument("--parquet", help="합친 결과를 이 경로에 Parquet 으로도 저장")
+    ap.add_argument("--dry-run", action="store_true", help="BigQuery 적재 없이 파싱·중복 제거까지만")
+    args = ap.parse_args(argv)
+
+    run_log.install("backfill.log")
+    exports = find_exports(args.paths)
+    if not exports:
+        raise SystemExit("❌ 적재할 CSV 가 없습니다")
+    print(f"[INFO] 대상 파일 {len(exports)}개 ({exports[0][0]:%Y-%m-%d %H:%M} ~ {exports[-1][0]:%Y-%m-%d %H:%M})")
+
+    t0 = time.time()
+    with instrument.span("parse", files=len(exports)) as sp:
+        # spawn: 부모가 pyarrow 스레드를 띄운 뒤 fork 하면 멈출 수 있어 새 인터프리터로 시작
+        with ProcessPoolExecutor(max_workers=max(1, args.workers), mp_context=get_context("spawn")) as pool:
+            futures = [pool.submit(parse_export, path, ts) for ts, path in exports]
+            tables = []
+            for (ts, path), fut in zip(exports, futures):
+                table = fut.result()
+                print(f"  📄 {os.path.basename(path)} ({ts:%Y-%m-%d %H:%M:%S}): {table.num_rows:,}행")
+                tables.append(table)
+        combined = pa.concat_tables(tables, promote_options="default")   # 파일마다 컬럼이 달라도 null 로 채워 합침
+        del tables
+        sp.add(rows=combined.num_rows, bytes=combined.nbytes)
+
+    with instrument.span("dedupe", rows=combined.num_rows) as sp:
+        result, missing = dedupe_latest(combined)
+        dropped = combined.num_rows - result.num_rows - missing
+        sp.add(kept=result.num_rows, duplicates=dropped, missing_key=missing)
+    del combined
+    print(f"🧹 중복 제거: {result.num_rows:,}행 남김 (이전 파일/행에 덮인 {dropped:,}행, 아이템번호 없는 {missing:,}행 제외)")
+    run_log.event("backfill_parse", files=len(exports), rows=result.num_rows, duplicates=dropped,
+                  missing_key=missing, duration_s=round(time.time() - t0, 3))
+
+    if args.parquet:
+        Path(args.parquet).parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(result, args.parquet, compression="zstd")
+        print(f"💾 Parquet 저장: {args.parquet}")
+    if args.dry_run:
+        print("✅ dry-run: BigQuery 적재 생략")
+        return
+
+    if not PROJECT_ID:
+        raise SystemExit("❌ GCP_PROJECT 환경변수가 필요합니다")
+    parts = args.table.split(".")
+    table_id = ".".join([PROJECT_ID, DATASET_ID][: 3 - len(parts)] + parts)
+    with instrument.span("bigquery_load", rows=result.num_rows) as sp:
+        t1 = time.time()
+        size = load_to_bigquery(result, table_id, append=args.append)
+        sp.add(bytes=size)
+    mode = "WRITE_APPEND" if args.append else "WRITE_TRUNCATE"
+    print(f"✅ BigQuery 적재 완료: {result.num_rows:,}행 → {table_id} ({mode}, {size / 1e6:.1f} MB)")
+    run_log.event("bigquery_load", rows=result.num_rows, table=table_id, bytes=size,
+                  duration_s=round(time.time() - t1, 3))
+
+
+if __name__ == "__main__":
+    main()
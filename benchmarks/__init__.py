@@ -0,0 +1,13 @@
+# =====================================================================
+# 오프라인 벤치마크 (로그인 정보·외부 서버 없이 goods 파이프라인 단계별 처리량 측정)
+#
+#   python -m benchmarks.run                      # 10k / 100k / 1M 행
+#   python -m benchmarks.run --sizes 10k --latency 0.2
+#
+#   fixtures.py      : data/manual 샘플 스키마로 Acting_S.asp 엑셀(CSV) 다운로드 파일을 크기별 생성
+#   stubs.py         : silkroad21(Login.asp / Acting_S.asp / export) + 패킹·재무·KDocs 수신 대역 서버
+#                      (받은 바이트·지연 기록). 단독 실행: python -m benchmarks.stubs --rows 100k
+#   fake_bigquery.py : bigquery.Client 대역(load_table_from_dataframe / load_table_from_file)
+#   run.py           : fetch → parse → derive → payload → serialize → upload 단계별 시간·처리량
+#   startup.py       : 스크립트·단계별 콜드 스타트 import 시간 (python -X importtime)
+# =====================================================================
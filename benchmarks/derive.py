@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+# =====================================================================
+# 파생 컬럼 단계 타이밍
+#
+#   python -m benchmarks.derive [--sizes 10k,100k,1m] [--repeat 5] [--out bench_derive.json]
+#
+#   크기마다 빈 행·중복 제거까지 끝낸 프레임을 한 번 만들어 두고, 매 반복마다 새 복사본으로
+#     numeric : 규칙이 읽는 숫자 컬럼 파싱 (numeric 캐시가 비어 있을 때 비용)
+#     <규칙>  : DERIVED_RULES 각 규칙 (숫자 컬럼은 이미 캐시된 상태)
+#     total   : apply_derived_columns 전체 (캐시 없이 처음부터)
+#   를 재고 최소값을 남긴다. 규칙을 추가했을 때 어느 규칙이 느린지 바로 보이게 하려는 용도.
+# =====================================================================
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.fixtures import DEFAULT_DATA_DIR, ensure_export, parse_size
+from goods_transform import DERIVED_RULES, apply_derived_columns, numeric, read_export_table, table_to_frame
+
+# 규칙이 numeric() 으로 읽는 원본 컬럼
+NUMERIC_SOURCES = ("수량", "단가", "환율")
+
+
+def base_frame(rows: int, data_dir: Path, seed: int) -> pd.DataFrame:
+    df = table_to_frame(read_export_table(str(ensure_export(rows, data_dir, seed))))
+    return df.dropna(how="all").drop_duplicates()
+
+
+def time_once(base: pd.DataFrame) -> dict[str, float]:
+    timings = {}
+
+    df = base.copy()
+    t0 = time.perf_counter()
+    for col in NUMERIC_SOURCES:
+        if col in df.columns:
+            numeric(df, col)
+    timings["numeric"] = time.perf_counter() - t0
+
+    for target, needs, compute in DERIVED_RULES:
+        if all(c in df.columns for c in needs):
+            t0 = time.perf_counter()
+            df[target] = compute(df)
+            timings[target] = time.perf_counter() - t0
+
+    df = base.copy()
+    t0 = time.perf_counter()
+    apply_derived_columns(df)
+    timings["total"] = time.perf_counter() - t0
+    return timings
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="파생 컬럼 단계 타이밍")
+    ap.add_argument("--sizes", default="10k,100k,1m")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    ap.add_argument("--out", default="", help="결과 JSON 경로 (비우면 표만 출력)")
+    args = ap.parse_args(argv)
+
+    results = []
+    for rows in sorted(parse_size(s) for s in args.sizes.split(",") if s.strip()):
+        base = base_frame(rows, args.data_dir, args.seed)
+        best: dict[str, float] = {}
+        for _ in range(max(1, args.repeat)):
+            for name, sec in time_once(base).items():
+                best[name] = min(sec, best.get(name, sec))
+        print(f"\n===== {len(base):,}행 (최소 / {args.repeat}회) =====")
+        for name, sec in best.items():
+            print(f"  {name:<10}{sec * 1000:>10.2f} ms{len(base) / (sec or 1e-9):>16,.0f} 행/s")
+        results.append({"rows": len(base), "repeat": args.repeat, "best_s": best})
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"pandas": pd.__version__, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 결과 저장: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+# =====================================================================
+# bigquery.Client 대역
+#   파이프라인이 실제로 쓰는 load_table_from_dataframe / load_table_from_file 만 흉내 낸다.
+#   진짜 클라이언트처럼 DataFrame 을 Parquet 으로 직렬화(클라이언트 쪽 CPU 비용은 그대로 측정)하고,
+#   업로드는 bandwidth_mbps 가 있으면 그 속도로 걸리는 시간만큼 잠깐 쉰다.
+#   적재 결과는 tables[table_id] 에 pyarrow.Table 로 남는다(검증용).
+# =====================================================================
+
+import io
+import itertools
+import threading
+import time
+from dataclasses import dataclass, field
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+_job_ids = itertools.count(1)
+
+
+@dataclass
+class FakeLoadJob:
+    destination: str
+    output_rows: int
+    output_bytes: int
+    job_id: str = field(default_factory=lambda: f"bench_load_{next(_job_ids)}")
+    state: str = "DONE"
+
+    def result(self, timeout: float | None = None) -> "FakeLoadJob":
+        return self
+
+
+class FakeBigQueryClient:
+    def __init__(self, project: str = "bench-project", bandwidth_mbps: float | None = None):
+        self.project = project
+        self.bandwidth_mbps = bandwidth_mbps
+        self.tables: dict[str, pa.Table] = {}
+        self.jobs: list[FakeLoadJob] = []
+        self._lock = threading.Lock()
+
+    def _upload(self, destination: str, data: bytes) -> FakeLoadJob:
+        if self.bandwidth_mbps:
+            time.sleep(len(data) * 8 / (self.bandwidth_mbps * 1e6))
+        table = pq.read_table(io.BytesIO(data))
+        job = FakeLoadJob(destination=str(destination), output_rows=table.num_rows, output_bytes=len(data))
+        with self._lock:
+            self.tables[str(destination)] = table
+            self.jobs.append(job)
+        return job
+
+    def load_table_from_dataframe(self, dataframe, destination, location=None, job_config=None, **kwargs) -> FakeLoadJob:
+        buf = io.BytesIO()
+        pq.write_table(pa.Table.from_pandas(dataframe, preserve_index=False), buf)
+        return self._upload(destination, buf.getvalue())
+
+    def load_table_from_file(self, file_obj, destination, location=None, job_config=None, **kwargs) -> FakeLoadJob:
+        return self._upload(destination, file_obj.read())
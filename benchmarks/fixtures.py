@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+# =====================================================================
+# 벤치마크용 다운로드 파일 생성
+#   data/manual 의 실제 엑셀다운로드 CSV(약 1,200행)를 스키마·값 분포 원본으로 삼아
+#   행을 무작위 복원추출해 원하는 크기로 늘린다. 아이템번호만 새로 매겨 중복 제거에 안 걸리게 하고,
+#   샘플 이후 export 에 추가된 컬럼(담당자1·담당자2·실사주소)은 그럴듯한 값으로 채운다.
+#   같은 (행 수, seed) 면 같은 파일 → data_dir 에 캐시해 두고 재사용.
+# =====================================================================
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from goods_transform import 담당팀_매핑
+
+SAMPLE_DIR = Path(__file__).resolve().parent.parent / "data" / "manual"
+DEFAULT_DATA_DIR = Path(__file__).resolve().parent / "data"
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def parse_size(text: str) -> int:
+    """'10k' / '1m' / '25000' → 행 수."""
+    key = text.strip().lower()
+    if key in SIZES:
+        return SIZES[key]
+    if key.endswith("k"):
+        return int(float(key[:-1]) * 1_000)
+    if key.endswith("m"):
+        return int(float(key[:-1]) * 1_000_000)
+    return int(key)
+
+
+def load_sample() -> pd.DataFrame:
+    files = sorted(SAMPLE_DIR.glob("*.csv"))
+    if not files:
+        raise FileNotFoundError(f"샘플 CSV 없음: {SAMPLE_DIR}")
+    return pd.read_csv(files[-1], encoding="utf-8-sig", dtype=str)
+
+
+def generate_export(rows: int, out_path: Path, seed: int = 0) -> Path:
+    """샘플 스키마로 rows 행짜리 다운로드 CSV(utf-8-sig)를 만든다."""
+    rng = np.random.default_rng(seed)
+    sample = load_sample()
+    df = sample.iloc[rng.integers(0, len(sample), rows)].reset_index(drop=True)
+
+    item_no = pd.Series(np.arange(600_000, 600_000 + rows)).astype(str)
+    df["아이템번호"] = item_no.to_numpy()
+
+    # 담당자: 매핑된 직원 대부분 + 미배정(빈 값) + 매핑 없는 이름 약간
+    staff = np.array(list(담당팀_매핑) + ["", "", "신규직원"], dtype=object)
+    df["담당자1"] = staff[rng.integers(0, len(staff), rows)]
+    df["담당자2"] = staff[rng.integers(0, len(staff), rows)]
+    has_photo = rng.random(rows) < 0.3
+    df["실사주소"] = np.where(has_photo, "https://img.example.invalid/inspect/" + item_no + ".jpg", "")
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_suffix(".tmp")
+    df.to_csv(tmp, index=False, encoding="utf-8-sig")
+    tmp.replace(out_path)
+    return out_path
+
+
+def ensure_export(rows: int, data_dir: Path = DEFAULT_DATA_DIR, seed: int = 0) -> Path:
+    """캐시에 있으면 그대로, 없으면 생성."""
+    path = Path(data_dir) / f"goods_{rows}_s{seed}.csv"
+    if not path.exists():
+        print(f"[INFO] 벤치마크 파일 생성: {rows:,}행 → {path}")
+        generate_export(rows, path, seed)
+    return path
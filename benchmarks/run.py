@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+# =====================================================================
+# goods 파이프라인 단계별 벤치마크
+#
+#   python -m benchmarks.run [--sizes 10k,100k,1m] [--latency 0.0] [--bandwidth 0] [--out bench_results.json]
+#
+#   크기마다:
+#     fetch     : 대역 서버 export.asp 에서 CSV 스트리밍 다운로드 (크롬 없이 HTTP 만)
+#     parse     : goods_transform.read_export_table (pyarrow.csv) → table_to_frame
+#     derive    : goods_transform.prepare_frame (정제 + 파생 컬럼)
+#     payload   : packing / finance / rawdata 본문 컬럼(Arrow) + kdocs 행 목록 만들기
+#     serialize : Arrow → JSON(json_body), kdocs 는 send_to_kdocs 처럼 json.dumps, BigQuery 는 Parquet
+#     upload    : FakeBigQueryClient.load_table_from_file + 대역 서버로 POST
+#   각 단계는 instrument.span 으로 재고(벽시계·CPU·최대 RSS), 끝에 표와 JSON 으로 남긴다.
+#   최대 RSS 는 프로세스 high-water mark 라 작은 크기부터 돈다.
+# =====================================================================
+
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+import requests
+
+import instrument
+from benchmarks.fake_bigquery import FakeBigQueryClient
+from benchmarks.fixtures import DEFAULT_DATA_DIR, ensure_export, parse_size
+from benchmarks.stubs import StubServer
+from goods_transform import (
+    bq_table,
+    finance_table,
+    json_body,
+    packing_table,
+    prepare_frame,
+    rawdata_table,
+    read_export_table,
+    source_columns,
+    table_to_frame,
+)
+
+BQ_TABLE = "bench-project.raw_data.goods_csv"
+KDOCS_PATH = "/api/v3/ide/file/bench/script/bench/sync_task"
+
+
+def build_payloads(df: pd.DataFrame, stage) -> dict[str, tuple[str, object, int]]:
+    """전송 본문 재료 {이름: (최상위 키, Arrow 테이블 또는 dict, 행 수)}. 컬럼이 없어 건너뛰는 본문은 빠진다."""
+    payloads = {}
+    for name, key, build in (("packing", "items", packing_table),
+                             ("finance", "items", finance_table),
+                             ("rawdata", "rows", rawdata_table)):
+        with stage(name) as sp:
+            table = build(df)
+            if table is not None:
+                payloads[name] = (key, table, table.num_rows)
+                sp.add(rows=table.num_rows)
+    with stage("kdocs") as sp:
+        # send_to_kdocs.py 는 csv.reader 로 읽은 헤더 포함 전체 행을 그대로 보낸다
+        raw = df[source_columns(df)]
+        values = [list(raw.columns)] + raw.astype(object).fillna("").to_numpy().tolist()
+        payloads["kdocs"] = ("", {"Context": {"argv": {"rows": values}}}, len(values))
+        sp.add(rows=len(values))
+    return payloads
+
+
+def bench_size(rows: int, stub: StubServer, bq: FakeBigQueryClient, args, workdir: Path) -> None:
+    export = ensure_export(rows, args.data_dir, args.seed)
+    stub.set_export(export)
+    print(f"\n===== {rows:,}행 ({export.stat().st_size/1e6:.1f} MB) =====")
+
+    def stage(name: str, **fields):
+        return instrument.span(name, size=rows, **fields)
+
+    download = workdir / f"download_{rows}.csv"
+    with stage("fetch") as sp:
+        with requests.get(f"{stub.url}/Admin/Acting/export.asp?k=X19", stream=True, timeout=600) as r:
+            r.raise_for_status()
+            with open(download, "wb") as f:
+                for chunk in r.iter_content(chunk_size=1 << 20):
+                    f.write(chunk)
+        sp.add(bytes=download.stat().st_size)
+
+    with stage("parse", bytes=download.stat().st_size) as sp:
+        df = table_to_frame(read_export_table(str(download)))
+        sp.add(rows=len(df))
+
+    with stage("derive") as sp:
+        df = prepare_frame(df)
+        sp.add(rows=len(df), mem_mb=round(df.memory_usage(deep=True).sum() / 1e6, 1))
+
+    with stage("payload"):
+        payloads = build_payloads(df, stage)
+
+    bodies = {}
+    with stage("serialize"):
+        for name, (key, payload, n) in payloads.items():
+            with stage(name, rows=n) as sp:
+                if key:
+                    body = json_body(key, payload)
+                else:
+                    body = json.dumps(payload, allow_nan=False).encode("utf-8")
+                bodies[name] = (body, n)
+                sp.add(bytes=len(body))
+        with stage("bigquery", rows=len(df)) as sp:
+            parquet = io.BytesIO()
+            pq.write_table(bq_table(df), parquet, compression="snappy")
+            sp.add(bytes=parquet.tell())
+    payloads.clear()
+
+    with stage("upload"):
+        with stage("bigquery", rows=len(df)) as sp:
+            parquet.seek(0)
+            job = bq.load_table_from_file(parquet, BQ_TABLE, location="asia-northeast3")
+            job.result()
+            sp.add(bytes=job.output_bytes)
+        with requests.Session() as session:
+            for name, (body, n) in bodies.items():
+                url = stub.url + (KDOCS_PATH if name == "kdocs" else f"/ingest/{name}")
+                with stage(name, rows=n, bytes=len(body)) as sp:
+                    resp = session.post(url, data=body, headers={"Content-Type": "application/json"}, timeout=600)
+                    resp.raise_for_status()
+                    sp.add(http_status=resp.status_code)
+
+    del df, bodies, parquet
+    download.unlink(missing_ok=True)
+    gc.collect()
+
+
+def print_table(spans: list[dict]) -> None:
+    print(f"\n{'단계':<22}{'행 수':>12}{'wall(s)':>10}{'cpu(s)':>10}{'행/s':>14}{'MB/s':>10}{'RSS(MB)':>10}")
+    for s in spans:
+        wall = s["wall_s"] or 1e-9
+        rows = s.get("rows") or 0
+        mb = (s.get("bytes") or 0) / 1e6
+        rate = f"{rows / wall:,.0f}" if rows else "-"
+        mbps = f"{mb / wall:,.1f}" if mb else "-"
+        print(f"{s['path']:<22}{s['size']:>12,}{s['wall_s']:>10.3f}{s['cpu_s']:>10.3f}"
+              f"{rate:>14}{mbps:>10}{s['peak_rss_mb'] or 0:>10.0f}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="goods 파이프라인 오프라인 벤치마크")
+    ap.add_argument("--sizes", default="10k,100k,1m", help="쉼표 구분 행 수 (10k / 100k / 1m / 숫자)")
+    ap.add_argument("--latency", type=float, default=0.0, help="수신 엔드포인트 응답 지연(초)")
+    ap.add_argument("--bandwidth", type=float, default=0.0, help="BigQuery 대역 업로드 속도(Mbps, 0=즉시)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR, help="생성한 CSV 캐시 위치")
+    ap.add_argument("--out", default="bench_results.json")
+    args = ap.parse_args(argv)
+
+    sizes = sorted(parse_size(s) for s in args.sizes.split(",") if s.strip())
+    bq = FakeBigQueryClient(bandwidth_mbps=args.bandwidth or None)
+    started = time.time()
+    with tempfile.TemporaryDirectory(prefix="bench_") as tmp, StubServer(latency_s=args.latency) as stub:
+        for rows in sizes:
+            bench_size(rows, stub, bq, args, Path(tmp))
+        calls = stub.calls
+
+    spans = [s for s in instrument.summary()["spans"] if "size" in s]
+    print_table(spans)
+    result = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "sizes": sizes,
+        "stub_latency_s": args.latency,
+        "bq_bandwidth_mbps": args.bandwidth,
+        "total_wall_s": round(time.time() - started, 3),
+        "spans": spans,
+        "stub_calls": [c.__dict__ for c in calls],
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2, default=str)
+    print(f"\n✅ 결과 저장: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
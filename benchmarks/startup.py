@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+# =====================================================================
+# 콜드 스타트 import 시간
+#
+#   python -m benchmarks.startup [--repeat 5] [--top 5] [--only goods,payment] [--out bench_startup.json]
+#
+#   워크플로우 실행은 매번 새 프로세스라 import 비용을 매번 낸다. 대상마다 새 인터프리터로
+#     python -X importtime -c "import <대상>"
+#   을 repeat 번 돌려 최소값을 남긴다.
+#     total   : 대상 import 누적 시간 (-X importtime 의 cumulative)
+#     process : 인터프리터 시작부터 종료까지 벽시계 (빈 인터프리터 시간 포함)
+#     무거운 패키지 : 대상이 끌어온 최상위 패키지별 누적 시간 (pandas · pyarrow · google · selenium ...)
+#                     서로 포함될 수 있다(pandas 안에 numpy 등)
+#   goods 모듈 자체와 단계별 의존성(파싱·BigQuery·Sheets·브라우저)을 따로 재서
+#   어느 단계가 시작을 무겁게 하는지 본다. 설치 안 된 패키지는 "미설치" 로 표시.
+# =====================================================================
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# (이름, import 문) — 스크립트 진입점과 단계별 의존성
+TARGETS = (
+    ("interpreter", "pass"),
+    ("goods", "import auto_download_headless_log"),
+    ("goods:parse/derive", "import goods_transform"),
+    ("goods:bigquery", "from google.cloud import bigquery"),
+    ("goods:sheets", "import gspread, google.auth"),
+    ("goods:browser", "import selenium.webdriver, waits"),
+    ("goods:http", "import requests"),
+    ("payment", "import auto_download_payment"),
+    ("clobe", "import auto_download_clobe"),
+    ("exchange_rate", "import exchange_rate"),
+    ("bq_export", "import bq_export"),
+)
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(stmt: str) -> dict:
+    """새 인터프리터 1회. {"total_ms", "process_ms", "packages": {최상위 패키지: 누적 ms}} 또는 {"error"}."""
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", stmt],
+        cwd=ROOT, capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    process_ms = (time.perf_counter() - t0) * 1000
+    if proc.returncode != 0:
+        last = (proc.stderr.strip().splitlines() or [""])[-1]
+        return {"error": last[:200]}
+
+    total_us = 0
+    packages: dict[str, float] = {}
+    startup = True
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        cumulative, indent, name = int(m.group(2)), len(m.group(3)), m.group(4)
+        if startup and name == "site":
+            startup = False          # 여기까지는 인터프리터 자체 시작(encodings · site)
+            continue
+        if startup:
+            continue
+        if indent == 1:
+            total_us += cumulative
+        elif "." not in name:
+            # 깊이와 상관없이 패키지 최상위 모듈(처음 import 될 때 1줄) = 그 패키지 누적 시간
+            packages[name] = cumulative / 1000
+    return {"total_ms": total_us / 1000, "process_ms": process_ms, "packages": packages}
+
+
+def best_of(stmt: str, repeat: int) -> dict:
+    runs = [measure(stmt) for _ in range(max(1, repeat))]
+    ok = [r for r in runs if "error" not in r]
+    if not ok:
+        return runs[0]
+    best = min(ok, key=lambda r: r["total_ms"])
+    return {**best, "process_ms": min(r["process_ms"] for r in ok)}
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="콜드 스타트 import 시간")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--top", type=int, default=5, help="대상마다 보여 줄 무거운 패키지 수")
+    ap.add_argument("--only", default="", help="쉼표 구분 대상 이름만 (기본: 전부)")
+    ap.add_argument("--out", default="", help="결과 JSON 경로 (비우면 표만 출력)")
+    args = ap.parse_args(argv)
+
+    only = {s.strip() for s in args.only.split(",") if s.strip()}
+    results = []
+    print(f"{'대상':<22}{'total(ms)':>11}{'process(ms)':>13}  무거운 패키지 (ms, 최소 / {args.repeat}회)")
+    for name, stmt in TARGETS:
+        if only and name not in only:
+            continue
+        r = best_of(stmt, args.repeat)
+        results.append({"name": name, "stmt": stmt, **r})
+        if "error" in r:
+            missing = "ModuleNotFoundError" in r["error"]
+            print(f"{name:<22}{'-':>11}{'-':>13}  {'미설치: ' if missing else '실패: '}{r['error']}")
+            continue
+        heavy = sorted(r["packages"].items(), key=lambda kv: -kv[1])[: args.top]
+        print(f"{name:<22}{r['total_ms']:>11.1f}{r['process_ms']:>13.1f}  "
+              + ", ".join(f"{k} {v:.0f}" for k, v in heavy if v >= 1))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+                       "repeat": args.repeat, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 결과 저장: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
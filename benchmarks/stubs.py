@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+# =====================================================================
+# 로컬 대역 서버 (표준 라이브러리 http.server)
+#
+#   silkroad21
+#     GET  /pzadm/Login.asp                 로그인 폼(sMemId / sMemPw)
+#     POST /pzadm/Login_ok.asp              세션 쿠키 발급 → /Admin/main.asp
+#     GET  /Admin/Acting/Acting_S.asp       목록 화면(fnPageExl('X19') 버튼). 쿠키 없으면 Login.asp 로
+#     GET  /Admin/Acting/export.asp         export_path 파일을 첨부파일로 스트리밍
+#     GET  /krw_rate.txt                    환율 텍스트
+#   수신 엔드포인트 (패킹·재무·raw data·KDocs)
+#     POST /ingest/<이름>                   {"ok": true}
+#     POST /api/v3/ide/file/<id>/script/<name>/sync_task   KDocs 성공 응답 형식
+#
+#   수신 요청마다 (엔드포인트, 바이트, 본문 수신 시간, 응답까지 시간) 를 calls 에 남긴다.
+#   latency_s 로 응답 지연을 흉내 낸다. 본문은 파싱하지 않는다(클라이언트 측 측정에 끼지 않게).
+#
+#   단독 실행(크롬으로 auto_download_headless_log.py 끝까지 돌려 볼 때):
+#     python -m benchmarks.stubs --rows 100k --port 8765
+#     SILKROAD_BASE_URL=http://127.0.0.1:8765 PACKING_INGEST_URL=http://127.0.0.1:8765/ingest/packing ...
+# =====================================================================
+
+import argparse
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+SESSION_COOKIE = "ASPSESSIONIDBENCH=ok"
+
+LOGIN_HTML = """<!doctype html><html><head><meta charset="utf-8"><title>Login</title></head><body>
+<form method="post" action="/pzadm/Login_ok.asp">
+<input type="text" name="sMemId"><input type="password" name="sMemPw">
+<button type="submit">로그인</button>
+</form></body></html>"""
+
+MAIN_HTML = """<!doctype html><html><head><meta charset="utf-8"></head><body>관리자 메인</body></html>"""
+
+LIST_HTML = """<!doctype html><html><head><meta charset="utf-8"><title>구매대행</title>
+<script>function fnPageExl(k){ location.href = '/Admin/Acting/export.asp?k=' + k; }</script>
+</head><body>
+<button type="button" onclick="fnPageExl('X19')">엑셀 다운로드</button>
+</body></html>"""
+
+KDOCS_OK = b'{"data": {"result": "Action Completed"}, "error": "", "status": "finished"}'
+
+
+@dataclass
+class Call:
+    endpoint: str
+    bytes: int
+    receive_s: float
+    total_s: float
+    status: int
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:  # 콘솔 조용히
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _redirect(self, location: str, headers: dict | None = None) -> None:
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+
+    def _logged_in(self) -> bool:
+        return SESSION_COOKIE in (self.headers.get("Cookie") or "")
+
+    def do_GET(self) -> None:
+        path = urlsplit(self.path).path
+        if path == "/pzadm/Login.asp":
+            self._send(200, LOGIN_HTML.encode("utf-8"), "text/html; charset=utf-8")
+        elif path == "/Admin/main.asp":
+            self._send(200, MAIN_HTML.encode("utf-8"), "text/html; charset=utf-8")
+        elif path == "/Admin/Acting/Acting_S.asp":
+            if not self._logged_in():
+                self._redirect("/pzadm/Login.asp")
+                return
+            self._send(200, LIST_HTML.encode("utf-8"), "text/html; charset=utf-8")
+        elif path == "/Admin/Acting/export.asp":
+            self._send_export()
+        elif path == "/krw_rate.txt":
+            self._send(200, self.server.krw_rate.encode("utf-8"), "text/plain; charset=utf-8")
+        else:
+            self._send(404, b"not found", "text/plain")
+
+    def _send_export(self) -> None:
+        export = self.server.export_path
+        if export is None or not export.exists():
+            self._send(404, b"no export", "text/plain")
+            return
+        size = export.stat().st_size
+        name = time.strftime("엑셀다운로드_%Y-%m-%d %H_%M_%S.csv")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(size))
+        self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(name)}")
+        self.end_headers()
+        with open(export, "rb") as f:
+            while chunk := f.read(1 << 20):
+                self.wfile.write(chunk)
+
+    def do_POST(self) -> None:
+        t0 = time.perf_counter()
+        path = urlsplit(self.path).path
+        length = int(self.headers.get("Content-Length") or 0)
+        remaining = length
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 1 << 20))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+        receive_s = time.perf_counter() - t0
+
+        if path == "/pzadm/Login_ok.asp":
+            self._redirect("/Admin/main.asp", {"Set-Cookie": f"{SESSION_COOKIE}; Path=/"})
+            return
+
+        if path.startswith("/ingest/"):
+            endpoint, body = path[len("/ingest/"):], b'{"ok": true}'
+        elif path.startswith("/api/v3/ide/file/") and path.endswith("/sync_task"):
+            endpoint, body = "kdocs", KDOCS_OK
+        else:
+            self._send(404, b"not found", "text/plain")
+            return
+
+        if self.server.latency_s:
+            time.sleep(self.server.latency_s)
+        self._send(200, body, "application/json")
+        with self.server.lock:
+            self.server.calls.append(Call(endpoint, length, receive_s, time.perf_counter() - t0, 200))
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, export_path: Path | None, latency_s: float, krw_rate: str):
+        super().__init__(address, _Handler)
+        self.export_path = export_path
+        self.latency_s = latency_s
+        self.krw_rate = krw_rate
+        self.calls: list[Call] = []
+        self.lock = threading.Lock()
+
+
+class StubServer:
+    """with StubServer(export_path) as stub: ... stub.url / stub.env() / stub.calls"""
+
+    def __init__(self, export_path: Path | None = None, latency_s: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0, krw_rate: str = "241"):
+        self._server = _Server((host, port), Path(export_path) if export_path else None, latency_s, krw_rate)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="bench-stub", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def calls(self) -> list[Call]:
+        with self._server.lock:
+            return list(self._server.calls)
+
+    def set_export(self, export_path: Path) -> None:
+        self._server.export_path = Path(export_path)
+
+    def set_latency(self, latency_s: float) -> None:
+        self._server.latency_s = latency_s
+
+    def env(self) -> dict[str, str]:
+        """auto_download_headless_log.py 를 이 서버로 돌릴 때 쓸 환경변수."""
+        return {
+            "SILKROAD_BASE_URL": self.url,
+            "PACKING_INGEST_URL": f"{self.url}/ingest/packing",
+            "FINANCE_INGEST_URL": f"{self.url}/ingest/finance",
+            "FINANCE_RAWDATA_URL": f"{self.url}/ingest/rawdata",
+            "PACKING_RATES_URL": f"{self.url}/ingest/rates",
+        }
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main(argv: list[str] | None = None) -> None:
+    from benchmarks.fixtures import DEFAULT_DATA_DIR, ensure_export, parse_size
+
+    ap = argparse.ArgumentParser(description="silkroad21·수신 서버 로컬 대역")
+    ap.add_argument("--rows", default="10k", help="export 행 수 (10k / 100k / 1m / 숫자)")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.0, help="수신 엔드포인트 응답 지연(초)")
+    ap.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    args = ap.parse_args(argv)
+
+    export = ensure_export(parse_size(args.rows), args.data_dir)
+    stub = StubServer(export, latency_s=args.latency, port=args.port).start()
+    print(f"[INFO] 대역 서버: {stub.url} (export: {export.name})")
+    for k, v in stub.env().items():
+        print(f"  {k}={v}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        calls = stub.calls
+        stub.stop()
+        for c in calls:
+            print(f"  {c.endpoint}: {c.bytes/1e6:.2f} MB, 수신 {c.receive_s:.3f}s, 응답 {c.total_s:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
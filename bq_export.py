@@ -0,0 +1,487 @@
+from __future__ import annotations
+
+# =====================================================================
+# BigQuery(BQ_SQL) 결과 → CSV / Parquet / XLSX 추출 (Storage Read API)
+#
+#   run.yml 의 `bq query --format=csv --max_rows=... | tee bq_export.csv` 를 대체한다.
+#   bq CLI는 결과를 REST로 한 줄씩(단일 스트림) 받아 CSV로 찍는다. 여기서는
+#     1) BQ_SQL 을 쿼리 잡으로 실행(결과는 임시 destination 테이블)
+#     2) 그 테이블을 Storage Read API로 Arrow record batch 단위, 여러 스트림 병렬로 읽고
+#     3) 같은 batch를 CSV·Parquet·XLSX 로 동시에 흘려 쓴다(결과 전체를 메모리에 안 올림).
+#   gcloud/bq 설치가 필요 없다(서비스계정 JSON = GOOGLE_APPLICATION_CREDENTIALS 만 있으면 됨).
+#
+#   ⚠️ ORDER BY 가 있는 쿼리는 순서를 지키려고 스트림 1개로 읽는다(병렬 스트림은 순서 보장 X).
+#
+#   로컬 평가(export_local): BQ_SQL 이 방금 적재한 goods_csv 한 테이블만 읽는 쿼리면,
+#   크롤링 스크립트가 적재 직후 같은 DataFrame 위에서 DuckDB로 바로 계산해 CSV/XLSX를 쓴다.
+#   추출 단계는 --reuse-local 로 그 결과를 그대로 쓰고(쿼리 잡·egress 없음),
+#   BQ_PARITY_EVERY 회에 한 번만 BigQuery로도 뽑아 결과를 대조한다.
+#   다르면 BigQuery 결과로 교체하고 실패(rc=1)로 끝내며, STATE_DIR/bq_local_disabled.json 을 남겨
+#   그 SQL로는 로컬 결과를 더 이상 재사용하지 않는다(SQL이 바뀌거나 --enable-local 로 지울 때까지).
+#
+#   사용: python bq_export.py --csv /tmp/export/bq_export.csv --xlsx /tmp/export/bq_export.xlsx
+#         (SQL은 env BQ_SQL 또는 --sql-file, 프로젝트는 env GCP_PROJECT 또는 --project)
+# =====================================================================
+
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from datetime import timezone
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+LOCATION = "asia-northeast3"
+DEFAULT_STREAMS = 4
+
+_ORDER_BY = re.compile(r"\border\s+by\b", re.I)
+
+# 로컬 평가 때 적재 테이블을 가리킬 이름 / 결과 옆에 남기는 표식 파일
+LOCAL_TABLE = "goods_csv"
+LOCAL_MARKER = ".local_export.json"
+# 대조 불일치 시 남기는 비활성 표식. /tmp/export 는 실행마다 새로 생기므로 실행 간 유지되는 STATE_DIR 에 둔다
+LOCAL_DISABLED = Path(os.getenv("STATE_DIR") or "state") / "bq_local_disabled.json"
+DEFAULT_PARITY_EVERY = 12   # 30분 주기 기준 약 6시간에 한 번 BigQuery와 대조
+
+
+# ===== 출력(싱크) =====
+def _bq_float(v: float) -> str:
+    """BigQuery(자바 Double.toString) 모양: 1.0 / 2.5 / 1.0E20 / NaN / Infinity."""
+    if math.isnan(v):
+        return "NaN"
+    if math.isinf(v):
+        return "Infinity" if v > 0 else "-Infinity"
+    text = repr(v)
+    if "e" in text:
+        mantissa, exp = text.split("e")
+        text = f"{mantissa if '.' in mantissa else mantissa + '.0'}E{int(exp)}"
+    return text
+
+
+def _bq_timestamp(v) -> str:
+    """bq CLI 모양: UTC 'YYYY-MM-DD HH:MM:SS', 마이크로초가 있을 때만 소수점."""
+    if v.tzinfo is not None:
+        v = v.astimezone(timezone.utc)
+    text = v.strftime("%Y-%m-%d %H:%M:%S")
+    return f"{text}.{v.microsecond:06d}" if v.microsecond else text
+
+
+def bq_text(col: pa.Array) -> list[str | None]:
+    """한 열을 bq CLI(--format=csv)가 찍던 문자열로. NULL 은 None.
+    pyarrow 기본 문자열 변환은 FLOAT64 1.0 → '1', TIMESTAMP → '...00.000000Z', NUMERIC → '1.500000000' 이라
+    KDocs·OneDrive 로 올라가는 셀 값이 예전(bq CLI)과 달라진다."""
+    t = col.type
+    values = col.to_pylist()
+    if pa.types.is_floating(t):
+        return [None if v is None else _bq_float(v) for v in values]
+    if pa.types.is_timestamp(t):
+        if t.tz is None:           # DATETIME
+            return [None if v is None else v.isoformat() for v in values]
+        return [None if v is None else _bq_timestamp(v) for v in values]
+    if pa.types.is_decimal(t):     # NUMERIC / BIGNUMERIC: 뒤쪽 0 없이
+        return [None if v is None else format(v.normalize(), "f") for v in values]
+    if pa.types.is_boolean(t):
+        return [None if v is None else ("true" if v else "false") for v in values]
+    if pa.types.is_string(t) or pa.types.is_large_string(t):
+        return values
+    return pc.cast(col, pa.string()).to_pylist()
+
+
+class CsvSink:
+    """bq CLI --format=csv 와 같은 모양: 헤더 1줄 + 구분자·따옴표·줄바꿈이 든 값만 따옴표, NULL은 빈칸.
+    값 모양(실수·타임스탬프·NUMERIC)은 bq_text 로 맞춘다."""
+
+    def __init__(self, path: str, schema: pa.Schema):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.file, lineterminator="\n")
+        self.writer.writerow(schema.names)
+
+    def write(self, batch: pa.RecordBatch) -> None:
+        self.writer.writerows(zip(*(bq_text(col) for col in batch.columns)))
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ParquetSink:
+    def __init__(self, path: str, schema: pa.Schema):
+        self.path = path
+        self.writer = pq.ParquetWriter(path, schema, compression="zstd")
+
+    def write(self, batch: pa.RecordBatch) -> None:
+        self.writer.write_batch(batch)
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class XlsxSink:
+    """csv_to_xlsx 와 같은 규칙(제어문자 제거, B·H~R 숫자 변환)으로 batch를 바로 XLSX에 쓴다."""
+
+    def __init__(self, path: str, schema: pa.Schema, numeric_cols: str | None = None):
+        from csv_to_xlsx import XlsxStreamWriter, DEFAULT_NUMERIC_COLS
+
+        self.path = path
+        self.writer = XlsxStreamWriter(path, numeric_cols=numeric_cols or DEFAULT_NUMERIC_COLS)
+        self.writer.write_header(schema.names)
+
+    def write(self, batch: pa.RecordBatch) -> None:
+        # CSV 경로와 같게: 모든 값을 bq CLI 문자열로 본 뒤 숫자 열만 다시 숫자로.
+        import pandas as pd
+
+        self.writer.write_chunk(pd.DataFrame({name: bq_text(col) for name, col in
+                                              zip(batch.schema.names, batch.columns)}, dtype=object))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+# ===== BigQuery =====
+def run_query(client, sql: str, location: str = LOCATION):
+    """쿼리 잡 실행 → 결과가 담긴 (임시) destination 테이블 참조 반환."""
+    from google.cloud import bigquery
+
+    job = client.query(sql, location=location, job_config=bigquery.QueryJobConfig(use_legacy_sql=False))
+    job.result()
+    print(f"[INFO] 쿼리 완료: job={job.job_id}, 처리 {(job.total_bytes_processed or 0)/1e6:.1f}MB")
+    return job.destination
+
+
+def iter_arrow_batches(project: str, table_ref, max_streams: int):
+    """Storage Read API 세션을 열고 (schema, batch 제너레이터)를 반환.
+    스트림마다 스레드 하나가 batch를 읽어 bounded queue에 넣고, 소비자는 도착 순서대로 받는다."""
+    from google.cloud import bigquery_storage
+    from google.cloud.bigquery_storage import types
+
+    read_client = bigquery_storage.BigQueryReadClient()
+    table_path = f"projects/{table_ref.project}/datasets/{table_ref.dataset_id}/tables/{table_ref.table_id}"
+    session = read_client.create_read_session(
+        parent=f"projects/{project}",
+        read_session=types.ReadSession(table=table_path, data_format=types.DataFormat.ARROW),
+        max_stream_count=max_streams,
+    )
+    schema = pa.ipc.read_schema(pa.py_buffer(session.arrow_schema.serialized_schema))
+    streams = list(session.streams)
+    print(f"[INFO] Storage Read 세션: 스트림 {len(streams)}개 (요청 {max_streams})")
+
+    def generate():
+        if not streams:
+            return
+        q: queue.Queue = queue.Queue(maxsize=max(4, 2 * len(streams)))
+        done = object()
+
+        def worker(stream_name: str) -> None:
+            try:
+                reader = read_client.read_rows(stream_name)
+                for page in reader.rows(session).pages:
+                    q.put(page.to_arrow())
+                q.put(done)
+            except BaseException as e:  # 소비자 쪽에서 다시 올린다
+                q.put(e)
+
+        threads = [threading.Thread(target=worker, args=(s.name,), daemon=True) for s in streams]
+        for t in threads:
+            t.start()
+        remaining = len(threads)
+        while remaining:
+            item = q.get()
+            if item is done:
+                remaining -= 1
+            elif isinstance(item, BaseException):
+                raise item
+            else:
+                yield item
+
+    return schema, generate()
+
+
+def export(
+    sql: str,
+    project: str,
+    csv_path: str | None = None,
+    parquet_path: str | None = None,
+    xlsx_path: str | None = None,
+    max_streams: int = DEFAULT_STREAMS,
+    location: str = LOCATION,
+) -> int:
+    """BQ_SQL 결과를 지정한 출력들로 한 번에 쓴다. 행 수를 반환."""
+    from google.cloud import bigquery
+
+    if not any((csv_path, parquet_path, xlsx_path)):
+        raise ValueError("출력 경로(--csv/--parquet/--xlsx)가 하나도 없습니다.")
+    if _ORDER_BY.search(sql):
+        print("[INFO] ORDER BY 감지 → 순서 보장을 위해 스트림 1개로 읽음")
+        max_streams = 1
+
+    t0 = time.time()
+    client = bigquery.Client(project=project)
+    table_ref = run_query(client, sql, location=location)
+    schema, batches = iter_arrow_batches(project, table_ref, max_streams)
+
+    rows = write_outputs(schema, batches, csv_path, parquet_path, xlsx_path)
+    print(f"✅ BigQuery 추출 완료: {rows:,}행, {time.time() - t0:.1f}s")
+    return rows
+
+
+def write_outputs(schema: pa.Schema, batches, csv_path=None, parquet_path=None, xlsx_path=None) -> int:
+    """batch 스트림을 지정한 출력들에 한 번에 쓴다. 행 수를 반환."""
+    sinks = []
+    for path, cls in ((csv_path, CsvSink), (parquet_path, ParquetSink), (xlsx_path, XlsxSink)):
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            sinks.append(cls(path, schema))
+
+    rows = 0
+    try:
+        for batch in batches:
+            for sink in sinks:
+                sink.write(batch)
+            rows += batch.num_rows
+    finally:
+        for sink in sinks:
+            sink.close()
+    print(f"[INFO] 출력 {rows:,}행 → {', '.join(s.path for s in sinks)}")
+    return rows
+
+
+# ===== 로컬 평가(DuckDB) + BigQuery 대조 =====
+def sql_fingerprint(sql: str) -> str:
+    return hashlib.sha256(sql.strip().encode("utf-8")).hexdigest()[:16]
+
+
+def localize_sql(sql: str, full_table_id: str) -> str | None:
+    """BQ_SQL 의 적재 테이블 참조(`p.d.t`, p.d.t, d.t 등)를 LOCAL_TABLE 로 바꾼다.
+    다른 테이블(점 들어간 백틱 이름)을 읽으면 로컬로 못 돌리므로 None.
+    남은 백틱 식별자는 DuckDB 식 큰따옴표로 바꾼다."""
+    project, dataset, table = full_table_id.split(".")
+    p, d, t = (re.escape(x) for x in (project, dataset, table))
+    ref = re.compile(rf"(?<![\w.])`?(?:{p}`?\.`?)?{d}`?\.`?{t}`?(?![\w.])")
+    if not ref.search(sql):
+        return None
+    out = ref.sub(LOCAL_TABLE, sql)
+    if re.search(r"`[^`]*\.[^`]*`", out):
+        return None
+    return re.sub(r"`([^`]*)`", r'"\1"', out)
+
+
+def export_local(
+    frame,
+    sql: str,
+    full_table_id: str,
+    csv_path: str | None = None,
+    parquet_path: str | None = None,
+    xlsx_path: str | None = None,
+) -> int | None:
+    """방금 적재한 DataFrame(또는 Arrow 테이블) 위에서 BQ_SQL 을 DuckDB로 계산해 출력한다.
+    로컬로 표현할 수 없는 쿼리면 None(호출부는 BigQuery 추출로 넘어가면 됨)."""
+    import duckdb
+
+    disabled = local_disabled(sql)
+    if disabled:
+        print(f"[INFO] 로컬 평가 비활성(대조 불일치 {disabled.get('at', '?')}: {disabled.get('detail', '')}) → 건너뜀")
+        return None
+    local_sql = localize_sql(sql, full_table_id)
+    if local_sql is None:
+        print(f"[INFO] BQ_SQL 이 {full_table_id} 만 읽는 쿼리가 아님 → 로컬 평가 건너뜀")
+        return None
+
+    for path in (csv_path, parquet_path, xlsx_path):
+        if path:
+            (Path(path).parent / LOCAL_MARKER).unlink(missing_ok=True)  # 실패 시 옛 표식이 남지 않게
+
+    t0 = time.time()
+    con = duckdb.connect()
+    try:
+        con.execute("SET python_enable_replacements = false")  # 등록한 테이블만 보이게
+        con.register(LOCAL_TABLE, frame)
+        try:
+            reader = con.execute(local_sql).fetch_record_batch(100_000)
+        except duckdb.Error as e:
+            print(f"[INFO] BQ_SQL 을 DuckDB로 실행 불가 → 로컬 평가 건너뜀: {str(e)[:200]}")
+            return None
+        rows = write_outputs(reader.schema, reader, csv_path, parquet_path, xlsx_path)
+    finally:
+        con.close()
+
+    marker = {"sql": sql_fingerprint(sql), "table": full_table_id, "rows": rows, "created_at": time.time()}
+    for path in (csv_path, parquet_path, xlsx_path):
+        if path:
+            (Path(path).parent / LOCAL_MARKER).write_text(json.dumps(marker), encoding="utf-8")
+            break
+    print(f"✅ BQ_SQL 로컬 평가 완료: {rows:,}행, {time.time() - t0:.1f}s")
+    return rows
+
+
+def local_disabled(sql: str) -> dict | None:
+    """이 SQL의 로컬 평가가 대조 불일치로 꺼져 있으면 그 기록. SQL이 바뀌면 표식은 무시된다."""
+    try:
+        marker = json.loads(LOCAL_DISABLED.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return marker if marker.get("sql") == sql_fingerprint(sql) else None
+
+
+def disable_local(sql: str, detail: str) -> None:
+    LOCAL_DISABLED.parent.mkdir(parents=True, exist_ok=True)
+    marker = {"sql": sql_fingerprint(sql), "detail": detail, "at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    LOCAL_DISABLED.write_text(json.dumps(marker, ensure_ascii=False), encoding="utf-8")
+
+
+def local_export_usable(sql: str, paths: list[str], max_age_sec: float) -> bool:
+    """같은 SQL로 최근에 만든 로컬 결과가 있고, 요청한 출력 파일이 다 있는지. 비활성 표식이 있으면 False."""
+    paths = [p for p in paths if p]
+    if not paths:
+        return False
+    disabled = local_disabled(sql)
+    if disabled:
+        print(f"[WARN] 로컬 평가 비활성(대조 불일치 {disabled.get('at', '?')}) → BigQuery로 추출")
+        return False
+    try:
+        marker = json.loads((Path(paths[0]).parent / LOCAL_MARKER).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    if marker.get("sql") != sql_fingerprint(sql):
+        return False
+    if time.time() - float(marker.get("created_at", 0)) > max_age_sec:
+        return False
+    return all(Path(p).exists() for p in paths)
+
+
+def parity_due(every: int) -> bool:
+    """이번 실행에서 BigQuery 대조를 할지. GitHub run 번호 기준 N회에 1번(없으면 확률 1/N)."""
+    if every <= 0:
+        return False
+    run_number = os.getenv("GITHUB_RUN_NUMBER", "")
+    if run_number.isdigit():
+        return int(run_number) % every == 0
+    return random.random() < 1 / every
+
+
+def csv_equivalent(a: str, b: str, ordered: bool = False) -> tuple[bool, str]:
+    """두 CSV가 같은지(컬럼·행 수·행 내용 해시). ordered=False 면 행 순서는 무시."""
+    import pandas as pd
+
+    da = pd.read_csv(a, dtype=str, keep_default_na=False)
+    db = pd.read_csv(b, dtype=str, keep_default_na=False)
+    if list(da.columns) != list(db.columns):
+        return False, f"컬럼 다름: {list(da.columns)[:5]}... vs {list(db.columns)[:5]}..."
+    if len(da) != len(db):
+        return False, f"행 수 다름: 로컬 {len(da):,} vs BigQuery {len(db):,}"
+    ha = pd.util.hash_pandas_object(da, index=False).to_numpy(copy=True)
+    hb = pd.util.hash_pandas_object(db, index=False).to_numpy(copy=True)
+    if ordered:
+        misplaced = int((ha != hb).sum())
+        if misplaced:
+            ha.sort()
+            hb.sort()
+            if (ha == hb).all():
+                return False, f"내용은 같지만 행 순서 다름(ORDER BY): 위치 다른 행 {misplaced:,}건"
+            return False, f"내용 다른 행 약 {int((ha != hb).sum()):,}건"
+        return True, f"{len(da):,}행 일치(순서 포함)"
+    ha.sort()
+    hb.sort()
+    mismatched = int((ha != hb).sum())
+    if mismatched:
+        return False, f"내용 다른 행 약 {mismatched:,}건"
+    return True, f"{len(da):,}행 일치"
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="BQ_SQL 결과를 Storage Read API로 CSV/Parquet/XLSX 추출")
+    ap.add_argument("--sql-file", help="SQL 파일 (없으면 env BQ_SQL)")
+    ap.add_argument("--project", default=os.getenv("GCP_PROJECT"), help="GCP 프로젝트 (기본 env GCP_PROJECT)")
+    ap.add_argument("--location", default=LOCATION)
+    ap.add_argument("--streams", type=int, default=DEFAULT_STREAMS, help="병렬 읽기 스트림 수")
+    ap.add_argument("--csv")
+    ap.add_argument("--parquet")
+    ap.add_argument("--xlsx")
+    ap.add_argument("--reuse-local", action="store_true",
+                    help="크롤링 단계가 로컬 평가로 만든 결과가 있으면 그대로 쓴다(샘플링 주기로만 BigQuery 대조)")
+    ap.add_argument("--max-local-age", type=int, default=60, help="재사용할 로컬 결과의 최대 나이(분)")
+    ap.add_argument("--parity-every", type=int,
+                    default=int(os.getenv("BQ_PARITY_EVERY") or DEFAULT_PARITY_EVERY),
+                    help="N회에 1번 BigQuery로도 뽑아 대조 (0=안 함)")
+    ap.add_argument("--enable-local", action="store_true",
+                    help="대조 불일치로 꺼진 로컬 평가를 다시 켠다(원인 확인 후)")
+    args = ap.parse_args(argv)
+
+    if args.enable_local:
+        LOCAL_DISABLED.unlink(missing_ok=True)
+        print(f"✅ 로컬 평가 비활성 표식 삭제: {LOCAL_DISABLED}")
+        return 0
+
+    if args.sql_file:
+        sql = Path(args.sql_file).read_text(encoding="utf-8")
+    else:
+        sql = os.getenv("BQ_SQL") or ""
+    if not sql.strip():
+        print("ERROR: BQ_SQL secret is empty.")
+        return 1
+    if not args.project:
+        print("ERROR: GCP 프로젝트가 없습니다 (--project 또는 env GCP_PROJECT).")
+        return 1
+
+    paths = [args.csv, args.parquet, args.xlsx]
+    if args.reuse_local and local_export_usable(sql, paths, args.max_local_age * 60):
+        if not parity_due(args.parity_every):
+            print("✅ 로컬 평가 결과 재사용 → BigQuery 추출 생략")
+            return 0
+        return run_parity_check(sql, args)
+
+    export(
+        sql,
+        args.project,
+        csv_path=args.csv,
+        parquet_path=args.parquet,
+        xlsx_path=args.xlsx,
+        max_streams=args.streams,
+        location=args.location,
+    )
+    return 0
+
+
+def run_parity_check(sql: str, args) -> int:
+    """BigQuery로도 뽑아 로컬 결과와 대조. 다르면 BigQuery 결과로 교체(정답은 BigQuery)하고
+    로컬 평가를 끈 뒤 1 반환."""
+    print("[INFO] 대조 주기 → BigQuery로도 추출해 로컬 결과와 비교")
+    bq_paths = {k: (f"{v}.bq" if v else None) for k, v in
+                (("csv_path", args.csv), ("parquet_path", args.parquet), ("xlsx_path", args.xlsx))}
+    if not bq_paths["csv_path"]:
+        bq_paths["csv_path"] = str(Path(args.parquet or args.xlsx).parent / "bq_parity.csv.bq")
+    export(sql, args.project, max_streams=args.streams, location=args.location, **bq_paths)
+
+    local_csv = args.csv
+    if local_csv:
+        same, detail = csv_equivalent(local_csv, bq_paths["csv_path"], ordered=bool(_ORDER_BY.search(sql)))
+    else:
+        same, detail = False, "로컬 CSV 없음(대조 불가)"
+    if same:
+        print(f"✅ 로컬 평가 ↔ BigQuery 일치: {detail}")
+        for p in bq_paths.values():
+            if p:
+                Path(p).unlink(missing_ok=True)
+        return 0
+
+    print(f"❌ 로컬 평가 ↔ BigQuery 불일치: {detail} → BigQuery 결과로 교체")
+    for dst, src in zip((args.csv, args.parquet, args.xlsx), bq_paths.values()):
+        if dst and src:
+            os.replace(src, dst)
+    disable_local(sql, detail)
+    print(f"[WARN] 이 SQL의 로컬 평가 비활성 → {LOCAL_DISABLED} (확인 후 python bq_export.py --enable-local)")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+# =====================================================================
+# BigQuery 추출 CSV → OneDrive용 XLSX 변환 (스트리밍)
+#
+#   run.yml 「Convert CSV to Excel」 단계가 쓰던 인라인 스크립트를 모듈로 옮긴 것.
+#   동작은 같다: 전부 문자열로 읽고, 엑셀이 거부하는 제어문자를 지우고,
+#   B열·H~R열은 숫자로 바뀌는 값만 숫자(서식 '일반')로, 나머지는 텍스트 그대로 둔다.
+#
+#   다른 점은 메모리/속도:
+#     - CSV를 chunk 단위로 읽는다(전체 DataFrame을 한 번에 안 올림).
+#     - openpyxl write_only 모드로 행을 바로 흘려 쓴다(셀 객체를 메모리에 안 쌓음).
+#     - 제어문자 제거·숫자 변환은 셀 단위 루프 대신 열 단위 벡터 연산.
+#
+#   사용: python csv_to_xlsx.py /tmp/export/bq_export.csv /tmp/export/bq_export.xlsx
+# =====================================================================
+
+import argparse
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.utils import column_index_from_string
+
+# 엑셀(xlsx XML)에 쓸 수 없는 제어문자
+ILLEGAL_CHARS = re.compile(r"[\x00-\x08\x0B\x0C\x0E-\x1F]")
+
+# 숫자로 변환 시도할 열(엑셀 열 문자). "H:R" 처럼 범위도 된다.
+DEFAULT_NUMERIC_COLS = "B,H:R"
+
+DEFAULT_CHUNKSIZE = 50_000
+
+
+def parse_column_spec(spec: str) -> list[int]:
+    """"B,H:R" → 0 기반 열 위치 [1, 7, 8, ..., 17]."""
+    out: list[int] = []
+    for part in (p.strip() for p in spec.split(",")):
+        if not part:
+            continue
+        if ":" in part:
+            a, b = (column_index_from_string(x.strip().upper()) for x in part.split(":", 1))
+            out.extend(range(a - 1, b))
+        else:
+            out.append(column_index_from_string(part.upper()) - 1)
+    return sorted(set(out))
+
+
+def _clean_text(col: pd.Series) -> pd.Series:
+    """결측 → "", 제어문자 제거. (열 단위)"""
+    col = col.fillna("")
+    return col.str.replace(ILLEGAL_CHARS, "", regex=True)
+
+
+def _column_values(text: pd.Series, numeric: bool) -> list:
+    """한 열을 엑셀에 쓸 값 목록으로. 숫자 대상 열이면 float() 되는 값만 숫자로 바꾼다.
+    빈 문자열은 None(빈 셀)으로 쓴다."""
+    values = text.to_numpy(dtype=object, copy=True)
+    if numeric:
+        num = pd.to_numeric(text.str.strip(), errors="coerce").to_numpy(dtype="float64")
+        ok = np.isfinite(num)
+        values[ok] = num[ok]
+    values[values == ""] = None
+    return values.tolist()
+
+
+class XlsxStreamWriter:
+    """문자열 DataFrame chunk를 받아 write_only 워크북에 행 단위로 흘려 쓴다.
+    bq_export 등 다른 단계도 같은 규칙(제어문자·숫자 열)으로 쓰도록 공유한다."""
+
+    def __init__(self, dst: str, numeric_cols: str = DEFAULT_NUMERIC_COLS, sheet_title: str = "Sheet1"):
+        self.dst = dst
+        self.numeric_positions = set(parse_column_spec(numeric_cols))
+        self.wb = Workbook(write_only=True)
+        self.ws = self.wb.create_sheet(title=sheet_title)
+        self.header_written = False
+        self.rows = 0
+
+    def write_header(self, columns) -> None:
+        self.ws.append([ILLEGAL_CHARS.sub("", str(c)) for c in columns])
+        self.header_written = True
+
+    def write_chunk(self, chunk: pd.DataFrame) -> None:
+        if not self.header_written:
+            self.write_header(chunk.columns)
+        if chunk.empty:
+            return
+        cols = [
+            _column_values(_clean_text(chunk.iloc[:, i].astype("object")), i in self.numeric_positions)
+            for i in range(chunk.shape[1])
+        ]
+        for row in zip(*cols):
+            self.ws.append(row)
+        self.rows += len(chunk)
+
+    def close(self) -> None:
+        if not self.header_written:
+            self.ws.append([])
+        self.wb.save(self.dst)
+
+
+def convert_csv_to_xlsx(
+    src: str,
+    dst: str,
+    numeric_cols: str = DEFAULT_NUMERIC_COLS,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> int:
+    """CSV → XLSX 스트리밍 변환. 쓴 데이터 행 수(헤더 제외)를 반환."""
+    writer = XlsxStreamWriter(dst, numeric_cols=numeric_cols)
+    reader = pd.read_csv(src, dtype=str, encoding="utf-8-sig", chunksize=chunksize)
+    for chunk in reader:
+        writer.write_chunk(chunk)
+    if not writer.header_written:
+        # 데이터 행이 하나도 없으면 chunk가 안 나온다 → 헤더만 쓴다
+        writer.write_header(pd.read_csv(src, dtype=str, encoding="utf-8-sig", nrows=0).columns)
+    writer.close()
+    return writer.rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="CSV → XLSX 스트리밍 변환 (OneDrive 업로드용)")
+    ap.add_argument("src", help="입력 CSV (예: /tmp/export/bq_export.csv)")
+    ap.add_argument("dst", help="출력 XLSX (예: /tmp/export/bq_export.xlsx)")
+    ap.add_argument("--numeric-cols", default=DEFAULT_NUMERIC_COLS,
+                    help=f"숫자 변환할 열 (기본 {DEFAULT_NUMERIC_COLS})")
+    ap.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="한 번에 읽을 행 수")
+    args = ap.parse_args(argv)
+
+    t0 = time.time()
+    rows = convert_csv_to_xlsx(args.src, args.dst, numeric_cols=args.numeric_cols, chunksize=args.chunksize)
+    print(f"Saved with {args.numeric_cols} columns as General: {args.dst} "
+          f"({rows:,} rows, {time.time() - t0:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,10 +5,13 @@ import urllib3
 import json
 import time
 
+import instrument
+
 # SSL 인증서 경고 숨기기
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
+@instrument.span("customs_rate")
 def get_customs_rate(max_retries=3):
     """관세청 주간 수입환율에서 CNY·USD 고시환율을 함께 조회.
     반환: {"cny": "211.49", "usd": "1428.8"} 형태(문자열). 실패 시 {}."""
@@ -73,6 +76,7 @@ def get_customs_rate(max_retries=3):
     return {}
 
 
+@instrument.span("krw_rate")
 def get_krw_rate():
     # silkroad21 서버가 뿌리는 텍스트 값(예: "241")을 그대로 읽어온다.
     url = "https://silkroad21.co.kr/krw_rate.txt"
@@ -91,6 +95,7 @@ def get_krw_rate():
         return None
 
 
+@instrument.span("kdocs_post")
 def send_to_kdocs(cny_rate, krw_rate):
     # CNY 환율이 없으면 절대 전송하지 않는다.
     # (전송해버리면 AirScript 쪽 테스트용 더미값(999.99 등)이나 빈 값으로
@@ -129,6 +134,7 @@ def send_to_kdocs(cny_rate, krw_rate):
         print(f"❌ KDocs 연동 에러 발생: {e}")
 
 
+@instrument.span("packing_post")
 def send_to_packing(cny_rate, krw_rate, usd_rate=None):
     # 패킹 서버로 환율 전송
     #   cny_rate(관세청 CNY 고시환율) → customs
@@ -172,7 +178,7 @@ def send_to_packing(cny_rate, krw_rate, usd_rate=None):
         print(f"❌ 패킹 서버 환율 전송 오류(무시): {type(e).__name__}: {e}")
 
 
-if __name__ == "__main__":
+def main():
     print("🔄 관세청 고시환율 및 krw_rate.txt 조회를 시작합니다...")
     customs = get_customs_rate()          # {"cny": ..., "usd": ...}
     cny_rate = customs.get("cny")
@@ -181,3 +187,7 @@ if __name__ == "__main__":
     print(f"수신 결과 -> CNY: {cny_rate}, USD: {usd_rate}, KRW(krw_rate.txt): {krw_rate}")
     send_to_kdocs(cny_rate, krw_rate)
     send_to_packing(cny_rate, krw_rate, usd_rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,605 @@
+from __future__ import annotations
+
+# =====================================================================
+# goods_csv 변환 (순수 함수 모음)
+#   auto_download_headless_log.py 와 benchmarks/ 가 같이 쓴다.
+#   크롬·BigQuery·HTTP 없이 DataFrame / Arrow 테이블만 주고받으므로 import 해도 아무 일도 일어나지 않는다.
+#
+#   read_export_table    : Acting_S.asp 엑셀(CSV) 다운로드 파일 → pyarrow.Table (pyarrow.csv 로 한 번만 파싱)
+#   read_export_csv      : 위 테이블을 복사 없이 DataFrame(pyarrow 문자열 + category) 으로
+#   prepare_frame        : 빈 행/중복 제거 + 파생 컬럼(DERIVED_RULES)
+#   arrow_view / bq_table: 프레임의 컬럼 투영 → pyarrow.Table (문자열 버퍼 공유, BigQuery 는 sanitize 이름)
+#   numeric              : 숫자 컬럼 파싱 캐시 (파생 규칙·전송 본문 공용)
+#   packing_table / finance_table / rawdata_table
+#                        : 패킹 서버 / 재무 ERP(담당자 기록) / 재무 ERP(raw data) 전송 본문 컬럼 (Arrow)
+#   json_records         : Arrow 테이블 → JSON 배열 bytes (행마다 파이썬 객체를 만들지 않음)
+#   sheet_values         : Google Sheets values 배열 (헤더 포함)
+# =====================================================================
+
+import csv
+import json
+import math
+import re
+import unicodedata
+import weakref
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+
+# ===== CSV 읽기 / 메모리 표현 =====
+#   CSV 는 pyarrow.csv 로 Arrow 테이블로 한 번만 읽고, 파이프라인은 그 버퍼를 그대로 쓰는 프레임 하나
+#   (원본 헤더 그대로)만 들고 다닌다.
+#   - 문자열 컬럼: pyarrow 문자열(STRING_DTYPE) → Arrow 버퍼 공유, 값마다 파이썬 str 객체를 만들지 않는다
+#   - 값 종류가 적은 컬럼(CATEGORY_COLUMNS): category(Arrow 에서는 dictionary) → 행마다 코드(int8/16)만
+#   싱크는 arrow_view 로 필요한 컬럼만 Arrow 테이블로 다시 꺼내 쓴다(문자열은 여기서도 복사 없음).
+try:
+    STRING_DTYPE = pd.StringDtype("pyarrow", na_value=np.nan)   # pandas 3 기본 str 과 같음(결측 = NaN)
+except TypeError:                                              # pandas < 2.3
+    STRING_DTYPE = pd.StringDtype("pyarrow")
+
+CATEGORY_COLUMNS = ("주문상태", "담당자1", "담당자2", "담당팀", "통관품목", "대행구분")
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """CATEGORY_COLUMNS 중 있는 컬럼을 category 로 (제자리 변환)."""
+    for c in CATEGORY_COLUMNS:
+        if c in df.columns and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].astype("category")
+    return df
+
+
+def _dedupe_names(names: list[str]) -> list[str]:
+    """중복 헤더는 pandas.read_csv 처럼 '이름.1', '이름.2' …"""
+    seen: dict[str, int] = {}
+    out = []
+    for name in names:
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        out.append(name)
+    return out
+
+
+def _read_rows_padded(path: str, encoding: str, names: list[str]) -> tuple[pa.Table, int, list[str]]:
+    """열 수가 안 맞는 행이 있을 때의 느린 경로(csv 모듈). pandas.read_csv(on_bad_lines="skip") 와 같게
+    열이 모자란 행은 null 로 채우고 넘치는 행만 버린다. 행 순서 유지. (테이블, 채운 행 수, 버린 행 원문)."""
+    width = len(names)
+    nulls = set(pacsv.ConvertOptions().null_values)
+    cols: list[list] = [[] for _ in names]
+    padded, skipped = 0, []
+    with open(path, encoding=encoding, newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if not row:
+                continue
+            if len(row) > width:
+                skipped.append(",".join(row))
+                continue
+            if len(row) < width:
+                padded += 1
+                row += [""] * (width - len(row))
+            for col, v in zip(cols, row):
+                col.append(None if v in nulls else v)
+    table = pa.Table.from_arrays([pa.array(c, pa.string()) for c in cols], names=names)
+    return table, padded, skipped
+
+
+def read_export_table(path: str, stats: dict | None = None) -> pa.Table:
+    """다운로드 CSV → pyarrow.Table. 모든 컬럼 문자열, 빈 값은 null. UTF-8(BOM) 실패 시 cp949.
+    열이 모자란 행은 null 로 채우고(예전 pandas 와 같음), 열이 넘치는 행만 건너뛴다 — 어느 쪽이든 ⚠️ 출력.
+    stats 를 주면 {"padded": 채운 행 수, "skipped": 버린 행 수, "skipped_lines": 버린 행 원문(앞 5줄)} 을 채운다."""
+    for encoding in ("utf-8-sig", "cp949"):
+        bad: list = []
+
+        def on_invalid(row) -> str:
+            bad.append(row)
+            return "skip"
+
+        try:
+            with open(path, encoding=encoding, newline="") as f:
+                names = _dedupe_names(next(csv.reader(f), []))
+            table = pacsv.read_csv(
+                path,
+                read_options=pacsv.ReadOptions(
+                    encoding="utf-8" if encoding == "utf-8-sig" else encoding,
+                    column_names=names,
+                    skip_rows=1,
+                    block_size=16 << 20,
+                ),
+                parse_options=pacsv.ParseOptions(newlines_in_values=True, invalid_row_handler=on_invalid),
+                convert_options=pacsv.ConvertOptions(
+                    column_types={n: pa.string() for n in names},
+                    strings_can_be_null=True,
+                ),
+            )
+        except (UnicodeDecodeError, pa.ArrowInvalid):
+            if encoding == "cp949":
+                raise
+            continue
+
+        padded, skipped = 0, [row.text for row in bad]
+        if any(row.actual_columns < row.expected_columns for row in bad):
+            # 드문 경우라 순서를 지키며 채우려고 통째로 다시 읽는다
+            table, padded, skipped = _read_rows_padded(path, encoding, names)
+        if padded:
+            print(f"⚠️ 열이 모자란 행 {padded:,}건 → 빈 값(null)으로 채움")
+        if skipped:
+            print(f"⚠️ 열이 넘치는 행 {len(skipped):,}건 건너뜀 (예: {skipped[0][:200]!r})")
+        if stats is not None:
+            stats.update(padded=padded, skipped=len(skipped), skipped_lines=[t[:500] for t in skipped[:5]])
+        return table
+    raise AssertionError("unreachable")
+
+
+def table_to_frame(table: pa.Table) -> pd.DataFrame:
+    """Arrow 테이블 → DataFrame. 문자열 컬럼은 버퍼를 공유하고, CATEGORY_COLUMNS 는 Arrow 에서 dictionary 로 바꿔 category 로."""
+    for c in CATEGORY_COLUMNS:
+        if c in table.column_names and pa.types.is_string(table.schema.field(c).type):
+            i = table.column_names.index(c)
+            table = table.set_column(i, c, pc.dictionary_encode(table.column(i)))
+    types = {pa.string(): STRING_DTYPE, pa.large_string(): STRING_DTYPE}
+    return table.to_pandas(types_mapper=types.get)
+
+
+def read_export_csv(path: str) -> pd.DataFrame:
+    """다운로드 CSV 를 문자열(STRING_DTYPE) + category 프레임으로 읽는다."""
+    return table_to_frame(read_export_table(path))
+
+
+def sanitize_columns(cols):
+    seen = {}
+    out = []
+    for c in cols:
+        c = (c or "").strip()
+        c = re.sub(r"[^\w]", "_", c)
+        if re.match(r"^\d", c):
+            c = "_" + c
+        base = c
+        i = 1
+        while c in seen:
+            c = f"{base}_{i}"
+            i += 1
+        seen[c] = True
+        out.append(c)
+    return out
+
+
+# ===== 파생 컬럼 규칙 (담당팀 매핑) =====
+# WPS 수식:
+# IF(OR([담당자1]="최국화",[담당자1]="김춘매",[담당자1]="장옥선",[담당자1]="서연연"), "C-TEAM",
+#  IF(OR([담당자1]="박명숙",[담당자1]="지연니"), "A-TEAM",
+#   IF(OR([담당자1]="장춘봉",[담당자1]="왕챈",[담당자1]="진진"), "B-TEAM",
+#    IF(OR([담당자1]="양호원"), "박기훈팀", "팀배정필요"))))
+담당팀_매핑 = {
+    "최국화": "C-TEAM",
+    "김춘매": "C-TEAM",
+    "장옥선": "C-TEAM",
+    "서연연": "C-TEAM",
+    "박명숙": "A-TEAM",
+    "지연니": "A-TEAM",
+    "장춘봉": "B-TEAM",
+    "왕챈":   "B-TEAM",
+    "진진":   "B-TEAM",
+    "양호원": "박기훈팀",
+}
+담당팀_기본값 = "팀배정필요"
+
+
+# ===== 숫자 컬럼 (프레임마다 한 번만 파싱) =====
+#   파생 규칙과 전송 본문이 같은 원본(수량·단가·환율 …)을 각자 to_numeric 하지 않도록
+#   numeric(df, col) 결과를 프레임(id) 단위로 캐시한다. 프레임이 사라지면 캐시도 지워지고,
+#   행이 바뀐 프레임(index 가 다른 객체)은 다시 파싱한다.
+#   ⚠️ 같은 프레임에서 원본 컬럼 값을 덮어쓰면 forget_numeric(df) 로 캐시를 비울 것.
+_numeric_cache: dict[int, tuple[pd.Index, dict[str, pd.Series]]] = {}
+
+
+def numeric(df: pd.DataFrame, col: str) -> pd.Series:
+    """df[col] → float Series (숫자가 아니면 NaN)."""
+    key = id(df)
+    entry = _numeric_cache.get(key)
+    if entry is None:
+        weakref.finalize(df, _numeric_cache.pop, key, None)
+    if entry is None or entry[0] is not df.index:
+        entry = _numeric_cache[key] = (df.index, {})
+    cols = entry[1]
+    if col not in cols:
+        cols[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    return cols[col]
+
+
+def forget_numeric(df: pd.DataFrame) -> None:
+    _numeric_cache.pop(id(df), None)
+
+
+def numeric_or_zero(df: pd.DataFrame, col: str) -> np.ndarray:
+    """전송 본문용 숫자 배열: 컬럼 없음·결측·inf → 0 (to_number 와 같은 규칙)."""
+    if not col or col not in df.columns:
+        return np.zeros(len(df))
+    v = numeric(df, col).to_numpy(dtype="float64", na_value=np.nan)
+    return np.where(np.isfinite(v), v, 0.0)
+
+
+# ===== 파생 컬럼 규칙 =====
+def _derive_team(df: pd.DataFrame) -> pd.Categorical:
+    # 담당자1 카테고리(직원 이름)마다 한 번만 매핑하고, 행에는 코드로 옮겨 담는다.
+    # 매핑 안 된 이름도 카테고리에서 바로 나오므로 행 전체를 다시 훑지 않는다.
+    names = df["담당자1"].astype("category")
+    cats = names.cat.categories
+    teams = cats.map(담당팀_매핑)
+    누락 = [v for v, t in zip(cats, teams) if pd.isna(t) and v not in ("", "nan")]
+    if 누락:
+        print(f"⚠️ 담당팀 매핑 안 된 '담당자1' 값: {누락}")
+    team_cats = pd.Index(list(dict.fromkeys([*담당팀_매핑.values(), 담당팀_기본값])))
+    default = team_cats.get_loc(담당팀_기본값)
+    table = np.append(team_cats.get_indexer(teams.fillna(담당팀_기본값)), default)
+    return pd.Categorical.from_codes(table[names.cat.codes.to_numpy()], categories=team_cats)   # 결측(-1) → 기본값
+
+
+def _derive_agency(df: pd.DataFrame) -> pd.Categorical:
+    codes = np.where(numeric(df, "환율") == 0, 1, 0)
+    return pd.Categorical.from_codes(codes, categories=["구매대행", "배송대행"])
+
+
+# (새 컬럼, 필요한 원본 컬럼, 계산) — 위에서부터 순서대로 적용.
+# 규칙은 원본 컬럼(또는 numeric 캐시)만 읽어 배열 하나를 돌려준다 → 규칙을 늘려도 파싱은 늘지 않는다.
+DERIVED_RULES = (
+    # 1) 담당팀 (담당자1 → 조건부 매핑)
+    ("담당팀", ("담당자1",), _derive_team),
+    # 2) 합계 (수량 * 단가)
+    ("합계", ("수량", "단가"), lambda df: numeric(df, "수량") * numeric(df, "단가")),
+    # 3) 대행구분 (환율 == 0 → 배송대행, 그 외(0이 아니거나 값 없음) → 구매대행)
+    ("대행구분", ("환율",), _derive_agency),
+)
+
+
+def apply_derived_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """BigQuery 업로드 전, 계산/매핑이 필요한 파생 컬럼을 추가합니다.
+    새 파생 컬럼이 필요해지면 DERIVED_RULES 에 한 줄 추가하면 됩니다."""
+    for target, needs, compute in DERIVED_RULES:
+        missing = [c for c in needs if c not in df.columns]
+        if missing:
+            print(f"⚠️ {', '.join(repr(c) for c in missing)} 컬럼 없음 → '{target}' 생성 건너뜀")
+            continue
+        df[target] = compute(df)
+    return df
+
+
+def prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """적재용 정제: 빈 행/중복 제거 → 파생 컬럼(DERIVED_RULES).
+    빠지는 행이 없으면 복사하지 않고 df 에 파생 컬럼을 붙여 그대로 돌려준다."""
+    keep = df.notna().any(axis=1).to_numpy() & ~df.duplicated().to_numpy()
+    if not keep.all():
+        df = df[keep]
+    return compact_frame(apply_derived_columns(df))
+
+
+def arrow_view(df: pd.DataFrame, columns=None, names=None) -> pa.Table:
+    """df 의 컬럼 투영 → pyarrow.Table. 문자열 컬럼은 버퍼를 공유(복사 없음), category 는 dictionary 로.
+    names 를 주면 그 이름으로 바꾼다(데이터는 그대로)."""
+    view = df if columns is None else df[list(columns)]
+    table = pa.Table.from_pandas(view, preserve_index=False)
+    return table.rename_columns(list(names)) if names is not None else table
+
+
+def bq_table(df: pd.DataFrame) -> pa.Table:
+    """BigQuery 적재용 테이블: 전체 컬럼, 이름만 sanitize_columns."""
+    return arrow_view(df, names=sanitize_columns(df.columns))
+
+
+def source_columns(df: pd.DataFrame) -> list[str]:
+    """다운로드 원본 컬럼 (파생·동기화 메타 컬럼 제외)."""
+    derived = {target for target, _, _ in DERIVED_RULES} | set(SYNC_COLUMNS)
+    return [c for c in df.columns if c not in derived]
+
+
+# ===== 동기화용 메타 컬럼 (BQ_SYNC_COLUMNS=1 일 때만) =====
+#   하류 증분 동기화(old_scripts/bq_to_supabase.py SYNC_MODE=incremental)가 쓰는 컬럼.
+#   _row_seq  : export 안의 행 순서(0..n-1). 같은 아이템번호가 여러 줄이면 큰 값이 이긴다.
+#   _row_hash : 업무 컬럼 내용 해시(16진 문자열). 바뀐 행만 골라내는 데 쓴다.
+#   _loaded_at: 이번 적재 시각(UTC). 마지막 동기화 이후 적재가 있었는지 보는 워터마크.
+#   ⚠️ goods_csv 에 컬럼이 늘어나므로 SELECT * 를 쓰는 하류(BQ_SQL 등)를 확인한 뒤 켤 것.
+SYNC_COLUMNS = ("_row_seq", "_row_hash", "_loaded_at")
+
+def add_sync_columns(df: pd.DataFrame) -> pd.DataFrame:
+    business = [c for c in df.columns if c not in SYNC_COLUMNS]
+    hashes = pd.util.hash_pandas_object(df[business].astype(str), index=False)
+    df["_row_hash"] = hashes.map("{:016x}".format).to_numpy()
+    df["_row_seq"] = range(len(df))
+    df["_loaded_at"] = pd.Timestamp.now(tz="UTC")
+    return df
+
+
+# ===== 전송 본문 공용 헬퍼 =====
+def header_key(value) -> str:
+    """CSV 헤더의 BOM·개행·공백·구분자 차이를 제거해 같은 컬럼을 찾는다."""
+    text = unicodedata.normalize("NFKC", str(value or ""))
+    text = text.replace("\ufeff", "").replace("\u200b", "")
+    return re.sub(r"[\s_\-]+", "", text).lower()
+
+
+def resolve_header(columns, *candidates) -> str:
+    """후보 이름 중 실제로 있는 컬럼명. 없으면 ""."""
+    by_key = {header_key(col): col for col in columns}
+    for candidate in candidates:
+        actual = by_key.get(header_key(candidate))
+        if actual is not None:
+            return actual
+    return ""
+
+
+def clean_text(v) -> str:
+    """pandas 결측값이 문자열 'nan'/'None'으로 전송되지 않게 정규화."""
+    if v is None:
+        return ""
+    try:
+        if pd.isna(v):
+            return ""
+    except (TypeError, ValueError):
+        pass
+    s = str(v).strip()
+    return "" if s.lower() in ("nan", "none", "nat") else s
+
+
+def url_text(v) -> str:
+    """일반 URL뿐 아니라 HTML 링크/엑셀 HYPERLINK 형태도 실제 주소로 정규화한다."""
+    s = clean_text(v)
+    if not s:
+        return ""
+    html_match = re.search(r"""href\s*=\s*["']([^"']+)["']""", s, re.I)
+    if html_match:
+        return html_match.group(1).strip()
+    formula_match = re.search(r"""HYPERLINK\s*\(\s*["']([^"']+)["']""", s, re.I)
+    if formula_match:
+        return formula_match.group(1).strip()
+    return s
+
+
+def to_number(v) -> float:
+    try:
+        f = float(v)
+        if math.isnan(f) or math.isinf(f):
+            return 0
+        return f
+    except (TypeError, ValueError):
+        return 0
+
+# ===== 컬럼 단위 정리 (전송 본문용, Arrow) =====
+#   clean_text / url_text / to_number 와 같은 규칙을 pyarrow.compute 로 컬럼 전체에 한 번에 적용한다.
+_NULL_TEXT = pa.array(["nan", "none", "nat"])
+_HTML_URL = r"""(?i)href\s*=\s*["'](?P<url>[^"']+)["']"""
+_FORMULA_URL = r"""(?i)HYPERLINK\s*\(\s*["'](?P<url>[^"']+)["']"""
+
+
+def _lit(text: str) -> pa.Scalar:
+    return pa.scalar(text, pa.large_string())
+
+
+def _as_text(arr) -> pa.ChunkedArray:
+    if not isinstance(arr, pa.ChunkedArray):
+        arr = pa.chunked_array([arr])
+    if not pa.types.is_large_string(arr.type):
+        arr = arr.cast(pa.large_string())   # dictionary(category)·string → 같은 타입으로
+    return arr
+
+
+def text_array(table: pa.Table, col: str) -> pa.ChunkedArray:
+    """clean_text 컬럼판: 결측·'nan'/'None' → "", 앞뒤 공백 제거. 컬럼이 없으면 전부 ""."""
+    if not col or col not in table.column_names:
+        return pa.chunked_array([pa.array([""] * table.num_rows, pa.large_string())])
+    t = pc.utf8_trim_whitespace(_as_text(table.column(col)))
+    t = pc.if_else(pc.is_in(pc.utf8_lower(t), value_set=_NULL_TEXT), "", t)
+    return pc.fill_null(t, "")
+
+
+def url_array(table: pa.Table, col: str) -> pa.ChunkedArray:
+    """url_text 컬럼판: HTML 링크 → HYPERLINK 수식 → 그대로."""
+    t = text_array(table, col)
+    html = pc.utf8_trim_whitespace(pc.struct_field(pc.extract_regex(t, _HTML_URL), [0]))
+    formula = pc.utf8_trim_whitespace(pc.struct_field(pc.extract_regex(t, _FORMULA_URL), [0]))
+    return pc.coalesce(html, formula, t)
+
+
+def number_array(df: pd.DataFrame, col: str) -> pa.Array:
+    """to_number 컬럼판 (numeric 캐시 사용)."""
+    return pa.array(numeric_or_zero(df, col))
+
+
+# ===== Arrow → JSON =====
+#   각 값을 JSON 조각으로 만든 뒤 행 단위 문자열 하나로 이어 붙이고, 문자열 버퍼를 그대로 bytes 로 꺼낸다.
+#   requests 의 json= 과 같은 내용(키 순서 포함)이지만 한글은 \uXXXX 대신 UTF-8 그대로 나간다.
+_JSON_ESCAPES = [("\\", "\\\\"), ('"', '\\"'), ("\n", "\\n"), ("\r", "\\r"), ("\t", "\\t")] + [
+    (chr(i), f"\\u{i:04x}") for i in range(0x20) if chr(i) not in "\n\r\t"
+]
+
+
+def _json_string(arr: pa.ChunkedArray) -> pa.ChunkedArray:
+    for raw, escaped in _JSON_ESCAPES[:2]:
+        arr = pc.replace_substring(arr, raw, escaped)
+    if pc.any(pc.match_substring_regex(arr, r"[\x00-\x1f]")).as_py():
+        for raw, escaped in _JSON_ESCAPES[2:5]:   # 개행·탭
+            arr = pc.replace_substring(arr, raw, escaped)
+        if pc.any(pc.match_substring_regex(arr, r"[\x00-\x1f]")).as_py():   # 그 밖의 제어 문자는 드묾
+            for raw, escaped in _JSON_ESCAPES[5:]:
+                arr = pc.replace_substring(arr, raw, escaped)
+    return pc.binary_join_element_wise(_lit('"'), arr, _lit('"'), _lit(""))
+
+
+def _json_value(arr) -> pa.ChunkedArray:
+    if pa.types.is_floating(arr.type) or pa.types.is_integer(arr.type):
+        return _as_text(pc.cast(arr, pa.string()))   # 결측·inf 는 number_array 에서 이미 0
+    return _json_string(_as_text(arr))
+
+
+JSON_BATCH_ROWS = 20_000   # 이 행 수씩 끊어 만든다 → 중간 배열 메모리가 전체 크기에 비례해 늘지 않음
+
+
+def _json_rows(batch: pa.RecordBatch) -> bytes:
+    parts = []
+    for i, name in enumerate(batch.schema.names):
+        parts += [_lit(("{" if i == 0 else ",") + json.dumps(name, ensure_ascii=False) + ":"), _json_value(batch.column(i))]
+    rows = pc.binary_join_element_wise(*parts, _lit("},"), _lit("")).combine_chunks()
+    offsets = np.frombuffer(rows.buffers()[1], dtype=np.int64)[rows.offset: rows.offset + len(rows) + 1]
+    return bytes(memoryview(rows.buffers()[2])[offsets[0]: offsets[-1]])
+
+
+def _json_chunks(table: pa.Table) -> list[bytes]:
+    chunks = [_json_rows(b) for b in table.to_batches(max_chunksize=JSON_BATCH_ROWS) if b.num_rows]
+    if chunks:
+        chunks[-1] = chunks[-1][:-1]   # 마지막 쉼표 제외
+    return chunks
+
+
+def json_records(table: pa.Table) -> bytes:
+    """[{"col": 값, ...}, ...] JSON 배열. 문자열 컬럼은 null 이 없어야 한다(text_array 결과)."""
+    return b"".join([b"[", *_json_chunks(table), b"]"])
+
+
+def json_body(key: str, table: pa.Table) -> bytes:
+    """{"<key>": [...]} 전송 본문. 조각을 한 번에 이어 붙여 본문 크기만큼만 더 쓴다."""
+    return b"".join([b"{" + json.dumps(key).encode("utf-8") + b":[", *_json_chunks(table), b"]}"])
+
+
+# ===== Google Sheets values =====
+def sheet_values(df: pd.DataFrame, columns=None) -> list[list]:
+    """헤더 + 행 values 배열 (결측 → ""). gspread_dataframe 기본값처럼 작은따옴표로 시작하는 값은 한 번 더 감싼다."""
+    table = arrow_view(df, columns)
+    cols = []
+    for arr in table.columns:
+        if pa.types.is_floating(arr.type) or pa.types.is_integer(arr.type):
+            cols.append(pc.fill_null(pc.cast(arr, pa.string()), "").to_pylist())
+            continue
+        t = _as_text(arr)
+        t = pc.if_else(pc.starts_with(t, "'"), pc.binary_join_element_wise(_lit("'"), t, _lit("")), t)
+        cols.append(pc.fill_null(t, "").to_pylist())
+    return [list(table.column_names)] + [list(row) for row in zip(*cols)]
+
+
+# ===== 📦 패킹 서버 item_master =====
+PACKING_COLUMNS = {
+    "item_no": "아이템번호", "member_name": "회원명", "member_id": "회원고유번호",
+    "product": "상품명", "price": "단가", "url": "상품URL",
+    "thumbnail_url": "이미지URL",
+    "inspection_url": "실사주소",
+    "inspect_opt": "구매대행_신청_옵션", "partial_qty": "부분정밀검수_수량",
+    "team": "담당팀", "agency": "대행구분",
+    "total_qty": "수량",
+    "order_status": "주문상태",
+    "buy_rate": "환율",
+    "color": "색상",
+    "name_en": "통관품목",
+    "arrival_date": "도착일",
+    "inspect_date": "검품완료일",
+}
+
+
+def packing_table(df: pd.DataFrame) -> pa.Table:
+    """패킹 서버 {"items": [...]} 의 item 컬럼들 (Arrow). 아이템번호 없는 행은 뺀다."""
+    col = {key: resolve_header(df.columns, name) for key, name in PACKING_COLUMNS.items()}
+    # 다운로드 사이트의 헤더에 숨은 개행/공백이 붙어도 실사주소가 누락되지 않게 한다.
+    col["thumbnail_url"] = resolve_header(df.columns, "이미지URL", "이미지주소", "썸네일URL")
+    col["inspection_url"] = resolve_header(df.columns, "실사주소", "실사URL", "실사이미지URL")
+
+    if not col["thumbnail_url"]:
+        print(
+            "⚠️ 썸네일 컬럼 '이미지URL' 없음 "
+            "→ thumbnail_url은 빈 값으로 전송합니다."
+        )
+    else:
+        print(f"[INFO] 썸네일 원본 컬럼 확인: {col['thumbnail_url']!r}")
+    if not col["inspection_url"]:
+        similar = [c for c in df.columns if "실사" in str(c)]
+        print(
+            "⚠️ 실사 컬럼 '실사주소' 없음 "
+            f"(실사 포함 헤더: {similar}) → inspection_url은 빈 값으로 전송합니다."
+        )
+    else:
+        print(f"[INFO] 실사 원본 컬럼 확인: {col['inspection_url']!r}")
+
+    numbers = ("price", "partial_qty", "total_qty", "buy_rate")
+    urls = ("thumbnail_url", "inspection_url")
+    src = arrow_view(df, sorted({c for k, c in col.items() if c and k not in numbers}))
+    fields = {}
+    for key, name in col.items():
+        if key in numbers:
+            fields[key] = number_array(df, name)
+        elif key in urls:
+            fields[key] = url_array(src, name)
+        else:
+            fields[key] = text_array(src, name)
+    fields["inspect_opt"] = pc.replace_substring(fields["inspect_opt"], "\t", " ")
+
+    table = pa.table(fields).filter(pc.not_equal(fields["item_no"], ""))
+    thumb_count = pc.sum(pc.not_equal(table["thumbnail_url"], "")).as_py() or 0
+    inspection_count = pc.sum(pc.not_equal(table["inspection_url"], "")).as_py() or 0
+    print(f"[INFO] 썸네일 URL 포함: {thumb_count:,}/{table.num_rows:,}건")
+    print(f"[INFO] 실사주소 포함: {inspection_count:,}/{table.num_rows:,}건")
+    return table
+
+
+# ===== 📦 재무 ERP 담당자 작업기록 (근태 교차확인용) =====
+def finance_table(df: pd.DataFrame) -> pa.Table | None:
+    """담당자1/담당자2 작업기록 컬럼들 (Arrow). 담당자 컬럼이 없으면 None(전송 건너뜀)."""
+    c_ap = resolve_header(df.columns, "담당자1")
+    c_apd = resolve_header(df.columns, "승인일")
+    c_ar = resolve_header(df.columns, "담당자2")
+    c_ard = resolve_header(df.columns, "도착일")
+    if not (c_ap and c_ar):
+        print(f"⚠️ 담당자 컬럼 없음 (담당자1={c_ap!r}, 담당자2={c_ar!r}) → 재무 전송 건너뜀")
+        return None
+
+    src = arrow_view(df, dict.fromkeys(c for c in (c_ap, c_apd, c_ar, c_ard) if c))
+    table = pa.table({
+        "approver":     text_array(src, c_ap),
+        "approve_date": text_array(src, c_apd),
+        "arriver":      text_array(src, c_ar),
+        "arrive_date":  text_array(src, c_ard),
+    })
+    # 담당자 없는 행(아직 작업 안 된 아이템)은 건너뜀
+    return table.filter(pc.or_(pc.not_equal(table["approver"], ""), pc.not_equal(table["arriver"], "")))
+
+
+# ===== 📦 재무 ERP raw data 전체 (금액대조·송금이익 + 근태) =====
+def rawdata_table(df: pd.DataFrame) -> pa.Table | None:
+    """금액·환율 포함 전체 행 컬럼들 (Arrow). 아이템번호 컬럼이 없으면 None(전송 건너뜀)."""
+    cols = df.columns
+    c_item = resolve_header(cols, "아이템번호")
+    c_tot  = resolve_header(cols, "합계_원화_", "합계원화", "합계(원화)")
+    c_unit = resolve_header(cols, "단가_원화_", "단가원화", "단가(원화)")
+    c_qty  = resolve_header(cols, "최초_주문수량", "최초주문수량")   # ⚠️ 첫 실행 후 금액대조 빵꾸 수로 정상 여부 확인
+    c_fee  = resolve_header(cols, "수수료_원화_", "수수료원화", "수수료(원화)")
+    c_ship = resolve_header(cols, "현지배송비_원화_", "현지배송비원화", "현지배송비(원화)")
+    c_etc  = resolve_header(cols, "기타금액_원화_", "기타금액원화", "기타금액(원화)")
+    c_stat = resolve_header(cols, "주문상태")
+    c_fx   = resolve_header(cols, "환율")
+    c_ap   = resolve_header(cols, "담당자1")
+    c_apd  = resolve_header(cols, "승인일")
+    c_ar   = resolve_header(cols, "담당자2")
+    c_ard  = resolve_header(cols, "도착일")
+    if not c_item:
+        print("⚠️ 아이템번호 컬럼 없음 → raw data 전송 건너뜀")
+        return None
+
+    src = arrow_view(df, dict.fromkeys(c for c in (
+        c_item, c_tot, c_unit, c_qty, c_fee, c_ship, c_etc, c_stat, c_fx, c_ap, c_apd, c_ar, c_ard) if c))
+    table = pa.table({
+        "item_no":      text_array(src, c_item),
+        "total_krw":    text_array(src, c_tot),
+        "unit_krw":     text_array(src, c_unit),
+        "init_qty":     text_array(src, c_qty),
+        "fee_krw":      text_array(src, c_fee),
+        "ship_krw":     text_array(src, c_ship),
+        "etc_krw":      text_array(src, c_etc),
+        "status":       text_array(src, c_stat),
+        "fx":           text_array(src, c_fx),
+        "approver":     text_array(src, c_ap),
+        "approve_date": text_array(src, c_apd),
+        "arriver":      text_array(src, c_ar),
+        "arrive_date":  text_array(src, c_ard),
+    })
+    return table.filter(pc.not_equal(table["item_no"], ""))
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+# =====================================================================
+# 단계별 계측 (span)
+#
+#   with instrument.span("bigquery_load", rows=len(df)) as sp:
+#       ...
+#       sp.add(bytes=...)
+#
+#   @instrument.span("customs_rate")
+#   def get_customs_rate(): ...
+#
+#   span 하나마다 벽시계 시간, CPU 시간, 최대 RSS(프로세스 high-water mark), 행 수/바이트,
+#   성공 여부를 남긴다. 끝날 때마다 run_log.event("span", ...) 로 log*.jsonl 에 한 줄,
+#   프로세스 종료 시 전체 요약을 run_summary_<스크립트>.json 으로 쓴다(워크플로우 아티팩트).
+#
+#   선택 출력:
+#     PROM_TEXTFILE_DIR            → <dir>/<스크립트>.prom (node_exporter textfile collector 형식)
+#     OTEL_EXPORTER_OTLP_ENDPOINT  → opentelemetry 가 설치돼 있으면 span 을 OTLP 로 내보냄
+#
+#   표준 라이브러리만 필수. (Windows 로컬 실행엔 resource 모듈이 없어 RSS 는 비워 둔다)
+# =====================================================================
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import ContextDecorator
+from datetime import datetime, timezone
+
+import run_log
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_lock = threading.Lock()
+_local = threading.local()
+_spans: list[dict] = []
+_started_at = time.time()
+_atexit_registered = False
+
+
+def peak_rss_mb() -> float | None:
+    """프로세스 최대 RSS(MB). Linux ru_maxrss 는 KB, macOS 는 바이트."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def _stack() -> list[str]:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def _run_name() -> str:
+    return run_log._run_name or os.path.splitext(os.path.basename(sys.argv[0] or "run"))[0]
+
+
+class span(ContextDecorator):
+    """단계 하나를 재는 context manager / decorator. 중첩하면 path 가 "상위/하위" 로 남는다."""
+
+    def __init__(self, name: str, **fields):
+        self.name = name
+        self.fields = dict(fields)
+
+    def _recreate_cm(self):
+        # decorator 로 쓸 때 호출마다 새 span
+        return span(self.name, **self.fields)
+
+    def add(self, **fields) -> None:
+        """rows / bytes 등 단계 도중에 알게 된 값을 붙인다. 숫자는 누적."""
+        for k, v in fields.items():
+            if isinstance(v, (int, float)) and isinstance(self.fields.get(k), (int, float)):
+                self.fields[k] += v
+            else:
+                self.fields[k] = v
+
+    def __enter__(self) -> "span":
+        global _atexit_registered
+        stack = _stack()
+        stack.append(self.name)
+        self.path = "/".join(stack)
+        self.t0 = time.time()
+        self.cpu0 = time.process_time()
+        with _lock:
+            if not _atexit_registered:
+                atexit.register(write_summary)
+                _atexit_registered = True
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        _stack().pop()
+        rec = {
+            "name": self.name,
+            "path": self.path,
+            "start": self.t0,
+            "wall_s": round(time.time() - self.t0, 3),
+            "cpu_s": round(time.process_time() - self.cpu0, 3),
+            "peak_rss_mb": peak_rss_mb(),
+            "status": "ok" if exc_type is None else "error",
+        }
+        if exc_type is not None:
+            rec["error"] = f"{exc_type.__name__}: {str(exc)[:200]}"
+        rec.update(self.fields)
+        self.record = rec
+        with _lock:
+            _spans.append(rec)
+        run_log.event("span", **{k: v for k, v in rec.items() if k != "start"})
+        return False
+
+
+def summary() -> dict:
+    with _lock:
+        spans = list(_spans)
+    return {
+        "run": _run_name(),
+        "run_id": os.getenv("GITHUB_RUN_ID", ""),
+        "started_at": datetime.fromtimestamp(_started_at, timezone.utc).isoformat(timespec="seconds"),
+        "total_wall_s": round(time.time() - _started_at, 3),
+        "total_cpu_s": round(time.process_time(), 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "spans": spans,
+    }
+
+
+def reset() -> None:
+    """쌓인 span 을 비우고 시작 시각을 지금으로. 상주 프로세스(scheduler_daemon)가 실행 단위로 요약을 끊을 때."""
+    global _started_at
+    with _lock:
+        _spans.clear()
+        _started_at = time.time()
+
+
+def write_summary(path: str | None = None) -> str:
+    """요약 JSON 작성(종료 시 자동). 경로: 인자 > env RUN_SUMMARY_PATH > run_summary_<스크립트>.json"""
+    data = summary()
+    path = path or os.getenv("RUN_SUMMARY_PATH") or f"run_summary_{data['run']}.json"
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+    except OSError as e:
+        print(f"[WARN] 실행 요약 저장 실패: {e}")
+    _write_prometheus(data)
+    _export_otlp(data)
+    return path
+
+
+def _write_prometheus(data: dict) -> None:
+    out_dir = os.getenv("PROM_TEXTFILE_DIR")
+    if not out_dir:
+        return
+    run = data["run"]
+    lines = [
+        "# TYPE pipeline_stage_wall_seconds gauge",
+        "# TYPE pipeline_stage_cpu_seconds gauge",
+        "# TYPE pipeline_stage_rows gauge",
+        "# TYPE pipeline_stage_bytes gauge",
+        "# TYPE pipeline_stage_success gauge",
+    ]
+    for s in data["spans"]:
+        labels = f'run="{run}",stage="{s["path"]}"'
+        lines.append(f"pipeline_stage_wall_seconds{{{labels}}} {s['wall_s']}")
+        lines.append(f"pipeline_stage_cpu_seconds{{{labels}}} {s['cpu_s']}")
+        if isinstance(s.get("rows"), (int, float)):
+            lines.append(f"pipeline_stage_rows{{{labels}}} {s['rows']}")
+        if isinstance(s.get("bytes"), (int, float)):
+            lines.append(f"pipeline_stage_bytes{{{labels}}} {s['bytes']}")
+        lines.append(f"pipeline_stage_success{{{labels}}} {1 if s['status'] == 'ok' else 0}")
+    lines.append(f'pipeline_run_wall_seconds{{run="{run}"}} {data["total_wall_s"]}')
+    if data["peak_rss_mb"] is not None:
+        lines.append(f'pipeline_run_peak_rss_megabytes{{run="{run}"}} {data["peak_rss_mb"]}')
+    os.makedirs(out_dir, exist_ok=True)
+    tmp = os.path.join(out_dir, f".{run}.prom.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, os.path.join(out_dir, f"{run}.prom"))  # collector 가 반쯤 쓴 파일을 안 읽게
+
+
+def _export_otlp(data: dict) -> None:
+    if not os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        return
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    except ImportError:
+        print("[WARN] OTEL_EXPORTER_OTLP_ENDPOINT 설정됐지만 opentelemetry 미설치 → OTLP 전송 건너뜀")
+        return
+    provider = TracerProvider(resource=Resource.create({"service.name": data["run"]}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    tracer = provider.get_tracer("instrument")
+    for s in data["spans"]:
+        start_ns = int(s["start"] * 1e9)
+        otel_span = tracer.start_span(s["path"], start_time=start_ns)
+        for k, v in s.items():
+            if k not in ("start", "path") and isinstance(v, (str, int, float, bool)):
+                otel_span.set_attribute(k, v)
+        otel_span.end(end_time=start_ns + int(s["wall_s"] * 1e9))
+    provider.shutdown()
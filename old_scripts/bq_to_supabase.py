@@ -1,9 +1,41 @@
 import os
 import sys
+import json
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pyarrow as pa
+import pyarrow.compute as pc
 import requests
-import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from google.cloud import bigquery
 
+# =====================================================================
+# BigQuery(goods_csv) → Supabase 동기화
+#
+#   1) BigQuery 테이블을 Storage Read API로 Arrow batch 단위 스트리밍(행마다 파이썬 루프 없음)
+#   2) batch마다 문자열 정리(trim + "nan"/"None" 등 → NULL)를 열 단위 벡터 연산으로
+#   3) 아이템번호 기준 중복 제거(나중 행 우선) 후 3000행 chunk를 동시에 upsert
+#      (연결 풀 공유 세션 + 429/5xx 재시도. upsert는 merge-duplicates라 재시도해도 안전)
+#   4) 전부 성공했을 때만, 이번 동기화에 없는 아이템번호(stale 키)를 지운다.
+#      → 예전처럼 "전체 삭제 후 재삽입"이 아니라서 동기화 도중에도 테이블이 비지 않는다.
+#        chunk가 하나라도 실패하면 삭제 단계로 가지 않고 실패 종료(이전 데이터 + 성공분 유지).
+#
+#   SYNC_MODE=incremental (적재 스크립트를 BQ_SYNC_COLUMNS=1 로 돌려 메타 컬럼이 있어야 함)
+#     - _loaded_at 최댓값이 지난 동기화 때와 같으면(새 적재 없음) 바로 종료.
+#       워터마크는 STATE_FILE(state/supabase_sync.json)에 남는다 → CI 에서는 워크플로우가 state/ 를
+#       actions/cache 로 실행 간 유지해야 이 생략이 동작한다(bq-to-supabase-sync.yml).
+#     - BigQuery(아이템번호, _row_hash)와 Supabase(아이템번호, _row_hash)를 비교해
+#       새로 생기거나 내용이 바뀐 행만 BigQuery에서 읽어 upsert, 사라진 키만 삭제.
+#       → upsert 전송량은 변경 건수에 비례. 단, 비교를 위해 새 적재가 있을 때마다 양쪽의
+#         (아이템번호, _row_hash) 전체를 읽으므로(BigQuery 두 컬럼 스캔 + Supabase 키 페이지 전부)
+#         읽기 비용은 여전히 테이블 크기에 비례한다.
+#     - 같은 아이템번호가 여러 줄이면 _row_seq(export 행 순서)가 큰 행이 이긴다(결정적).
+#     - Supabase 테이블에 _row_hash 컬럼이 있어야 한다(_row_seq/_loaded_at 은 보내지 않음).
+#   SYNC_MODE=full(기본)은 메타 컬럼(_row_hash 포함)을 하나도 보내지 않는다 → 예전 스키마 그대로 동작.
+# =====================================================================
+
 print("🚀 BigQuery -> Supabase 동기화 프로세스 시작...")
 
 # 1. 환경 변수 세팅
@@ -15,84 +47,299 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 SUPABASE_TABLE = os.getenv("SUPABASE_TABLE")
 
+SYNC_MODE = (os.getenv("SYNC_MODE") or "full").strip().lower()   # full / incremental
+
+KEY_COLUMN = "아이템번호"
+HASH_COLUMN = "_row_hash"
+SEQ_COLUMN = "_row_seq"
+LOADED_COLUMN = "_loaded_at"
+# BigQuery 쪽 메타라 Supabase로는 안 보내는 컬럼. _row_hash 는 증분 모드에서만 보낸다
+# (full 모드 대상 테이블엔 그 컬럼이 없을 수 있음 → 있으면 chunk 전부 거절)
+BQ_ONLY_COLUMNS = (SEQ_COLUMN, LOADED_COLUMN) + (() if SYNC_MODE == "incremental" else (HASH_COLUMN,))
+STATE_FILE = Path(os.getenv("STATE_DIR") or "state") / "supabase_sync.json"
+CHUNK_SIZE = int(os.getenv("SUPABASE_CHUNK_SIZE") or 3000)
+WORKERS = int(os.getenv("SUPABASE_WORKERS") or 4)
+DELETE_CHUNK = 200          # in.(...) 필터 한 번에 넣을 키 수(URL 길이 제한)
+KEY_PAGE_SIZE = 1000        # PostgREST 기본 max-rows
+
+# DB에 NULL로 넣을 문자열
+NULL_STRINGS = ["", "nan", "None", "<NA>", "NaT"]
+
 if not all([PROJECT_ID, DATASET_ID, TABLE_ID, SUPABASE_URL, SUPABASE_KEY, SUPABASE_TABLE]):
     print("❌ 에러: 필수 환경 변수가 누락되었습니다.")
     sys.exit(1)
 
-# 2. BigQuery에서 데이터 가져오기
-print(f"📥 BigQuery에서 데이터 다운로드 중... (`{DATASET_ID}.{TABLE_ID}`)")
-try:
-    client = bigquery.Client(project=PROJECT_ID)
-    query = f"SELECT * FROM `{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}`"
-    df = client.query(query).to_dataframe()
-    
-    # 중복 데이터 완벽 제거
-    if '아이템번호' in df.columns:
-        df['아이템번호'] = df['아이템번호'].astype(str).str.strip()
-        df = df.drop_duplicates(subset=['아이템번호'], keep='last')
-
-    # DB용 빈칸(None) 처리
-    df = df.astype(object).where(pd.notnull(df), None)
-    records = df.to_dict(orient="records")
-    
-    for row in records:
-        for key, value in row.items():
-            if isinstance(value, str):
-                cleaned_val = value.strip()
-                if cleaned_val in ["", "nan", "None", "<NA>", "NaT"]:
-                    row[key] = None
-                else:
-                    row[key] = cleaned_val
-
-    print(f"✅ 데이터 전처리 완료: 최종 전송 대기 {len(records)}건")
-except Exception as e:
-    print(f"❌ BigQuery 읽기 실패: {e}")
-    sys.exit(1)
-
-if not records:
-    print("⚠️ 전송할 데이터가 없습니다.")
-    sys.exit(0)
-
-# 3. Supabase API 세팅
 API_URL = f"{SUPABASE_URL}/rest/v1/{SUPABASE_TABLE}"
 auth_headers = {
     "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}"
+    "Authorization": f"Bearer {SUPABASE_KEY}",
 }
 
-# 4. 🧹 [핵심] 완벽한 기존 데이터 삭제 (아이템번호 기준)
-print("🗑️ 기존 Supabase 데이터 진짜 삭제 중...")
-try:
-    # 아이템번호가 존재하는 모든 줄을 삭제 = 전체 삭제
-    delete_url = f"{API_URL}?아이템번호=not.is.null" 
-    requests.delete(delete_url, headers=auth_headers, timeout=60)
-    print("✅ 기존 데이터 삭제 완료!")
-except Exception as e:
-    print(f"❌ 데이터 삭제 통신 에러: {e}")
-
-# 5. 🚀 [핵심] 완벽한 덮어쓰기(Upsert) 설정
-insert_headers = auth_headers.copy()
-insert_headers["Content-Type"] = "application/json"
-insert_headers["Prefer"] = "return=minimal, resolution=merge-duplicates"
-
-# 💡 명시적으로 "아이템번호가 겹치면 무조건 덮어써라" 라고 API에 타겟 지정
-upsert_url = f"{API_URL}?on_conflict=아이템번호"
-
-chunk_size = 3000
-total_chunks = (len(records) // chunk_size) + 1
-
-for i in range(0, len(records), chunk_size):
-    chunk = records[i : i + chunk_size]
+
+def make_session(pool_size: int) -> requests.Session:
+    """스레드들이 같이 쓰는 연결 풀 세션. 429/5xx·연결 오류는 지수 백오프로 재시도."""
+    retry = Retry(
+        total=5,
+        backoff_factor=1.0,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST", "DELETE"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(auth_headers)
+    return session
+
+
+def clean_batch(batch: pa.RecordBatch) -> pa.RecordBatch:
+    """문자열 열: 앞뒤 공백 제거 + NULL_STRINGS → NULL. (열 단위 벡터 연산)"""
+    null_set = pa.array(NULL_STRINGS)
+    cols = []
+    for col in batch.columns:
+        if pa.types.is_string(col.type) or pa.types.is_large_string(col.type):
+            col = pc.utf8_trim_whitespace(col)
+            col = pc.if_else(pc.is_in(col, value_set=null_set), pa.nulls(len(col), col.type), col)
+        cols.append(col)
+    return pa.RecordBatch.from_arrays(cols, names=batch.schema.names)
+
+
+FULL_TABLE = f"`{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}`"
+
+
+def read_bigquery(query: str | None = None, params: list | None = None) -> pa.Table:
+    """BigQuery 쿼리 결과를 Arrow batch로 스트리밍해 정리한 뒤 하나의 Arrow 테이블로 모은다."""
+    from google.cloud import bigquery_storage
+
+    client = bigquery.Client(project=PROJECT_ID)
+    query = query or f"SELECT * FROM {FULL_TABLE}"
+    job_config = bigquery.QueryJobConfig(query_parameters=params or [])
+    rows = client.query(query, job_config=job_config).result()
+    batches = [
+        clean_batch(b)
+        for b in rows.to_arrow_iterable(bqstorage_client=bigquery_storage.BigQueryReadClient())
+    ]
+    if not batches:
+        return pa.table({})
+    return pa.Table.from_batches(batches)
+
+
+def dedupe_last(table: pa.Table, key: str) -> pa.Table:
+    """key 가 비어 있는 행은 버리고, 같은 key 는 나중 행만 남긴다(원래 순서 유지)."""
+    keys = pc.utf8_trim_whitespace(pc.cast(table.column(key), pa.string()))
+    table = table.set_column(table.schema.get_field_index(key), key, keys)
+    table = table.filter(pc.invert(pc.is_null(keys)))
+    idx = pa.array(range(table.num_rows), pa.int64())
+    last = (
+        pa.table({key: table.column(key), "__idx": idx})
+        .group_by(key)
+        .aggregate([("__idx", "max")])
+        .column("__idx_max")
+    )
+    return table.take(pc.take(last, pc.sort_indices(last)))
+
+
+def upsert_chunk(session: requests.Session, chunk: pa.Table) -> tuple[int, str]:
+    body = json.dumps(chunk.to_pylist(), ensure_ascii=False, default=str).encode("utf-8")
+    resp = session.post(
+        f"{API_URL}?on_conflict={KEY_COLUMN}",
+        data=body,
+        headers={
+            "Content-Type": "application/json",
+            "Prefer": "return=minimal, resolution=merge-duplicates",
+        },
+        timeout=120,
+    )
+    return resp.status_code, resp.text[:300]
+
+
+def fetch_remote(session: requests.Session, value_column: str | None = None) -> dict[str, str | None]:
+    """Supabase 테이블의 아이템번호 → value_column 값 (페이지 단위). value_column 이 없으면 값은 None."""
+    select = KEY_COLUMN if not value_column else f"{KEY_COLUMN},{value_column}"
+    out: dict[str, str | None] = {}
+    offset = 0
+    while True:
+        resp = session.get(
+            f"{API_URL}?select={select}&order={KEY_COLUMN}",
+            headers={"Range-Unit": "items", "Range": f"{offset}-{offset + KEY_PAGE_SIZE - 1}"},
+            timeout=60,
+        )
+        resp.raise_for_status()
+        page = resp.json()
+        for r in page:
+            if r.get(KEY_COLUMN) is not None:
+                out[str(r[KEY_COLUMN])] = r.get(value_column) if value_column else None
+        if len(page) < KEY_PAGE_SIZE:
+            return out
+        offset += KEY_PAGE_SIZE
+
+
+def _in_filter(values: list[str]) -> str:
+    quoted = ",".join('"' + v.replace("\\", "\\\\").replace('"', '\\"') + '"' for v in values)
+    return f"in.({quoted})"
+
+
+def delete_keys(session: requests.Session, keys: list[str]) -> int:
+    for i in range(0, len(keys), DELETE_CHUNK):
+        part = keys[i: i + DELETE_CHUNK]
+        resp = session.delete(API_URL, params={KEY_COLUMN: _in_filter(part)}, timeout=60)
+        if resp.status_code not in (200, 204):
+            raise RuntimeError(f"삭제 실패: {resp.status_code} {resp.text[:300]}")
+    return len(keys)
+
+
+def delete_stale(session: requests.Session, synced_keys: set[str]) -> int:
+    """이번 동기화에 없는 키만 지운다."""
+    return delete_keys(session, sorted(set(fetch_remote(session)) - synced_keys))
+
+
+def drop_bq_only(table: pa.Table) -> pa.Table:
+    return table.drop_columns([c for c in BQ_ONLY_COLUMNS if c in table.column_names])
+
+
+def upsert_all(session: requests.Session, table: pa.Table) -> list[int]:
+    """CHUNK_SIZE 단위로 나눠 동시에 upsert. 실패한 chunk 번호 목록을 반환."""
+    chunks = [table.slice(i, CHUNK_SIZE) for i in range(0, table.num_rows, CHUNK_SIZE)]
+    total_chunks = len(chunks)
+    failed = []
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        futures = {pool.submit(upsert_chunk, session, c): n for n, c in enumerate(chunks, 1)}
+        for fut in as_completed(futures):
+            n = futures[fut]
+            try:
+                status, text = fut.result()
+            except Exception as e:
+                status, text = None, f"{type(e).__name__}: {e}"
+            if status in (200, 201, 204):
+                print(f"📡 [{n}/{total_chunks}회차] 덮어쓰기 전송 성공")
+            else:
+                print(f"❌ [{n}/{total_chunks}회차] 실패: {status} {text}")
+                failed.append(n)
+    return sorted(failed)
+
+
+# ===== 증분 동기화 =====
+_KEY_EXPR = f"TRIM(CAST(`{KEY_COLUMN}` AS STRING))"
+
+
+def dedup_query(select: str, where: str = "") -> str:
+    """아이템번호별로 _row_seq 가 가장 큰 행만 남기는 쿼리."""
+    return f"""
+        SELECT {select} FROM {FULL_TABLE}
+        WHERE `{KEY_COLUMN}` IS NOT NULL AND {_KEY_EXPR} != '' {where}
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY {_KEY_EXPR} ORDER BY `{SEQ_COLUMN}` DESC) = 1
+    """
+
+
+def load_state() -> dict:
+    try:
+        return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state: dict) -> None:
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    STATE_FILE.write_text(json.dumps(state, ensure_ascii=False), encoding="utf-8")
+
+
+def incremental_sync(session: requests.Session) -> None:
+    # 1) 워터마크: 지난 동기화 이후 새 적재가 없으면 종료
+    loaded = read_bigquery(f"SELECT CAST(MAX(`{LOADED_COLUMN}`) AS STRING) AS v FROM {FULL_TABLE}")
+    loaded_at = loaded.column("v")[0].as_py() if loaded.num_rows else None
+    state = load_state()
+    if loaded_at and state.get("loaded_at") == loaded_at:
+        print(f"✅ 새 적재 없음(_loaded_at={loaded_at}) → 동기화 생략")
+        return
+
+    # 2) 키·해시 비교 (BigQuery는 두 컬럼만 스캔)
+    bq = read_bigquery(dedup_query(f"{_KEY_EXPR} AS k, `{HASH_COLUMN}` AS h"))
+    if bq.num_rows == 0:
+        # 빈 적재로 Supabase 전체가 삭제되지 않게 여기서 멈춘다
+        print("⚠️ BigQuery 결과가 비어 있습니다 → 동기화 생략")
+        return
+    bq_hashes = dict(zip(bq.column("k").to_pylist(), bq.column("h").to_pylist()))
+    remote = fetch_remote(session, HASH_COLUMN)
+    changed = [k for k, h in bq_hashes.items() if remote.get(k) != h]
+    removed = sorted(set(remote) - set(bq_hashes))
+    print(f"[INFO] BigQuery {len(bq_hashes):,}건 / Supabase {len(remote):,}건 → "
+          f"변경·신규 {len(changed):,}건, 삭제 {len(removed):,}건")
+
+    # 3) 바뀐 행만 읽어 upsert
+    if changed:
+        if len(changed) > len(bq_hashes) // 2:
+            rows = read_bigquery(dedup_query("*"))   # 대부분 바뀌었으면 필터 없이 전체가 싸다
+        else:
+            rows = read_bigquery(
+                dedup_query("*", f"AND {_KEY_EXPR} IN UNNEST(@keys)"),
+                [bigquery.ArrayQueryParameter("keys", "STRING", changed)],
+            )
+        keys = pc.utf8_trim_whitespace(pc.cast(rows.column(KEY_COLUMN), pa.string()))
+        rows = drop_bq_only(rows.set_column(rows.schema.get_field_index(KEY_COLUMN), KEY_COLUMN, keys))
+        failed = upsert_all(session, rows)
+        if failed:
+            print(f"🚨 {len(failed)}개 chunk 실패 {failed} → 삭제·워터마크 갱신 생략(다음 실행에서 재시도)")
+            sys.exit(1)
+
+    # 4) 사라진 키 삭제
+    if removed:
+        print(f"🗑️ 사라진 아이템번호 삭제: {delete_keys(session, removed)}건")
+
+    save_state({"loaded_at": loaded_at})
+    print("🎉 BigQuery -> Supabase 증분 동기화 종료!")
+
+
+def main() -> None:
+    session = make_session(WORKERS)
+    if SYNC_MODE == "incremental":
+        print(f"📥 증분 동기화 (`{DATASET_ID}.{TABLE_ID}` → {SUPABASE_TABLE})")
+        try:
+            incremental_sync(session)
+        except Exception as e:
+            print(f"❌ 증분 동기화 실패: {type(e).__name__}: {e}")
+            sys.exit(1)
+        return
+
+    # 2. BigQuery에서 데이터 가져오기
+    print(f"📥 BigQuery에서 데이터 스트리밍 중... (`{DATASET_ID}.{TABLE_ID}`)")
     try:
-        response = requests.post(upsert_url, headers=insert_headers, json=chunk, timeout=60)
-        current_chunk = (i // chunk_size) + 1
-        
-        if response.status_code in [200, 201, 204]:
-            print(f"📡 [{current_chunk}/{total_chunks}회차] 덮어쓰기 전송 성공")
+        table = read_bigquery()
+        if SEQ_COLUMN in table.column_names:
+            table = table.sort_by(SEQ_COLUMN)   # 중복 시 export 뒤쪽 행이 이기도록(결정적 순서)
+        if KEY_COLUMN in table.column_names:
+            table = dedupe_last(table, KEY_COLUMN)
         else:
-            print(f"❌ [{current_chunk}/{total_chunks}회차] 실패: {response.text}")
-            
+            print(f"❌ '{KEY_COLUMN}' 컬럼이 없습니다.")
+            sys.exit(1)
+        print(f"✅ 데이터 전처리 완료: 최종 전송 대기 {table.num_rows}건")
     except Exception as e:
-        print(f"❌ 전송 중 통신 에러 발생: {e}")
+        print(f"❌ BigQuery 읽기 실패: {e}")
+        sys.exit(1)
+
+    if table.num_rows == 0:
+        # 빈 결과로 전체 삭제가 일어나지 않게 여기서 멈춘다
+        print("⚠️ 전송할 데이터가 없습니다.")
+        sys.exit(0)
+
+    # 3. 🚀 chunk 동시 upsert
+    failed = upsert_all(session, drop_bq_only(table))
+    if failed:
+        print(f"🚨 {len(failed)}개 chunk 실패 {failed} → stale 삭제 생략(기존 데이터 유지)")
+        sys.exit(1)
+
+    # 4. 🧹 이번 동기화에 없는 키만 삭제
+    print("🗑️ 사라진 아이템번호 삭제 중...")
+    synced = set(table.column(KEY_COLUMN).to_pylist())
+    try:
+        deleted = delete_stale(session, synced)
+        print(f"✅ stale 삭제 완료: {deleted}건")
+    except Exception as e:
+        print(f"❌ stale 삭제 실패(upsert는 완료됨): {e}")
+        sys.exit(1)
+
+    print("🎉 BigQuery -> Supabase 동기화 완벽 종료!")
+
 
-print("🎉 BigQuery -> Supabase 동기화 완벽 종료!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+# =====================================================================
+# 전송 대기함 (outbox): 서버 POST 본문을 먼저 디스크에 남기고 보낸다
+#
+#   box = Outbox()
+#   box.enqueue("packing", body, rows=n)          # 커밋된 뒤에야 전송 시도
+#   box.drain("packing", send)                    # 오래된 것부터 차례로, 실패하면 거기서 멈춤
+#
+#   패킹/재무/raw data POST 가 실패하면 예전에는 그 회차 데이터가 그냥 사라졌다(다음 30분 크롤링까지).
+#   여기서는 본문이 SQLite(STATE_DIR/outbox.sqlite3, 워크플로우 actions/cache 로 실행 간 유지)에
+#   남아 있다가 다음 실행(변경 없음으로 건너뛴 실행 포함)이 다시 크롤링하지 않고 그대로 재전송한다.
+#
+#   - 목적지(dest)마다 순서 보장: 앞 건이 안 나가면 뒤 건도 보내지 않는다
+#   - supersede=True(기본): 같은 목적지에 아직 안 나간 이전 본문은 'superseded' 로 접는다
+#     (goods 전송은 매번 전체 목록이라 최신 것 하나만 보내면 된다)
+#   - URL 키·Basic 인증 비밀번호는 저장하지 않는다. 보낼 때마다 호출하는 쪽(send)이 env 에서 읽음
+#   - 보낸 건은 OUTBOX_KEEP_DAYS 일(기본 3) 뒤 정리
+#
+#   OUTBOX_PATH      DB 위치 (기본 STATE_DIR/outbox.sqlite3)
+#   OUTBOX_RETRIES   한 번 drain 할 때 건당 시도 횟수 (기본 3, 사이사이 지수 대기)
+#
+#   python outbox.py list [--all]
+#   python outbox.py show <ID> > body.json       # 본문 확인(재무 서버 대조용)
+#   python outbox.py drop <ID>                   # 더 이상 보내지 않음
+# =====================================================================
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable
+
+STATE_DIR = Path(os.getenv("STATE_DIR") or "state")
+OUTBOX_PATH = Path(os.getenv("OUTBOX_PATH") or STATE_DIR / "outbox.sqlite3")
+OUTBOX_RETRIES = int(os.getenv("OUTBOX_RETRIES") or 3)
+OUTBOX_KEEP_DAYS = float(os.getenv("OUTBOX_KEEP_DAYS") or 3)
+RETRY_BASE_S = 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    dest        TEXT    NOT NULL,
+    created_at  TEXT    NOT NULL,
+    rows        INTEGER NOT NULL DEFAULT 0,
+    bytes       INTEGER NOT NULL,
+    body        BLOB    NOT NULL,           -- zlib
+    status      TEXT    NOT NULL DEFAULT 'pending',   -- pending / sent / superseded / dropped
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    last_error  TEXT    NOT NULL DEFAULT '',
+    done_at     TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (dest, status, id);
+"""
+
+
+@dataclass
+class Message:
+    id: int
+    dest: str
+    created_at: str       # UTC ISO
+    rows: int
+    bytes: int
+    status: str
+    attempts: int
+    last_error: str
+
+    @property
+    def age_s(self) -> float:
+        return (datetime.now(timezone.utc) - datetime.fromisoformat(self.created_at)).total_seconds()
+
+
+_COLUMNS = "id, dest, created_at, rows, bytes, status, attempts, last_error"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class Outbox:
+    def __init__(self, path: Path | str | None = None):
+        self.path = Path(path or OUTBOX_PATH)
+
+    def _connect(self) -> sqlite3.Connection:
+        """호출마다 새 연결 → 스레드(목적지별 drain)끼리 연결을 공유하지 않는다."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    # ----- 쓰기 -----
+    def enqueue(self, dest: str, body: bytes, rows: int = 0, supersede: bool = True) -> int:
+        """본문을 저장(커밋)하고 ID 반환. supersede 면 같은 목적지의 대기 중인 이전 본문은 접는다."""
+        packed = zlib.compress(body, 1)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if supersede:
+                conn.execute(
+                    "UPDATE outbox SET status='superseded', done_at=? WHERE dest=? AND status='pending'",
+                    (_now(), dest),
+                )
+            cur = conn.execute(
+                "INSERT INTO outbox (dest, created_at, rows, bytes, body) VALUES (?, ?, ?, ?, ?)",
+                (dest, _now(), rows, len(body), packed),
+            )
+            conn.execute("COMMIT")
+            msg_id = cur.lastrowid
+        finally:
+            conn.close()
+        self.cleanup()
+        return msg_id
+
+    def _finish(self, msg_id: int, status: str) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("UPDATE outbox SET status=?, done_at=? WHERE id=?", (status, _now(), msg_id))
+        finally:
+            conn.close()
+
+    def _failed(self, msg_id: int, error: BaseException) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE outbox SET attempts=attempts+1, last_error=? WHERE id=?",
+                (f"{type(error).__name__}: {error}"[:500], msg_id),
+            )
+        finally:
+            conn.close()
+
+    def drop(self, msg_id: int) -> bool:
+        conn = self._connect()
+        try:
+            cur = conn.execute(
+                "UPDATE outbox SET status='dropped', done_at=? WHERE id=? AND status='pending'", (_now(), msg_id)
+            )
+            return cur.rowcount > 0
+        finally:
+            conn.close()
+
+    def cleanup(self, keep_days: float | None = None) -> int:
+        """다 처리된(pending 이 아닌) 건 중 keep_days 일 지난 것을 지운다."""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=OUTBOX_KEEP_DAYS if keep_days is None else keep_days)
+        conn = self._connect()
+        try:
+            cur = conn.execute(
+                "DELETE FROM outbox WHERE status != 'pending' AND done_at < ?",
+                (cutoff.isoformat(timespec="seconds"),),
+            )
+            return cur.rowcount
+        finally:
+            conn.close()
+
+    # ----- 읽기 -----
+    def messages(self, dest: str | None = None, pending_only: bool = True) -> list[Message]:
+        """오래된 것 → 최근 순."""
+        if not self.path.exists():
+            return []
+        where, args = [], []
+        if pending_only:
+            where.append("status='pending'")
+        if dest is not None:
+            where.append("dest=?")
+            args.append(dest)
+        sql = f"SELECT {_COLUMNS} FROM outbox" + (f" WHERE {' AND '.join(where)}" if where else "") + " ORDER BY id"
+        conn = self._connect()
+        try:
+            return [Message(*row) for row in conn.execute(sql, args)]
+        finally:
+            conn.close()
+
+    def pending_dests(self) -> list[str]:
+        return sorted({m.dest for m in self.messages()})
+
+    def body(self, msg: Message | int) -> bytes:
+        msg_id = msg if isinstance(msg, int) else msg.id
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT body FROM outbox WHERE id=?", (msg_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            raise KeyError(f"outbox 항목 없음: {msg_id}")
+        return zlib.decompress(row[0])
+
+    # ----- 전송 -----
+    def drain(self, dest: str, send: Callable[[Message, bytes], object],
+              retries: int | None = None) -> list:
+        """dest 의 대기 건을 오래된 것부터 send(msg, body) 로 보낸다. 성공한 send 반환값 목록.
+        한 건이 retries 번 모두 실패하면 그 건과 뒤 건은 남겨 두고 마지막 예외를 다시 던진다."""
+        retries = max(1, OUTBOX_RETRIES if retries is None else retries)
+        results = []
+        for msg in self.messages(dest):
+            body = self.body(msg)
+            for attempt in range(1, retries + 1):
+                try:
+                    results.append(send(msg, body))
+                    self._finish(msg.id, "sent")
+                    break
+                except Exception as e:
+                    self._failed(msg.id, e)
+                    if attempt == retries:
+                        print(f"[WARN] outbox #{msg.id} ({dest}) 전송 실패 {msg.attempts + attempt}회째 → 다음 실행에서 재전송")
+                        raise
+                    delay = RETRY_BASE_S * 2 ** (attempt - 1) * random.uniform(0.7, 1.0)
+                    print(f"[INFO] outbox #{msg.id} ({dest}) 전송 실패: {type(e).__name__}: {e} → {delay:.1f}초 후 재시도")
+                    time.sleep(delay)
+        return results
+
+
+# ===== CLI =====
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="전송 대기함(outbox) 확인")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_list = sub.add_parser("list", help="대기 중인 본문 (--all: 보낸 것 포함)")
+    p_list.add_argument("--all", action="store_true")
+    p_show = sub.add_parser("show", help="본문 출력")
+    p_show.add_argument("id", type=int)
+    p_drop = sub.add_parser("drop", help="대기 중인 본문을 보내지 않음으로 표시")
+    p_drop.add_argument("id", type=int)
+    args = ap.parse_args(argv)
+
+    box = Outbox()
+    if args.cmd == "list":
+        msgs = box.messages(pending_only=not args.all)
+        if not msgs:
+            print("(없음)")
+        for m in msgs:
+            err = f"  {m.last_error}" if m.last_error else ""
+            print(f"#{m.id:<6} {m.dest:<10} {m.status:<10} {m.created_at}  {m.rows:>8,}행 "
+                  f"{m.bytes / 1e6:7.2f} MB  시도 {m.attempts}{err}")
+    elif args.cmd == "show":
+        sys.stdout.buffer.write(box.body(args.id))
+    elif args.cmd == "drop":
+        if not box.drop(args.id):
+            print(f"❌ 대기 중인 항목이 아닙니다: #{args.id}")
+            sys.exit(1)
+        print(f"✅ #{args.id} 전송 취소")
+
+
+if __name__ == "__main__":
+    main()
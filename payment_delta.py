@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+# =====================================================================
+# 결제내역 · 예치금 행 단위 증분 전송 (PAY_DELTA=1)
+#
+#   auto_download_payment 는 연초부터 오늘까지의 .xls 전체를 매일 통째로 보내고, 재무 ERP 는 모든
+#   결제번호를 다시 파싱·upsert 한다. 여기서는
+#     1) .xls(실제로는 HTML 표)를 직접 파싱해 결제번호(PAY_DELTA_KEY) 기준 행으로 정규화
+#     2) 서버가 마지막으로 받은 내용의 스냅샷(snapshot_store: STATE_DIR/snapshots/payment|deposit)과 비교
+#     3) 새로 생기거나 바뀐 행 + 사라진 결제번호만 보낸다
+#        - FINANCE_PAYMENT_DELTA_URL 이 있으면 그 엔드포인트로 JSON
+#            {"kind", "key", "columns", "upsert": [[...]], "removed": [...], "base", "snapshot"}
+#        - 없으면 원본 파일에서 바뀐 행만 남긴 작은 .xls 를 기존 파일 엔드포인트로(서버 parsePayEnd 그대로).
+#          이 경우 사라진 행은 전달되지 않으므로 아래 전체 전송이 정리한다
+#      바뀐 게 없으면 아무것도 보내지 않는다 → 전송량·서버 파싱 시간이 달력이 아니라 실제 변동만큼.
+#
+#   전체 파일 전송(예전 방식, 대조)으로 돌아가는 경우:
+#     - 기준 스냅샷 없음(첫 실행 · 캐시 만료 · 스냅샷 보존 기간 지남)
+#     - 마지막 전체 전송 후 PAY_FULL_EVERY_DAYS 일(기본 7) 지남
+#     - 그 밖에 증분 경로 어디서든 실패(HTML 표 아님 · 결제번호 컬럼 없음/중복 · pandas 미설치 · 증분 POST 실패)
+#       → [WARN] 후 같은 실행에서 전체 전송. 기준 스냅샷은 전송이 성공한 뒤에만 옮긴다(누락 없음).
+#   상태: STATE_DIR/payment_delta.json (종류별 서버가 받은 스냅샷 ID · 마지막 전체 전송 시각)
+# =====================================================================
+
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from html.parser import HTMLParser
+from pathlib import Path
+
+import run_log
+import instrument
+
+STATE_DIR = Path(os.getenv("STATE_DIR") or "state")
+DELTA_STATE = STATE_DIR / "payment_delta.json"
+DELTA_URL = os.getenv("FINANCE_PAYMENT_DELTA_URL")         # 예: http://<서버IP>:8080/api/payment/delta
+DELTA_KEY = os.getenv("PAY_DELTA_KEY") or "결제번호"
+FULL_EVERY_DAYS = float(os.getenv("PAY_FULL_EVERY_DAYS") or 7)
+
+# 다운로드 라벨 → 스냅샷 이름
+KINDS = {"결제내역": "payment", "예치금": "deposit"}
+
+
+# ===== 파싱 =====
+@dataclass
+class Export:
+    """HTML 표 export. rows 는 header 길이에 맞춘 셀 문자열, spans 는 원문에서 각 행(<tr>…</tr>)의 위치."""
+    text: str
+    encoding: str
+    columns: list[str]
+    rows: list[list[str]]
+    spans: list[tuple[int, int]]
+
+    def frame(self):
+        import pandas as pd
+
+        return pd.DataFrame(self.rows, columns=self.columns, dtype=str)
+
+    def subset(self, keep: list[int]) -> bytes:
+        """keep 번째 데이터 행만 남긴 같은 형식의 파일 (머리말·헤더·꼬리는 원문 그대로)."""
+        head = self.text[: self.spans[0][0]] if self.spans else self.text
+        tail = self.text[self.spans[-1][1]:] if self.spans else ""
+        body = "".join(self.text[self.spans[i][0]: self.spans[i][1]] for i in keep)
+        return (head + body + tail).encode(self.encoding)
+
+
+class _TableParser(HTMLParser):
+    """표마다 행 목록 [(시작, 끝, [셀 텍스트])]. 닫는 태그가 빠진 구형 ASP 출력도 받아 준다."""
+
+    def __init__(self, text: str):
+        super().__init__(convert_charrefs=True)
+        self._line_starts = [0] + [m.end() for m in re.finditer("\n", text)]
+        self._text = text
+        self.tables: list[list[tuple[int, int, list[str]]]] = []
+        self._stack: list[int] = []           # 열린 table 들의 self.tables 인덱스
+        self._row: list[str] | None = None
+        self._row_start = 0
+        self._cell: list[str] | None = None
+
+    def _offset(self) -> int:
+        line, col = self.getpos()
+        return self._line_starts[line - 1] + col
+
+    def _end_row(self, end: int) -> None:
+        self._end_cell()
+        if self._row is not None and self._stack:
+            self.tables[self._stack[-1]].append((self._row_start, end, self._row))
+        self._row = None
+
+    def _end_cell(self) -> None:
+        if self._cell is not None and self._row is not None:
+            self._row.append(" ".join("".join(self._cell).split()))
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            self._end_row(self._offset())
+            self.tables.append([])
+            self._stack.append(len(self.tables) - 1)
+        elif tag == "tr":
+            pos = self._offset()
+            self._end_row(pos)
+            self._row, self._row_start = [], pos
+        elif tag in ("td", "th"):
+            self._end_cell()
+            if self._row is not None:
+                self._cell = []
+        elif tag == "br" and self._cell is not None:
+            self._cell.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in ("td", "th"):
+            self._end_cell()
+        elif tag == "tr":
+            pos = self._offset()
+            self._end_row(self._text.index(">", pos) + 1)
+        elif tag == "table":
+            self._end_row(self._offset())
+            if self._stack:
+                self._stack.pop()
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def _decode(raw: bytes) -> tuple[str, str]:
+    m = re.search(rb"charset\s*=\s*[\"']?([\w-]+)", raw[:4096], re.I)
+    candidates = ([m.group(1).decode("ascii")] if m else []) + ["utf-8", "cp949"]
+    for enc in candidates:
+        try:
+            return raw.decode(enc), enc
+        except (LookupError, UnicodeDecodeError):
+            continue
+    raise ValueError("인코딩 판별 실패")
+
+
+def parse_export(path: str, key: str = DELTA_KEY) -> Export:
+    """Pmt / DpstDet .xls (HTML 표) → Export. key 컬럼이 있는 헤더 행 아래를 데이터로 본다."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    if raw[:4] in (b"\xd0\xcf\x11\xe0", b"PK\x03\x04"):
+        raise ValueError("진짜 엑셀 파일(HTML 표 아님)")
+    text, encoding = _decode(raw)
+    parser = _TableParser(text)
+    parser.feed(text)
+    parser.close()
+
+    best = None
+    for rows in parser.tables:
+        for i, (_, _, cells) in enumerate(rows):
+            if key in cells:
+                data = [r for r in rows[i + 1:] if any(c for c in r[2])]
+                if best is None or len(data) > len(best[1]):
+                    best = (cells, data)
+                break
+    if best is None:
+        raise ValueError(f"'{key}' 헤더가 있는 표 없음")
+    header, data = best
+    width = len(header)
+    # 빈/중복 헤더 이름은 위치로 구분 (DataFrame 컬럼이 유일해야 비교 가능)
+    seen: dict[str, int] = {}
+    columns = []
+    for i, name in enumerate(header):
+        name = name or f"col{i}"
+        seen[name] = seen.get(name, 0) + 1
+        columns.append(name if seen[name] == 1 else f"{name}.{seen[name] - 1}")
+    rows = [(r[2] + [""] * width)[:width] for r in data]
+    return Export(text, encoding, columns, rows, [(r[0], r[1]) for r in data])
+
+
+# ===== 상태 =====
+def load_state() -> dict:
+    try:
+        with open(DELTA_STATE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state: dict) -> None:
+    DELTA_STATE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = DELTA_STATE.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, DELTA_STATE)
+
+
+def _full_due(entry: dict, now: datetime) -> str | None:
+    """전체 전송이 필요하면 이유, 아니면 None."""
+    if not entry.get("acked"):
+        return "기준 없음"
+    last_full = entry.get("last_full_at")
+    if not last_full or now - datetime.fromisoformat(last_full) >= timedelta(days=FULL_EVERY_DAYS):
+        return f"정기 대조({FULL_EVERY_DAYS:g}일)"
+    return None
+
+
+# ===== 전송 =====
+def send(path: str, label: str) -> bool:
+    """증분으로 처리했으면 True(보낼 게 없었던 경우 포함). False 면 호출한 쪽이 전체 파일을 보낸다.
+    증분 경로의 어떤 실패(pandas 미설치 · 파싱 · 스냅샷 · 증분 POST)도 False → 전체 전송으로 대신한다."""
+    kind = KINDS.get(label)
+    if kind is None:
+        return False
+    state = load_state()
+    entry = state.get(kind, {})
+    now = datetime.now(timezone.utc)
+    reason = _full_due(entry, now)
+    if reason:
+        print(f"[INFO] [{label}] 전체 전송: {reason}")
+        return False
+    try:
+        return _send_delta(path, label, kind, state, entry, now)
+    except Exception as e:
+        print(f"[WARN] [{label}] 증분 전송 불가 → 전체 전송: {type(e).__name__}: {e}")
+        return False
+
+
+def _send_delta(path: str, label: str, kind: str, state: dict, entry: dict, now: datetime) -> bool:
+    import snapshot_store
+
+    with instrument.span("delta_parse", label=label) as sp:
+        export = parse_export(path)
+        df = export.frame()
+        sp.add(rows=len(df))
+    dup = df[DELTA_KEY][df[DELTA_KEY].duplicated()]
+    if len(dup):
+        raise ValueError(f"{DELTA_KEY} 중복 {len(dup)}건 (예: {dup.iloc[0]})")
+
+    store = snapshot_store.SnapshotStore(kind)
+    base = store.get(entry["acked"])
+    if base is None:
+        print(f"[INFO] [{label}] 기준 스냅샷({entry['acked']})이 보존 기간 밖 → 전체 전송")
+        return False
+    with instrument.span("delta_diff", label=label) as sp:
+        delta = snapshot_store.diff(store.load(base), df, key=DELTA_KEY)
+        sp.add(**delta.counts())
+    snap = store.save(df, source=os.path.basename(path))
+    counts = delta.counts()
+    print(f"🔁 [{label}] 직전 전송({base.id}) 대비 {counts}")
+
+    upsert = snapshot_store.pd.concat([delta.added, delta.changed])
+    removed = delta.removed[DELTA_KEY].astype(str).tolist()
+    sent_bytes = 0
+    if delta.is_empty:
+        print(f"✅ [{label}] 바뀐 행 없음 → 전송 생략")
+    elif DELTA_URL:
+        sent_bytes = _post_delta_json(kind, label, upsert, removed, base.id, snap.id)
+    elif len(upsert):
+        if removed:
+            print(f"[INFO] [{label}] 사라진 {len(removed)}건은 파일 방식으로 못 보냄 → 다음 전체 전송에서 정리")
+        keys = set(upsert[DELTA_KEY].astype(str))
+        keep = [i for i, r in enumerate(export.rows) if r[export.columns.index(DELTA_KEY)] in keys]
+        sent_bytes = _post_delta_file(path, label, export.subset(keep), len(keep))
+    else:
+        print(f"[INFO] [{label}] 사라진 행만 {len(removed)}건 → 파일 방식은 보낼 게 없음(다음 전체 전송에서 정리)")
+
+    entry["acked"] = snap.id
+    entry["last_delta_at"] = now.isoformat(timespec="seconds")
+    state[kind] = entry
+    save_state(state)
+    run_log.event("payment_delta", label=label, mode="json" if DELTA_URL else "file",
+                  file_bytes=os.path.getsize(path), sent_bytes=sent_bytes, **counts)
+    return True
+
+
+def _post_delta_json(kind: str, label: str, upsert, removed: list[str], base_id: str, snap_id: str) -> int:
+    import auto_download_payment as payment
+
+    payload = {
+        "kind": kind,
+        "key": DELTA_KEY,
+        "columns": list(upsert.columns),
+        "upsert": upsert.astype(object).fillna("").to_numpy().tolist(),
+        "removed": removed,
+        "base": base_id,
+        "snapshot": snap_id,
+    }
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    print(f"[INFO] [{label}] 증분 전송: upsert {len(upsert):,}건 · 삭제 {len(removed):,}건 ({len(body)/1e3:.1f} KB)")
+    result = payment.post_body(DELTA_URL, body, label, stage="finance_delta_post")
+    print(f"✅ [{label}] 재무 ERP 증분 전송 완료: {result}")
+    return len(body)
+
+
+def _post_delta_file(path: str, label: str, raw: bytes, rows: int) -> int:
+    import auto_download_payment as payment
+
+    stem, ext = os.path.splitext(os.path.basename(path))
+    print(f"[INFO] [{label}] 증분 파일 전송: {rows:,}행")
+    return payment.post_file(raw, f"{stem}_delta{ext}", label)
+
+
+def mark_full(path: str, label: str) -> None:
+    """전체 파일 전송이 성공한 뒤 호출 → 이 파일을 다음 증분의 기준으로. 실패해도 전송은 이미 끝났으니 경고만."""
+    kind = KINDS.get(label)
+    if kind is None:
+        return
+    try:
+        import snapshot_store
+
+        df = parse_export(path).frame()
+        snap = snapshot_store.SnapshotStore(kind).save(df, source=os.path.basename(path))
+    except Exception as e:
+        print(f"[WARN] [{label}] 기준 스냅샷 저장 실패(다음에도 전체 전송): {type(e).__name__}: {e}")
+        return
+    state = load_state()
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    state[kind] = {**state.get(kind, {}), "acked": snap.id, "last_full_at": now}
+    save_state(state)
+    print(f"📸 [{label}] 증분 기준 저장: {snap.id} ({snap.rows:,}행)")
+
+
+# ===== CLI =====
+if __name__ == "__main__":
+    # python payment_delta.py <파일.xls>   → 파싱 결과 확인
+    exp = parse_export(sys.argv[1])
+    print(f"컬럼 {len(exp.columns)}개: {exp.columns}")
+    print(f"행 {len(exp.rows):,}개 (인코딩 {exp.encoding})")
+    for r in exp.rows[:3]:
+        print(r)
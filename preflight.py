@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+# =====================================================================
+# 사전 점검 (preflight): 크롬을 띄우기 전에 싱크가 살아 있는지 몇 초 안에 확인
+#
+#   caps = run_checks({"packing": lambda: http_check(url), "bigquery": bq_check, ...})
+#   caps["packing"].status   # ok / skip(설정 없음) / dead
+#
+#   로그인 → export 다운로드 → 파싱 → BigQuery 적재까지 몇 분을 쓴 뒤에야 URL·인증이 틀린 걸 알던 것을,
+#   점검을 전부 동시에(스레드) 돌려 가장 느린 점검 하나만큼만 기다린다.
+#   점검 함수는 인자 없이 불러서 (설명 문자열) 을 돌려주면 ok, Skip 이면 skip, 그 밖의 예외면 dead.
+#
+#   http_check: DNS → TCP 연결 → HEAD(인증 포함). 인제스트 엔드포인트는 HEAD 를 안 받는 경우가 많아
+#               404/405/501 은 "서버는 살아 있음" 으로 보고, 401/403(인증)·그 밖의 5xx(프록시 뒤 앱 다운) 만 dead.
+#
+#   PREFLIGHT_TIMEOUT_S  점검 하나의 제한 시간 (기본 8초)
+# =====================================================================
+
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Callable
+from urllib.parse import urlsplit
+
+import run_log
+
+PREFLIGHT_TIMEOUT_S = float(os.getenv("PREFLIGHT_TIMEOUT_S") or 8)
+
+
+class Skip(Exception):
+    """설정이 없어 점검(및 그 싱크)을 건너뜀."""
+
+
+@dataclass
+class Capability:
+    name: str
+    status: str           # ok / skip / dead
+    detail: str = ""
+    ms: int = 0
+
+    @property
+    def usable(self) -> bool:
+        return self.status == "ok"
+
+
+# ===== 점검 도구 =====
+def tcp_check(url: str, timeout: float | None = None) -> str:
+    """URL 의 호스트 이름 해석 + TCP 연결. 연결된 주소 반환."""
+    timeout = PREFLIGHT_TIMEOUT_S if timeout is None else timeout
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    try:
+        infos = socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        raise ConnectionError(f"DNS 실패: {parts.hostname} ({e})") from None
+    last = None
+    for family, socktype, proto, _, addr in infos:
+        try:
+            with socket.create_connection(addr[:2], timeout=timeout):
+                return f"{addr[0]}:{port}"
+        except OSError as e:
+            last = e
+    raise ConnectionError(f"TCP 연결 실패: {parts.hostname}:{port} ({last})")
+
+
+def http_check(url: str, auth=None, session=None, timeout: float | None = None) -> str:
+    """tcp_check 후 HEAD. 401/403 · 5xx 면 예외."""
+    import requests
+
+    timeout = PREFLIGHT_TIMEOUT_S if timeout is None else timeout
+    addr = tcp_check(url, timeout)
+    resp = (session or requests).head(url, auth=auth, timeout=timeout, allow_redirects=False)
+    if resp.status_code in (401, 403):
+        raise PermissionError(f"인증 실패 HTTP {resp.status_code}")
+    if resp.status_code >= 500 and resp.status_code != 501:     # 501: HEAD 미구현
+        raise ConnectionError(f"서버 오류 HTTP {resp.status_code}")
+    return f"{addr} HTTP {resp.status_code}"
+
+
+# ===== 실행 =====
+def run_checks(checks: dict[str, Callable[[], str]], timeout: float | None = None) -> dict[str, Capability]:
+    """checks 를 동시에 실행해 {이름: Capability}. 제한 시간 안에 안 끝난 점검은 dead."""
+    timeout = PREFLIGHT_TIMEOUT_S if timeout is None else timeout
+    if not checks:
+        return {}
+
+    def one(name: str, fn: Callable[[], str]) -> Capability:
+        t0 = time.time()
+        try:
+            status, detail = "ok", str(fn() or "")
+        except Skip as e:
+            status, detail = "skip", str(e)
+        except Exception as e:
+            status, detail = "dead", f"{type(e).__name__}: {e}"
+        return Capability(name, status, detail[:300], int((time.time() - t0) * 1000))
+
+    t0 = time.time()
+    pool = ThreadPoolExecutor(max_workers=len(checks), thread_name_prefix="preflight")
+    futures = {name: pool.submit(one, name, fn) for name, fn in checks.items()}
+    # 점검마다 자체 timeout 이 있지만 인증 라이브러리 쪽에서 멈추는 경우까지 여유를 두고 자른다
+    wait(futures.values(), timeout=timeout * 2)
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    caps = {}
+    for name, fut in futures.items():
+        if fut.done():
+            caps[name] = fut.result()
+        else:
+            caps[name] = Capability(name, "dead", f"시간 초과({timeout * 2:g}s)", int(timeout * 2000))
+
+    print(f"🩺 사전 점검 ({time.time() - t0:.1f}s)")
+    for cap in caps.values():
+        mark = {"ok": "✅", "skip": "➖", "dead": "❌"}[cap.status]
+        print(f"  {mark} {cap.name:<10} {cap.status:<5} {cap.ms:>5}ms  {cap.detail}")
+    run_log.event("preflight", duration_s=round(time.time() - t0, 3),
+                  capabilities={n: asdict(c) for n, c in caps.items()})
+    return caps
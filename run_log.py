@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+# =====================================================================
+# 실행 로그 (DualLogger 대체, 공용)
+#
+#   install("log.txt") 한 줄이면
+#     - print() 는 예전처럼 터미널(GitHub Actions 콘솔)에 바로 찍히고,
+#     - 같은 텍스트가 log.txt 에도 남는다. 단 파일 쓰기는 큐에 넣고 백그라운드 스레드
+#       (logging.handlers.QueueListener)가 처리 → print 가 디스크 I/O를 기다리지 않는다.
+#     - event(stage, ...) 로 남긴 구조화 기록은 log.jsonl 에 JSON 한 줄씩 쌓인다.
+#       (stage 이름, 소요시간, 행 수, 전송 바이트, HTTP 상태 등 → 실행 간 추이 분석용)
+#
+#   표준 라이브러리만 쓴다(payment/clobe 워크플로우는 selenium/requests 만 설치).
+# =====================================================================
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+
+_queue: queue.SimpleQueue | None = None
+_listener: logging.handlers.QueueListener | None = None
+_run_name = ""
+_run_id = os.getenv("GITHUB_RUN_ID", "")
+
+
+def _record(**attrs) -> logging.LogRecord:
+    rec = logging.LogRecord("run_log", logging.INFO, __file__, 0, "", None, None)
+    rec.__dict__.update(attrs)
+    return rec
+
+
+class _RawTextHandler(logging.FileHandler):
+    """print 로 들어온 텍스트를 가공 없이 그대로(개행 추가 없이) 파일에 쓴다."""
+
+    def filter(self, record) -> bool:
+        return hasattr(record, "raw_text")
+
+    def emit(self, record) -> None:
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(record.raw_text)
+            if record.raw_text.endswith("\n"):
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+
+class _JsonLinesHandler(logging.FileHandler):
+    """event() 기록을 JSON 한 줄씩 쓴다."""
+
+    def filter(self, record) -> bool:
+        return hasattr(record, "event")
+
+    def emit(self, record) -> None:
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(json.dumps(record.event, ensure_ascii=False, default=str) + "\n")
+            self.flush()
+        except Exception:
+            self.handleError(record)
+
+
+class _QueueTee:
+    """sys.stdout/sys.stderr 자리에 들어가는 객체. 터미널엔 즉시, 파일엔 큐 경유."""
+
+    def __init__(self, terminal, q: queue.SimpleQueue):
+        self.terminal = terminal
+        self.queue = q
+
+    def write(self, message: str) -> int:
+        self.terminal.write(message)
+        if message:
+            self.queue.put_nowait(_record(raw_text=message))
+        return len(message)
+
+    def flush(self) -> None:
+        self.terminal.flush()
+
+    def isatty(self) -> bool:
+        return False
+
+    @property
+    def encoding(self) -> str:
+        return getattr(self.terminal, "encoding", "utf-8")
+
+
+def install(log_path: str, jsonl_path: str | None = None, run_name: str | None = None) -> None:
+    """stdout/stderr 를 터미널 + log_path 로 보내고, event() 기록은 jsonl_path 로.
+    jsonl_path 를 안 주면 log_path 의 확장자를 .jsonl 로 바꾼 경로(log.txt → log.jsonl)."""
+    global _queue, _listener, _run_name
+    if _listener is not None:
+        return
+    if jsonl_path is None:
+        jsonl_path = os.path.splitext(log_path)[0] + ".jsonl"
+    _run_name = run_name or os.path.splitext(os.path.basename(sys.argv[0] or "run"))[0]
+
+    _queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(
+        _queue,
+        _RawTextHandler(log_path, mode="w", encoding="utf-8", delay=True),
+        _JsonLinesHandler(jsonl_path, mode="w", encoding="utf-8", delay=True),
+        respect_handler_level=False,
+    )
+    _listener.start()
+    atexit.register(shutdown)
+    sys.stdout = sys.stderr = _QueueTee(sys.__stdout__, _queue)
+
+
+def shutdown() -> None:
+    """큐에 남은 기록을 모두 파일에 쓰고 리스너를 멈춘다(종료 시 atexit 로 자동 호출)."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for h in _listener.handlers:
+        h.close()
+    _listener = None
+
+
+def event(stage: str, **fields) -> None:
+    """구조화 기록 1건. 예: event("bigquery_load", rows=45000, duration_s=12.3)
+    install() 전이면 조용히 무시한다."""
+    if _queue is None:
+        return
+    payload = {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "run": _run_name,
+        "run_id": _run_id,
+        "stage": stage,
+    }
+    payload.update(fields)
+    _queue.put_nowait(_record(event=payload))
+
+
+def http_event(stage: str, resp, started: float, **fields) -> None:
+    """requests 응답 1건을 기록: HTTP 상태, 소요시간, 보낸/받은 바이트."""
+    body = getattr(getattr(resp, "request", None), "body", None) or b""
+    event(
+        stage,
+        status=resp.status_code,
+        duration_s=round(time.time() - started, 3),
+        bytes_sent=len(body),
+        bytes_received=len(resp.content or b""),
+        **fields,
+    )
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+# =====================================================================
+# 상주 스케줄러 (자체 서버용)
+#
+#   python scheduler_daemon.py [--jobs goods,payment,clobe,exchange_rate] [--once JOB]
+#
+#   cron-job.org → workflow_dispatch 로 돌리면 매번 러너 준비 · pip install · 크롬 설치 ·
+#   pandas/selenium/bigquery/gspread import · 로그인을 새로 한다. 여기서는 한 프로세스가 계속 떠서
+#     goods          30분마다 (DAEMON_GOODS_EVERY_MIN)
+#     payment        매일 06:30 KST (DAEMON_PAYMENT_AT)   결제내역 + 예치금
+#     clobe          매일 06:45 KST (DAEMON_CLOBE_AT)     통장 내역
+#     exchange_rate  매일 07:00 KST (DAEMON_EXCHANGE_RATE_AT)
+#   를 돌린다. 유지하는 것:
+#     - silkroad21 크롬 세션(silkroad_session.SilkroadSession): 로그인 1번, 세션이 끊기면
+#       goto_with_auth 가 재로그인. 브라우저 오류가 나거나 DAEMON_BROWSER_MAX_AGE_H 시간이 지나면 새로 띄움
+#     - BigQuery / gspread 클라이언트, 패킹·재무 POST 용 HTTP 세션 (auto_download_headless_log 캐시)
+#   잡은 메인 스레드에서 하나씩만 돈다 → 겹쳐 실행되지 않는다. 늦게 끝나 지나간 회차는 몰아서 돌리지
+#   않고 다음 회차로 넘긴다. 같은 STATE_DIR 에 데몬을 두 개 띄우면 두 번째는 바로 종료(파일 잠금).
+#
+#   각 잡의 env 는 해당 워크플로우와 같다(GOODS_PROBE 등 포함). 로그: log_daemon.txt / log_daemon.jsonl,
+#   잡이 끝날 때마다 run_summary_daemon_<잡>.json 을 덮어쓴다.
+#   Clobe ui 모드는 headed 크롬이라 화면이 필요하다(서버면 xvfb-run 으로 데몬을 띄울 것).
+# =====================================================================
+
+import argparse
+import dataclasses
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable
+from zoneinfo import ZoneInfo
+
+import instrument
+import run_log
+
+KST = ZoneInfo("Asia/Seoul")
+STATE_DIR = Path(os.getenv("STATE_DIR") or "state")
+GOODS_EVERY_MIN = float(os.getenv("DAEMON_GOODS_EVERY_MIN") or 30)
+PAYMENT_AT = os.getenv("DAEMON_PAYMENT_AT") or "06:30"
+CLOBE_AT = os.getenv("DAEMON_CLOBE_AT") or "06:45"
+EXCHANGE_RATE_AT = os.getenv("DAEMON_EXCHANGE_RATE_AT") or "07:00"
+BROWSER_MAX_AGE_H = float(os.getenv("DAEMON_BROWSER_MAX_AGE_H") or 6)
+DEFAULT_JOBS = os.getenv("DAEMON_JOBS") or "goods,payment,clobe,exchange_rate"
+
+
+class Unchanged(Exception):
+    """goods 변경 감지 결과 바뀐 게 없음 → 이번 회차 건너뜀."""
+
+
+@dataclass
+class Schedule:
+    name: str
+    run: Callable[[], None]
+    every_min: float | None = None      # 주기 실행
+    at: str | None = None               # 매일 HH:MM (KST)
+    next_due: datetime | None = None
+
+    def first_due(self, now: datetime) -> datetime:
+        if self.every_min:
+            return now                  # 주기 잡은 시작하자마자 1번
+        return self._next_daily(now)
+
+    def advance(self, now: datetime) -> datetime:
+        """이번 회차가 끝난 뒤 다음 실행 시각. 밀린 회차는 건너뛴다."""
+        if self.every_min:
+            step = timedelta(minutes=self.every_min)
+            due = self.next_due + step
+            while due <= now:
+                due += step
+            return due
+        return self._next_daily(now)
+
+    def _next_daily(self, now: datetime) -> datetime:
+        hh, mm = (int(x) for x in self.at.split(":"))
+        due = now.astimezone(KST).replace(hour=hh, minute=mm, second=0, microsecond=0)
+        if due <= now:
+            due += timedelta(days=1)
+        return due
+
+
+class Daemon:
+    def __init__(self, names: list[str]):
+        self._session = None
+        self._session_started = 0.0
+        self._stop = threading.Event()
+        table = {
+            "goods": Schedule("goods", self.run_goods, every_min=GOODS_EVERY_MIN),
+            "payment": Schedule("payment", self.run_payment, at=PAYMENT_AT),
+            "clobe": Schedule("clobe", self.run_clobe, at=CLOBE_AT),
+            "exchange_rate": Schedule("exchange_rate", self.run_exchange_rate, at=EXCHANGE_RATE_AT),
+        }
+        self.schedules = [table[n] for n in names]
+
+    # ----- silkroad21 브라우저 (잡 사이에 유지) -----
+    def silkroad(self):
+        import silkroad_session
+
+        if self._session is not None and time.time() - self._session_started > BROWSER_MAX_AGE_H * 3600:
+            print(f"[INFO] 브라우저 {BROWSER_MAX_AGE_H:g}시간 경과 → 새로 띄움")
+            self.drop_silkroad()
+        if self._session is None:
+            self._session = silkroad_session.SilkroadSession().__enter__()
+            self._session_started = time.time()
+        return self._session
+
+    def drop_silkroad(self) -> None:
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    # ----- 잡 -----
+    def run_goods(self) -> None:
+        import auto_download_headless_log as goods
+        import silkroad_session
+
+        job = silkroad_session.JOBS["goods"]
+        if goods.PROBE_ENABLED:
+            def probe_or_skip(driver):
+                if not goods.probe(driver):
+                    raise Unchanged()
+            job = dataclasses.replace(job, filters=probe_or_skip)
+        try:
+            path = self.silkroad().download(job)
+        except Unchanged:
+            print("✅ 목록 변경 없음 → 이번 회차 건너뜀")
+            return
+        results = silkroad_session.goods_pipeline(path, job)
+        if goods.PROBE_ENABLED and goods.sinks_settled(results):
+            goods.mark_probe_ok()
+
+    def run_payment(self) -> None:
+        import silkroad_session
+
+        failed = []
+        for name in ("payment", "deposit"):
+            job = silkroad_session.JOBS[name]
+            try:
+                job.pipeline(self.silkroad().download(job), job)
+            except Exception as e:
+                print(f"❌ [{job.label}] 실패: {type(e).__name__}: {e}")
+                failed.append(job.label)
+                if _is_browser_error(e):
+                    self.drop_silkroad()
+        if failed:
+            raise RuntimeError(f"실패: {failed}")
+
+    def run_clobe(self) -> None:
+        import auto_download_clobe
+
+        auto_download_clobe.run()
+
+    def run_exchange_rate(self) -> None:
+        import exchange_rate
+
+        exchange_rate.main()
+
+    # ----- 루프 -----
+    def run_one(self, sched: Schedule) -> bool:
+        print(f"\n===== [{sched.name}] 시작 {datetime.now(KST):%Y-%m-%d %H:%M:%S} KST =====")
+        t0 = time.time()
+        ok = True
+        try:
+            with instrument.span(sched.name):
+                sched.run()
+        except Exception as e:
+            ok = False
+            print(f"❌ [{sched.name}] 실패: {type(e).__name__}: {e}")
+            traceback.print_exc()
+            if _is_browser_error(e):
+                self.drop_silkroad()
+        elapsed = time.time() - t0
+        print(f"{'✅' if ok else '❌'} [{sched.name}] 종료 ({elapsed:.1f}s)")
+        run_log.event("daemon_job", job=sched.name, ok=ok, duration_s=round(elapsed, 3))
+        instrument.write_summary(f"run_summary_daemon_{sched.name}.json")
+        instrument.reset()
+        return ok
+
+    def loop(self) -> None:
+        now = datetime.now(KST)
+        for s in self.schedules:
+            s.next_due = s.first_due(now)
+            print(f"[INFO] {s.name}: 다음 실행 {s.next_due:%m-%d %H:%M} KST")
+        while not self._stop.is_set():
+            now = datetime.now(KST)
+            due = sorted((s for s in self.schedules if s.next_due <= now), key=lambda s: s.next_due)
+            for s in due:
+                if self._stop.is_set():
+                    break
+                self.run_one(s)
+                s.next_due = s.advance(datetime.now(KST))
+                print(f"[INFO] {s.name}: 다음 실행 {s.next_due:%m-%d %H:%M} KST")
+            if due:
+                continue
+            wait_s = (min(s.next_due for s in self.schedules) - now).total_seconds()
+            self._stop.wait(max(1.0, min(wait_s, 60.0)))
+
+    def stop(self, *_args) -> None:
+        print("[INFO] 종료 신호 → 진행 중인 잡이 끝나면 멈춤")
+        self._stop.set()
+
+    def close(self) -> None:
+        self.drop_silkroad()
+
+
+def _is_browser_error(e: BaseException) -> bool:
+    """크롬/드라이버 쪽 오류면 세션을 버리고 다음 회차에 새로 띄운다.
+    (크롬이 죽으면 chromedriver 로의 HTTP 가 끊겨 urllib3 예외로 올라온다)"""
+    from selenium.common.exceptions import WebDriverException
+
+    return isinstance(e, WebDriverException) or (type(e).__module__ or "").startswith("urllib3")
+
+
+def _single_instance_lock():
+    """같은 STATE_DIR 에 데몬 1개만. (fcntl 이 없는 Windows 에선 검사 생략)"""
+    try:
+        import fcntl
+    except ImportError:
+        return None
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    f = open(STATE_DIR / "daemon.lock", "w")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        print(f"❌ 이미 실행 중인 데몬이 있습니다 ({STATE_DIR / 'daemon.lock'})")
+        sys.exit(1)
+    f.write(str(os.getpid()))
+    f.flush()
+    return f
+
+
+# ===== Main =====
+def main(argv: list[str] | None = None) -> None:
+    names_all = ("goods", "payment", "clobe", "exchange_rate")
+    ap = argparse.ArgumentParser(description="goods / 결제·예치금 / 클로브 / 환율 상주 스케줄러")
+    ap.add_argument("--jobs", default=DEFAULT_JOBS, help=f"쉼표 구분 (기본: {DEFAULT_JOBS})")
+    ap.add_argument("--once", choices=names_all, help="이 잡만 지금 1번 돌리고 종료")
+    args = ap.parse_args(argv)
+
+    names = [s.strip() for s in args.jobs.split(",") if s.strip()]
+    unknown = [s for s in names if s not in names_all]
+    if unknown:
+        ap.error(f"알 수 없는 잡: {unknown} (선택: {', '.join(names_all)})")
+
+    run_log.install("log_daemon.txt")
+    lock = _single_instance_lock()
+    import auto_download_headless_log as goods
+
+    os.environ.setdefault("GOOGLE_APPLICATION_CREDENTIALS", goods.GOOGLE_CREDS)
+
+    daemon = Daemon([args.once] if args.once else list(dict.fromkeys(names)))
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    try:
+        if args.once:
+            ok = daemon.run_one(daemon.schedules[0])
+            sys.exit(0 if ok else 1)
+        daemon.loop()
+    finally:
+        daemon.close()
+        if lock is not None:
+            lock.close()
+
+
+if __name__ == "__main__":
+    main()
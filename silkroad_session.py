@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+# =====================================================================
+# silkroad21 통합 크롤러: 크롬 1번 + 로그인 1번으로 export 여러 개 받기
+#
+#   python silkroad_session.py [--jobs goods,payment,deposit] [--download-only]
+#
+#   goods(X19) 와 결제내역(Pmt) · 예치금(DpstDet) 은 같은 관리자 계정(LOGIN_ID)인데
+#   워크플로우마다 크롬을 띄우고 따로 로그인했다. 여기서는 한 세션에서 차례로 받고,
+#   파일이 떨어지는 즉시 그 파일의 후속 처리를 스레드 풀에 넘긴 뒤 브라우저는 바로 다음 export 로 간다.
+#     goods   → auto_download_headless_log.run(--from-csv 와 같음: BigQuery / Sheets / 패킹·재무)
+#     payment → auto_download_payment.post_to_finance
+#     deposit → auto_download_payment.post_to_finance
+#   export 마다 다운로드 폴더를 따로 둔다(CDP Page.setDownloadBehavior) → 파일이 섞이지 않음.
+#
+#   잡 목록: --jobs 또는 env SILKROAD_JOBS (기본 goods,payment,deposit)
+#   후속 처리 동시 실행 수: env SILKROAD_PIPELINE_WORKERS (기본 2)
+#   각 잡의 필수 env 는 원래 스크립트와 같다(없으면 그 잡의 후속 처리만 실패).
+# =====================================================================
+
+import argparse
+import glob
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+import instrument
+import run_log
+import waits
+import auto_download_headless_log as goods
+import auto_download_payment as payment
+
+DOWNLOAD_ROOT = os.getenv("SILKROAD_DOWNLOAD_DIR") or str((Path.cwd() / "downloads_session").resolve())
+PIPELINE_WORKERS = int(os.getenv("SILKROAD_PIPELINE_WORKERS") or 2)
+DEFAULT_JOBS = os.getenv("SILKROAD_JOBS") or "goods,payment,deposit"
+
+DATA_PATTERNS = waits.DATA_PATTERNS
+
+
+@dataclass(frozen=True)
+class ExportJob:
+    name: str                                             # 다운로드 하위 폴더 이름 겸 --jobs 키
+    label: str                                            # 로그용
+    page_url: str
+    fn_arg: str                                           # 다운로드 버튼 onclick=fnPageExl('<fn_arg>')
+    filters: Callable[[webdriver.Chrome], None] | None = None   # 페이지 이동 후 검색조건 설정
+    pipeline: Callable[[str, "ExportJob"], object] | None = None  # 받은 파일 처리. 실패는 예외로
+    timeout: int = 300                                    # 다운로드 완료 대기(초)
+
+
+# ===== 후속 처리 =====
+def goods_pipeline(path: str, job: ExportJob) -> dict[str, bool]:
+    """auto_download_headless_log 의 fetch 뒤 단계 전부. FATAL_SINKS 가 실패하면 예외.
+    반환: {싱크 이름: 성공 여부}."""
+    results = goods.run([s for s in goods.STAGES if s != "fetch"], from_csv=path)
+    bad = [n for n, ok in results.items() if not ok]
+    print(f"[{job.label}] 싱크 성공: {[n for n, ok in results.items() if ok] or '없음'} / 실패: {bad or '없음'}")
+    if goods.FATAL_SINKS & set(bad):
+        raise RuntimeError(f"필수 싱크 실패: {sorted(goods.FATAL_SINKS & set(bad))}")
+    return results
+
+
+def finance_pipeline(path: str, job: ExportJob) -> None:
+    payment.post_to_finance(path, job.label)
+
+
+JOBS = {
+    "goods": ExportJob("goods", "구매대행 목록", goods.LIST_URL, "X19", None, goods_pipeline, timeout=120),
+    "payment": ExportJob("payment", "결제내역", payment.PAYMENT_URL, "Pmt", payment.apply_search_filters, finance_pipeline),
+    "deposit": ExportJob("deposit", "예치금", payment.DEPOSIT_URL, "DpstDet", payment.apply_search_filters, finance_pipeline),
+}
+
+
+# ===== 세션 =====
+def click_export(driver: webdriver.Chrome, fn_arg: str) -> None:
+    """엑셀 다운로드 버튼(fnPageExl('<fn_arg>')) 클릭. 실패 시 스크립트 직접 호출로 대체."""
+    selector = ", ".join(
+        f"{tag}[{attr}*=\"fnPageExl('{fn_arg}')\"]"
+        for tag, attr in (("button", "onclick"), ("a", "onclick"), ("a", "href"))
+    )
+    try:
+        btn = WebDriverWait(driver, 20).until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
+        print(f"[INFO] 엑셀 다운로드 클릭: fnPageExl('{fn_arg}')")
+        btn.click()
+    except Exception as e:
+        print(f"[WARN] 버튼 클릭 실패 → execute_script 대체: {e}")
+        driver.set_script_timeout(10)
+        driver.execute_script(f"fnPageExl('{fn_arg}');")
+    goods.accept_alert_safe(driver, timeout=5)
+
+
+class SilkroadSession:
+    """크롬 1개 + 로그인 1번. with 블록 안에서 download(job) 를 여러 번 부른다."""
+
+    def __init__(self, download_root: str = DOWNLOAD_ROOT, headless: bool = True):
+        self.download_root = download_root
+        self.headless = headless
+        self.driver: webdriver.Chrome | None = None
+
+    def __enter__(self) -> "SilkroadSession":
+        Path(self.download_root).mkdir(parents=True, exist_ok=True)
+        with instrument.span("browser_start"):
+            self.driver = goods.make_driver(headless=self.headless, download_dir=self.download_root)
+        try:
+            with instrument.span("login"):
+                goods.do_login(self.driver)
+        except BaseException:
+            self.close()
+            raise
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.close()
+        return False
+
+    def close(self) -> None:
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+    def _download_dir(self, job: ExportJob) -> str:
+        """잡 전용 폴더를 비우고 크롬 다운로드 위치를 그리로 바꾼다."""
+        folder = os.path.join(self.download_root, job.name)
+        Path(folder).mkdir(parents=True, exist_ok=True)
+        for pat in (*DATA_PATTERNS, "*.crdownload"):
+            for fp in glob.glob(os.path.join(folder, pat)):
+                try:
+                    os.remove(fp)
+                except Exception:
+                    pass
+        self.driver.execute_cdp_cmd("Page.setDownloadBehavior", {"behavior": "allow", "downloadPath": folder})
+        return folder
+
+    def download(self, job: ExportJob) -> str:
+        """페이지 이동 → (검색조건) → 엑셀 다운로드 → 받은 파일 경로."""
+        print(f"\n===== [{job.label}] 다운로드 시작 =====")
+        folder = self._download_dir(job)
+        with instrument.span("navigate", job=job.name):
+            goods.goto_with_auth(self.driver, job.page_url)
+            if job.filters is not None:
+                job.filters(self.driver)
+        t0 = time.time()
+        with instrument.span("download", job=job.name) as sp:
+            click_export(self.driver, job.fn_arg)
+            path = waits.wait_for_download(folder, job.timeout)
+            size = os.path.getsize(path)
+            sp.add(bytes=size)
+        print(f"[INFO] [{job.label}] 다운로드 완료: {os.path.basename(path)} ({size/1e6:.2f} MB)")
+        run_log.event("download", job=job.name, bytes=size, duration_s=round(time.time() - t0, 3))
+        return path
+
+
+def _run_pipeline(job: ExportJob, path: str) -> bool:
+    try:
+        with instrument.span("pipeline", job=job.name):
+            job.pipeline(path, job)
+        print(f"✅ [{job.label}] 후속 처리 완료")
+        return True
+    except Exception as e:
+        print(f"❌ [{job.label}] 후속 처리 실패: {type(e).__name__}: {e}")
+        traceback.print_exc()
+        return False
+
+
+def run_jobs(jobs: list[ExportJob], download_only: bool = False) -> dict[str, bool]:
+    """한 세션에서 jobs 를 차례로 받고, 받는 즉시 후속 처리를 스레드 풀에 넘긴다.
+    반환: {잡 이름: 성공 여부} (다운로드 + 후속 처리 모두 성공해야 True)."""
+    results: dict[str, bool] = {}
+    futures = {}
+    with ThreadPoolExecutor(max_workers=max(1, PIPELINE_WORKERS), thread_name_prefix="pipeline") as pool:
+        try:
+            with SilkroadSession() as session:
+                for job in jobs:
+                    try:
+                        path = session.download(job)
+                    except Exception as e:
+                        print(f"❌ [{job.label}] 다운로드 실패: {type(e).__name__}: {e}")
+                        results[job.name] = False
+                        continue
+                    if download_only or job.pipeline is None:
+                        results[job.name] = True
+                    else:
+                        futures[job.name] = pool.submit(_run_pipeline, job, path)
+        except Exception as e:
+            # 브라우저 시작/로그인 실패 → 아직 못 받은 잡은 전부 실패
+            print(f"❌ 세션 실패: {type(e).__name__}: {e}")
+            for job in jobs:
+                if job.name not in results and job.name not in futures:
+                    results[job.name] = False
+        for name, fut in futures.items():
+            results[name] = fut.result()
+    return {job.name: results[job.name] for job in jobs}
+
+
+# ===== Main =====
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="silkroad21 export 여러 개를 한 브라우저 세션으로")
+    ap.add_argument("--jobs", default=DEFAULT_JOBS, help=f"쉼표 구분 잡 (기본: {DEFAULT_JOBS}). 선택: {', '.join(JOBS)}")
+    ap.add_argument("--download-only", action="store_true", help="받기만 하고 후속 처리는 하지 않음")
+    args = ap.parse_args(argv)
+
+    names = [s.strip() for s in args.jobs.split(",") if s.strip()]
+    unknown = [s for s in names if s not in JOBS]
+    if unknown:
+        ap.error(f"알 수 없는 잡: {unknown} (선택: {', '.join(JOBS)})")
+
+    run_log.install("log_session.txt")
+    if not (goods.LOGIN_ID and goods.LOGIN_PW):
+        print("❌ LOGIN_ID / LOGIN_PW 환경변수가 필요합니다")
+        sys.exit(1)
+    os.environ.setdefault("GOOGLE_APPLICATION_CREDENTIALS", goods.GOOGLE_CREDS)
+
+    results = run_jobs([JOBS[n] for n in dict.fromkeys(names)], download_only=args.download_only)
+    ok = [n for n, s in results.items() if s]
+    bad = [n for n, s in results.items() if not s]
+    print(f"\n🎉 완료 — 성공: {ok or '없음'} / 실패: {bad or '없음'}")
+    if bad:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
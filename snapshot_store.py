@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+# =====================================================================
+# 다운로드 스냅샷 저장소
+#   실행마다 받은 export(DataFrame)를 zstd Parquet 으로 남기고 index.json 에 시각·내용 해시를 기록한다.
+#   - 파일은 내용 해시로 이름을 붙인다 → 내용이 같은 실행이 이어지면 파일을 새로 쓰지 않고 index 만 늘어남
+#   - 보존: 최근 SNAPSHOT_KEEP 개, SNAPSHOT_MAX_AGE_DAYS 일 이내 (가장 최근 1개는 항상 유지)
+#   - 위치: SNAPSHOT_DIR (기본 STATE_DIR/snapshots → 워크플로우 actions/cache 로 실행 간 유지)
+#
+#   store = SnapshotStore("goods")
+#   prev = store.latest()                  # 이번 실행 전 마지막 스냅샷
+#   snap = store.save(df, source="x.csv")
+#   delta = diff(store.load(prev), df, key="아이템번호")   # added / changed / removed
+#
+#   python snapshot_store.py list [--name goods]
+#   python snapshot_store.py diff <이전 ID> <이후 ID> [--key 아이템번호]
+#   python snapshot_store.py export <ID> out.csv        # 실패 재처리/검증용
+# =====================================================================
+
+import argparse
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+STATE_DIR = Path(os.getenv("STATE_DIR") or "state")
+SNAPSHOT_DIR = Path(os.getenv("SNAPSHOT_DIR") or STATE_DIR / "snapshots")
+SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP") or 48)               # 30분 주기면 하루치
+SNAPSHOT_MAX_AGE_DAYS = float(os.getenv("SNAPSHOT_MAX_AGE_DAYS") or 7)
+
+
+@dataclass
+class Snapshot:
+    id: str
+    created_at: str       # UTC ISO
+    content_hash: str
+    rows: int
+    cols: int
+    bytes: int
+    file: str             # 저장소 폴더 기준 파일명
+    source: str = ""
+
+
+@dataclass
+class Delta:
+    key: str
+    added: pd.DataFrame     # 새로 생긴 키 (이후 스냅샷의 행)
+    changed: pd.DataFrame   # 키는 같고 내용이 바뀐 행 (이후 스냅샷의 행)
+    removed: pd.DataFrame   # 사라진 키 (이전 스냅샷의 행)
+    unchanged: int
+
+    def counts(self) -> dict:
+        return {
+            "added": len(self.added),
+            "changed": len(self.changed),
+            "removed": len(self.removed),
+            "unchanged": self.unchanged,
+        }
+
+    @property
+    def is_empty(self) -> bool:
+        return not (len(self.added) or len(self.changed) or len(self.removed))
+
+
+def content_hash(df: pd.DataFrame) -> str:
+    """컬럼 이름 + 행 내용(순서 포함) 해시. 같은 export 면 dtype(문자열/category)과 상관없이 같은 값."""
+    h = hashlib.sha256("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df.astype(object).astype(str), index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class SnapshotStore:
+    def __init__(self, name: str = "goods", root: Path | str | None = None,
+                 keep: int | None = None, max_age_days: float | None = None):
+        self.dir = Path(root or SNAPSHOT_DIR) / name
+        self.keep = SNAPSHOT_KEEP if keep is None else keep
+        self.max_age = timedelta(days=SNAPSHOT_MAX_AGE_DAYS if max_age_days is None else max_age_days)
+        self._index_path = self.dir / "index.json"
+
+    # ----- index -----
+    def snapshots(self) -> list[Snapshot]:
+        """오래된 것 → 최근 순."""
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                return [Snapshot(**e) for e in json.load(f)]
+        except (OSError, ValueError, TypeError):
+            return []
+
+    def _write_index(self, snaps: list[Snapshot]) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self._index_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump([asdict(s) for s in snaps], f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self._index_path)
+
+    def latest(self) -> Snapshot | None:
+        snaps = self.snapshots()
+        return snaps[-1] if snaps else None
+
+    def previous(self, snap: Snapshot | str | None = None) -> Snapshot | None:
+        """snap 바로 앞 스냅샷. snap 을 안 주면 가장 최근 것의 앞."""
+        snaps = self.snapshots()
+        if snap is None:
+            return snaps[-2] if len(snaps) >= 2 else None
+        snap_id = snap if isinstance(snap, str) else snap.id
+        ids = [s.id for s in snaps]
+        if snap_id not in ids:
+            return None
+        i = ids.index(snap_id)
+        return snaps[i - 1] if i > 0 else None
+
+    def get(self, snap_id: str) -> Snapshot | None:
+        """ID 또는 'latest' / 'previous'."""
+        if snap_id == "latest":
+            return self.latest()
+        if snap_id == "previous":
+            return self.previous()
+        return next((s for s in self.snapshots() if s.id == snap_id), None)
+
+    # ----- 읽기/쓰기 -----
+    def load(self, snap: Snapshot | str, columns: list[str] | None = None) -> pd.DataFrame:
+        if isinstance(snap, str):
+            found = self.get(snap)
+            if found is None:
+                raise KeyError(f"스냅샷 없음: {snap}")
+            snap = found
+        return pq.read_table(self.dir / snap.file, columns=columns).to_pandas()
+
+    def save(self, df: pd.DataFrame, source: str = "") -> Snapshot:
+        """df 를 스냅샷으로 남기고 보존 기간 밖의 것을 정리한다."""
+        digest = content_hash(df)
+        file = f"{digest[:20]}.parquet"
+        path = self.dir / file
+        self.dir.mkdir(parents=True, exist_ok=True)
+        if not path.exists():
+            tmp = path.with_suffix(".tmp")
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp, compression="zstd")
+            os.replace(tmp, path)
+
+        now = datetime.now(timezone.utc)
+        snap = Snapshot(
+            id=f"{now:%Y%m%dT%H%M%SZ}-{digest[:8]}",
+            created_at=now.isoformat(timespec="seconds"),
+            content_hash=digest,
+            rows=len(df),
+            cols=len(df.columns),
+            bytes=path.stat().st_size,
+            file=file,
+            source=source,
+        )
+        snaps = [s for s in self.snapshots() if s.id != snap.id] + [snap]
+        self._write_index(snaps)
+        self.evict()
+        return snap
+
+    def evict(self) -> int:
+        """보존 개수·기간을 넘긴 항목과 더 이상 참조되지 않는 파일을 지운다. 지운 파일 수 반환."""
+        snaps = self.snapshots()
+        if not snaps:
+            return 0
+        cutoff = datetime.now(timezone.utc) - self.max_age
+        kept = [s for s in snaps[-self.keep:] if datetime.fromisoformat(s.created_at) >= cutoff]
+        if not kept:
+            kept = snaps[-1:]
+        if len(kept) != len(snaps):
+            self._write_index(kept)
+
+        referenced = {s.file for s in kept}
+        removed = 0
+        for p in self.dir.glob("*.parquet"):
+            if p.name not in referenced:
+                try:
+                    p.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+
+# ===== 행 단위 차이 =====
+def _row_hashes(df: pd.DataFrame, columns: list[str]) -> pd.Series:
+    aligned = df.reindex(columns=columns).astype(object).fillna("").astype(str)
+    return pd.util.hash_pandas_object(aligned, index=False)
+
+
+def diff(old: pd.DataFrame, new: pd.DataFrame, key: str) -> Delta:
+    """key 기준 행 차이. 같은 키가 여러 줄이면 마지막 줄이 이긴다(export 순서 기준).
+    컬럼이 늘거나 줄면 없는 쪽을 빈 값으로 보고 비교한다."""
+    old = old[old[key].notna() & (old[key].astype(str).str.strip() != "")].drop_duplicates(key, keep="last")
+    new = new[new[key].notna() & (new[key].astype(str).str.strip() != "")].drop_duplicates(key, keep="last")
+    columns = [c for c in new.columns if c != key] + [c for c in old.columns if c != key and c not in new.columns]
+
+    o = pd.DataFrame({key: old[key].astype(str).to_numpy(), "_h_old": _row_hashes(old, columns).to_numpy()})
+    n = pd.DataFrame({key: new[key].astype(str).to_numpy(), "_h_new": _row_hashes(new, columns).to_numpy()})
+    m = n.merge(o, on=key, how="outer", indicator=True)
+
+    added_keys = m.loc[m["_merge"] == "left_only", key]
+    removed_keys = m.loc[m["_merge"] == "right_only", key]
+    both = m[m["_merge"] == "both"]
+    changed_keys = both.loc[both["_h_new"] != both["_h_old"], key]
+
+    new_keys = new[key].astype(str)
+    old_keys = old[key].astype(str)
+    return Delta(
+        key=key,
+        added=new[new_keys.isin(added_keys).to_numpy()],
+        changed=new[new_keys.isin(changed_keys).to_numpy()],
+        removed=old[old_keys.isin(removed_keys).to_numpy()],
+        unchanged=len(both) - len(changed_keys),
+    )
+
+
+# ===== CLI =====
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="다운로드 스냅샷 저장소")
+    ap.add_argument("--name", default="goods")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list")
+    p_diff = sub.add_parser("diff")
+    p_diff.add_argument("before")
+    p_diff.add_argument("after", nargs="?", default="latest")
+    p_diff.add_argument("--key", default="아이템번호")
+    p_exp = sub.add_parser("export")
+    p_exp.add_argument("snapshot")
+    p_exp.add_argument("out")
+    args = ap.parse_args(argv)
+
+    store = SnapshotStore(args.name)
+    if args.cmd == "list":
+        for s in store.snapshots():
+            print(f"{s.id}  {s.rows:>8,}행 × {s.cols}  {s.bytes/1e6:6.2f} MB  {s.source}")
+    elif args.cmd == "diff":
+        delta = diff(store.load(args.before), store.load(args.after), args.key)
+        print(json.dumps(delta.counts(), ensure_ascii=False))
+    elif args.cmd == "export":
+        store.load(args.snapshot).to_csv(args.out, index=False, encoding="utf-8-sig")
+        print(f"✅ {args.snapshot} → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
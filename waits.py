@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+# =====================================================================
+# 크롤러 대기 도구: 고정 sleep 대신 "준비됐는지" 조건을 기다린다
+#
+#   waits.until(driver, waits.datebox_ready("shBeginDay", "shEndDay"), "datebox_ready", timeout=10)
+#   waits.until(driver, waits.reloaded(search_btn), "search_reload", timeout=20, required=False)
+#   waits.backoff(attempt, error)          # 재시도 대기 (지수 + 지터, 상한)
+#
+#   until 은 조건이 참(truthy)이 되는 즉시 그 값을 돌려준다.
+#     required=True  (기본) timeout 이면 TimeoutException
+#     required=False        timeout 이면 [WARN] 만 남기고 None → 예전 고정 대기처럼 그냥 진행
+#   대기마다 instrument.span("wait", what=이름) 으로 실제로 기다린 시간·성공 여부가
+#   log*.jsonl / run_summary_*.json 에 남는다 → 어떤 대기가 시간을 먹는지 바로 보임.
+#
+#   조건(predicate)은 driver 하나를 받는 함수라 selenium expected_conditions 도 그대로 넘길 수 있다.
+#   파일 대기(download_started / download_finished)는 driver 를 쓰지 않는다(None 을 넘겨도 됨).
+#
+#   WAIT_POLL_S        조건 확인 주기 (기본 0.2초)
+#   WAIT_BACKOFF_BASE  재시도 첫 대기 (기본 3초) — 연결 계열 오류는 3배
+#   WAIT_BACKOFF_CAP   재시도 대기 상한 (기본 45초)
+# =====================================================================
+
+import glob
+import os
+import random
+import time
+from typing import Callable
+
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+
+import instrument
+
+POLL_S = float(os.getenv("WAIT_POLL_S") or 0.2)
+BACKOFF_BASE = float(os.getenv("WAIT_BACKOFF_BASE") or 3)
+BACKOFF_CAP = float(os.getenv("WAIT_BACKOFF_CAP") or 45)
+
+DATA_PATTERNS = ("*.csv", "*.xls", "*.xlsx")
+
+# 조건 확인 중 이 예외는 "아직 준비 안 됨" 으로 본다(페이지 교체 중 흔함)
+_NOT_READY = (NoSuchElementException, StaleElementReferenceException)
+
+
+# ===== 대기 =====
+def until(driver, predicate: Callable, name: str, timeout: float = 20, required: bool = True,
+          poll: float | None = None):
+    """predicate(driver) 가 참이 될 때까지 대기. 참이 된 값을 반환."""
+    poll = POLL_S if poll is None else poll
+    with instrument.span("wait", what=name, timeout_s=timeout) as sp:
+        t0 = time.monotonic()
+        end = t0 + timeout
+        while True:
+            try:
+                value = predicate(driver)
+                if value:
+                    waited = time.monotonic() - t0
+                    sp.add(ok=True)
+                    if waited >= 1:
+                        print(f"[WAIT] {name}: {waited:.2f}s")
+                    return value
+            except _NOT_READY:
+                pass
+            if time.monotonic() >= end:
+                break
+            time.sleep(min(poll, max(0.0, end - time.monotonic())))
+        sp.add(ok=False)
+    if required:
+        raise TimeoutException(f"대기 시간 초과: {name} ({timeout:g}s)")
+    print(f"[WARN] 대기 시간 초과(무시하고 진행): {name} ({timeout:g}s)")
+    return None
+
+
+def backoff(attempt: int, error: BaseException | None = None, label: str = "") -> float:
+    """재시도 전 대기. 지수 증가(base·2^(n-1)) + 지터, 상한 BACKOFF_CAP.
+    연결 끊김·읽기 타임아웃 같은 네트워크 계열 오류는 서버가 숨 돌릴 시간을 더 준다(×3).
+    실제로 잔 초를 반환."""
+    base = BACKOFF_BASE * (3 if _is_network_error(error) else 1)
+    delay = min(BACKOFF_CAP, base * 2 ** max(0, attempt - 1)) * random.uniform(0.7, 1.0)
+    print(f"[INFO] {delay:.1f}초 후 재시도합니다...{f' ({label})' if label else ''}")
+    with instrument.span("retry_backoff", what=label, attempt=attempt,
+                         error=type(error).__name__ if error else ""):
+        time.sleep(delay)
+    return delay
+
+
+def _is_network_error(error: BaseException | None) -> bool:
+    if error is None:
+        return False
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    module = type(error).__module__ or ""
+    return module.startswith(("urllib3", "requests")) or (
+        isinstance(error, WebDriverException) and "net::ERR_" in str(error)
+    )
+
+
+# ===== 준비 조건 =====
+def document_ready(states: tuple[str, ...] = ("interactive", "complete")) -> Callable:
+    """document.readyState 가 states 중 하나. eager 로드면 interactive 로 충분."""
+    def check(driver):
+        return driver.execute_script("return document.readyState") in states
+    return check
+
+
+def url_left(hint: str) -> Callable:
+    """현재 URL 에 hint 가 없음 (예: 로그인 페이지를 벗어남)."""
+    return lambda driver: hint not in driver.current_url
+
+
+def text_present(text: str) -> Callable:
+    """페이지 본문 어딘가에 text 가 보임."""
+    def check(driver):
+        return driver.execute_script(
+            "return !!document.body && document.body.innerText.indexOf(arguments[0]) >= 0;", text
+        )
+    return check
+
+
+def datebox_ready(*element_ids: str) -> Callable:
+    """EasyUI datebox 위젯 초기화 완료. $.data(el, 'datebox') 가 생겨야 setValue 가 먹는다.
+    페이지에 없는 id 는 준비된 것으로 본다(예치금 탭처럼 컨트롤이 없는 페이지)."""
+    def check(driver):
+        return driver.execute_script(
+            """
+            if (document.readyState === 'loading' || !window.jQuery) return false;
+            return arguments[0].every(function (id) {
+                var el = document.getElementById(id);
+                return !el || !!jQuery.data(el, 'datebox');
+            });
+            """,
+            list(element_ids),
+        )
+    return check
+
+
+def reloaded(old_element) -> Callable:
+    """검색 등으로 페이지(결과 목록)가 다시 그려짐: 예전 요소가 stale 이고 새 문서가 파싱됨."""
+    def check(driver):
+        try:
+            old_element.is_enabled()
+            return False
+        except StaleElementReferenceException:
+            return driver.execute_script("return document.readyState") != "loading"
+    return check
+
+
+def spa_hydrated(locator: tuple[str, str] | None = None) -> Callable:
+    """SPA 렌더 완료: 문서 로드 끝 + 로딩 표시(aria-busy) 없음 (+ locator 요소가 보이고 활성)."""
+    def check(driver):
+        idle = driver.execute_script(
+            "return document.readyState === 'complete' && !document.querySelector('[aria-busy=\"true\"]');"
+        )
+        if not idle:
+            return False
+        if locator is None:
+            return True
+        for el in driver.find_elements(*locator):
+            if el.is_displayed() and el.is_enabled():
+                return el
+        return False
+    return check
+
+
+def gone(element) -> Callable:
+    """요소가 사라지거나 안 보이게 됨 (모달 닫힘 등)."""
+    def check(driver):
+        try:
+            return not element.is_displayed()
+        except StaleElementReferenceException:
+            return True
+    return check
+
+
+def download_started(dirpath: str, patterns: tuple[str, ...] = DATA_PATTERNS) -> Callable:
+    """dirpath 에 받는 중(.crdownload) 이거나 다 받은 파일이 생김."""
+    def check(_driver):
+        return bool(glob.glob(os.path.join(dirpath, "*.crdownload"))) or any(
+            glob.glob(os.path.join(dirpath, p)) for p in patterns
+        )
+    return check
+
+
+def download_finished(dirpath: str, patterns: tuple[str, ...] = DATA_PATTERNS) -> Callable:
+    """받는 중인 파일이 없고 데이터 파일이 있음 → 가장 최근 파일 경로."""
+    def check(_driver):
+        if glob.glob(os.path.join(dirpath, "*.crdownload")):
+            return None
+        done = [fp for p in patterns for fp in glob.glob(os.path.join(dirpath, p))]
+        return max(done, key=os.path.getctime) if done else None
+    return check
+
+
+def wait_for_download(dirpath: str, timeout: float, patterns: tuple[str, ...] = DATA_PATTERNS) -> str:
+    """다운로드 시작(서버가 파일을 만드는 시간) → 완료(전송 시간)를 나눠 기다리고 파일 경로 반환."""
+    t0 = time.monotonic()
+    try:
+        until(None, download_started(dirpath, patterns), "download_started", timeout, poll=0.5)
+        remaining = max(1.0, timeout - (time.monotonic() - t0))
+        return until(None, download_finished(dirpath, patterns), "download_finished", remaining, poll=0.5)
+    except TimeoutException:
+        print(f"[DEBUG] 다운로드 폴더: {os.listdir(dirpath)}")
+        raise TimeoutError("다운로드 완료 대기 시간 초과") from None